@@ -0,0 +1,156 @@
+import asyncio
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from monitoring.tracing import span
+
+READ_PRIORITY = 0
+WRITE_PRIORITY = 1
+
+DEFAULT_ENDPOINT_LIMITS = {
+    "recommendations": 32,
+    "similar": 16,
+    "popular": 16,
+    "batch": 4,
+    "interactions": 16,
+    "stream": 2
+}
+WRITE_ENDPOINTS = {"interactions", "stream"}
+
+class AdmissionRejected(Exception):
+    def __init__(self, endpoint: str, reason: str, retry_after: float = 1.0):
+        super().__init__(f"{endpoint} request rejected: {reason}")
+        self.endpoint = endpoint
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AdmissionController:
+    def __init__(self, max_concurrent: int = 64, max_queue: int = 256, queue_timeout_ms: float = 100.0,
+                 endpoint_limits: Dict[str, int] = None, write_share: float = 0.5):
+        if max_concurrent < 1:
+            raise ValueError(f"max_concurrent must be at least 1, got {max_concurrent}")
+        
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout_ms = queue_timeout_ms
+        self.max_writes = max(1, int(max_concurrent * write_share))
+        self.endpoint_limits = {**DEFAULT_ENDPOINT_LIMITS, **(endpoint_limits or {})}
+        self.active = 0
+        self.active_writes = 0
+        self.endpoint_active = {}
+        self.waiters = []
+        self.sequence = itertools.count()
+        self.stats = {}
+    
+    def _endpoint_stats(self, endpoint: str) -> Dict:
+        stats = self.stats.get(endpoint)
+        if stats is None:
+            stats = {"admitted": 0, "queued": 0, "rejected_queue_full": 0, "rejected_timeout": 0, "shed": 0,
+                     "degraded": 0, "peak_active": 0, "total_wait_ms": 0.0}
+            self.stats[endpoint] = stats
+        return stats
+    
+    def _can_admit(self, endpoint: str) -> bool:
+        if self.active >= self.max_concurrent:
+            return False
+        if self.endpoint_active.get(endpoint, 0) >= self.endpoint_limits.get(endpoint, self.max_concurrent):
+            return False
+        return endpoint not in WRITE_ENDPOINTS or self.active_writes < self.max_writes
+    
+    def _grant(self, endpoint: str):
+        self.active += 1
+        if endpoint in WRITE_ENDPOINTS:
+            self.active_writes += 1
+        active = self.endpoint_active.get(endpoint, 0) + 1
+        self.endpoint_active[endpoint] = active
+        
+        stats = self._endpoint_stats(endpoint)
+        stats["admitted"] += 1
+        stats["peak_active"] = max(stats["peak_active"], active)
+    
+    def _dispatch(self):
+        self.waiters = [waiter for waiter in self.waiters if not waiter[3].done()]
+        self.waiters.sort()
+        for _, _, endpoint, future in self.waiters:
+            if not future.done() and self._can_admit(endpoint):
+                self._grant(endpoint)
+                future.set_result(True)
+        self.waiters = [waiter for waiter in self.waiters if not waiter[3].done()]
+    
+    def _shed_lower_priority(self, priority: int) -> bool:
+        candidates = [waiter for waiter in self.waiters if waiter[0] > priority and not waiter[3].done()]
+        if not candidates:
+            return False
+        
+        victim = max(candidates)
+        self.waiters.remove(victim)
+        self._endpoint_stats(victim[2])["shed"] += 1
+        victim[3].set_exception(AdmissionRejected(victim[2], "shed for higher-priority requests"))
+        return True
+    
+    async def acquire(self, endpoint: str, timeout_ms: Optional[float] = None):
+        if self._can_admit(endpoint):
+            self._grant(endpoint)
+            return
+        
+        stats = self._endpoint_stats(endpoint)
+        priority = WRITE_PRIORITY if endpoint in WRITE_ENDPOINTS else READ_PRIORITY
+        if len(self.waiters) >= self.max_queue and not self._shed_lower_priority(priority):
+            stats["rejected_queue_full"] += 1
+            raise AdmissionRejected(endpoint, "queue full")
+        
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append((priority, next(self.sequence), endpoint, future))
+        stats["queued"] += 1
+        
+        start_time = time.time()
+        timeout_ms = self.queue_timeout_ms if timeout_ms is None else timeout_ms
+        try:
+            with span("admission_queue", endpoint=endpoint):
+                await asyncio.wait({future}, timeout=max(timeout_ms, 0) / 1000)
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                self.release(endpoint)
+            future.cancel()
+            raise
+        stats["total_wait_ms"] += (time.time() - start_time) * 1000
+        
+        if not future.done():
+            future.cancel()
+            stats["rejected_timeout"] += 1
+            raise AdmissionRejected(endpoint, f"not admitted within {timeout_ms:.0f}ms")
+        future.result()
+    
+    def release(self, endpoint: str):
+        self.active -= 1
+        if endpoint in WRITE_ENDPOINTS:
+            self.active_writes -= 1
+        self.endpoint_active[endpoint] -= 1
+        self._dispatch()
+    
+    @asynccontextmanager
+    async def admit(self, endpoint: str, timeout_ms: Optional[float] = None):
+        await self.acquire(endpoint, timeout_ms)
+        try:
+            yield
+        finally:
+            self.release(endpoint)
+    
+    def record_degraded(self, endpoint: str):
+        self._endpoint_stats(endpoint)["degraded"] += 1
+    
+    def get_stats(self) -> Dict:
+        return {
+            "active": self.active,
+            "active_writes": self.active_writes,
+            "queued": sum(1 for waiter in self.waiters if not waiter[3].done()),
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "queue_timeout_ms": self.queue_timeout_ms,
+            "endpoints": {
+                endpoint: {**stats, "active": self.endpoint_active.get(endpoint, 0),
+                           "limit": self.endpoint_limits.get(endpoint, self.max_concurrent)}
+                for endpoint, stats in self.stats.items()
+            }
+        }
\ No newline at end of file
@@ -0,0 +1,216 @@
+import asyncio
+import multiprocessing
+import os
+import shutil
+import signal
+import socket
+from typing import Dict, List
+from aiohttp import web
+from api.admission_control import AdmissionController
+from api.recommendation_server import RecommendationAPI
+from models.model_store import save_model
+from models.persistent_cached_hybrid_recommender import PersistentCachedHybridRecommender
+from monitoring.tracing import RecordingTracer, set_tracer
+
+def published_model_path(publish_dir: str, version: int) -> str:
+    return os.path.join(publish_dir, f"v{version}")
+
+def _reuseport_socket(host: str, port: int) -> socket.socket:
+    if not hasattr(socket, "SO_REUSEPORT"):
+        raise RuntimeError("Pre-fork serving needs SO_REUSEPORT, which this platform does not provide")
+    
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(1024)
+    sock.setblocking(False)
+    return sock
+
+async def _serve_worker(host: str, port: int, publish_dir: str, model_version, model_epoch, db_options: Dict,
+                        admission_options: Dict, poll_interval: float, tracing_options: Dict = None):
+    if tracing_options:
+        set_tracer(RecordingTracer(**tracing_options))
+    version = model_version.value
+    epoch = model_epoch.value
+    api = RecommendationAPI(host, port, admission=AdmissionController(**admission_options))
+    api.recommender = PersistentCachedHybridRecommender(
+        shared_model_path=published_model_path(publish_dir, version), **db_options
+    )
+    await api.recommender.initialize()
+    
+    runner = web.AppRunner(api.app)
+    await runner.setup()
+    site = web.SockSite(runner, _reuseport_socket(host, port))
+    await site.start()
+    print(f"Worker {os.getpid()} serving model v{version} on http://{host}:{port}")
+    
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGTERM, stop.set)
+    loop.add_signal_handler(signal.SIGINT, stop.set)
+    
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), poll_interval)
+        except asyncio.TimeoutError:
+            pass
+        
+        published = model_version.value
+        published_epoch = model_epoch.value
+        if published != version and not stop.is_set():
+            try:
+                if await api.recommender.attach_shared_model(published_model_path(publish_dir, published),
+                                                             retrained=published_epoch != epoch):
+                    version, epoch = published, published_epoch
+                    print(f"Worker {os.getpid()} switched to model v{version}")
+            except (OSError, ValueError) as e:
+                print(f"Worker {os.getpid()} could not load model v{published}: {e}")
+    
+    await runner.cleanup()
+    await api.close()
+
+def _run_worker(host: str, port: int, publish_dir: str, model_version, model_epoch, db_options: Dict,
+                admission_options: Dict, poll_interval: float, tracing_options: Dict = None):
+    asyncio.run(_serve_worker(host, port, publish_dir, model_version, model_epoch, db_options, admission_options,
+                              poll_interval, tracing_options))
+
+class ModelCoordinator:
+    def __init__(self, recommender: PersistentCachedHybridRecommender,
+                 publish_dir: str = "recommendation_engine.shared", publish_interval: float = 30.0,
+                 keep_versions: int = 2):
+        self.recommender = recommender
+        self.publish_dir = publish_dir
+        self.publish_interval = publish_interval
+        self.keep_versions = keep_versions
+        self.context = multiprocessing.get_context("spawn")
+        self.model_version = self.context.Value("i", 0)
+        self.model_epoch = self.context.Value("i", 0)
+        self.publish_task = None
+        self.published_model = None
+        self.stats = {"published_versions": 0, "retrained_versions": 0, "failed_refreshes": 0}
+    
+    async def publish(self) -> int:
+        version = self.model_version.value + 1
+        path = published_model_path(self.publish_dir, version)
+        model = self.recommender.recommender
+        collaborative = model.collaborative
+        
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            None, save_model, path, dict(collaborative.users), dict(collaborative.items),
+            collaborative.user_item_matrix.copy(), collaborative.user_similarity.copy(),
+            self.recommender.model_watermark, model.content_based
+        )
+        if model is not self.published_model:
+            self.model_epoch.value += 1
+            self.stats["retrained_versions"] += 1
+        self.published_model = model
+        self.model_version.value = version
+        self.stats["published_versions"] += 1
+        
+        if version > self.keep_versions:
+            shutil.rmtree(published_model_path(self.publish_dir, version - self.keep_versions), ignore_errors=True)
+        return version
+    
+    async def _publish_loop(self):
+        while True:
+            await asyncio.sleep(self.publish_interval)
+            try:
+                result = await self.recommender.refresh_from_database()
+                if self.recommender.recommender is not self.published_model:
+                    version = await self.publish()
+                    print(f"Published retrained model v{version}")
+                elif result["applied"] != 0:
+                    version = await self.publish()
+                    print(f"Published model v{version} with {result['applied']} new interactions")
+            except Exception as e:
+                self.stats["failed_refreshes"] += 1
+                print(f"Model publish failed: {e}")
+    
+    def start(self):
+        self.publish_task = asyncio.create_task(self._publish_loop())
+    
+    async def close(self):
+        if self.publish_task:
+            self.publish_task.cancel()
+            self.publish_task = None
+
+class PreforkServer:
+    def __init__(self, recommender: PersistentCachedHybridRecommender, host: str = "localhost", port: int = 8000,
+                 workers: int = 2, db_options: Dict = None, publish_dir: str = "recommendation_engine.shared",
+                 publish_interval: float = 30.0, poll_interval: float = 1.0, admission_options: Dict = None,
+                 tracing_options: Dict = None, supervise_interval: float = 1.0):
+        if workers < 1:
+            raise ValueError(f"Worker count must be at least 1, got {workers}")
+        
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.db_options = dict(db_options or {})
+        self.db_options.setdefault("db_path", recommender.db.db_path)
+        self.poll_interval = poll_interval
+        self.admission_options = dict(admission_options or {})
+        self.tracing_options = dict(tracing_options) if tracing_options else None
+        self.coordinator = ModelCoordinator(recommender, publish_dir, publish_interval)
+        self.processes: List[multiprocessing.Process] = []
+        self.supervise_interval = supervise_interval
+        self.supervise_task = None
+        self.worker_restarts = 0
+    
+    def _spawn_worker(self) -> multiprocessing.Process:
+        process = self.coordinator.context.Process(
+            target=_run_worker,
+            args=(self.host, self.port, self.coordinator.publish_dir, self.coordinator.model_version,
+                  self.coordinator.model_epoch, self.db_options, self.admission_options, self.poll_interval,
+                  self.tracing_options),
+            daemon=True
+        )
+        process.start()
+        return process
+    
+    async def start(self):
+        _reuseport_socket(self.host, self.port).close()
+        shutil.rmtree(self.coordinator.publish_dir, ignore_errors=True)
+        
+        version = await self.coordinator.publish()
+        self.processes = [self._spawn_worker() for _ in range(self.workers)]
+        
+        self.coordinator.start()
+        self.supervise_task = asyncio.create_task(self._supervise())
+        print(f"Started {self.workers} workers on http://{self.host}:{self.port} with model v{version}")
+    
+    async def _supervise(self):
+        while True:
+            await asyncio.sleep(self.supervise_interval)
+            for idx, process in enumerate(self.processes):
+                if not process.is_alive():
+                    print(f"Worker {process.pid} exited with code {process.exitcode}, restarting it")
+                    process.close()
+                    self.processes[idx] = self._spawn_worker()
+                    self.worker_restarts += 1
+    
+    def get_stats(self) -> Dict:
+        return {
+            "workers": [{"pid": process.pid, "alive": process.is_alive()} for process in self.processes],
+            "worker_restarts": self.worker_restarts,
+            "model_version": self.coordinator.model_version.value,
+            "model_epoch": self.coordinator.model_epoch.value,
+            **self.coordinator.stats
+        }
+    
+    async def close(self):
+        if self.supervise_task:
+            self.supervise_task.cancel()
+            self.supervise_task = None
+        await self.coordinator.close()
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+        
+        loop = asyncio.get_running_loop()
+        for process in self.processes:
+            await loop.run_in_executor(None, process.join, 10)
+            if process.is_alive():
+                process.kill()
+        self.processes = []
\ No newline at end of file
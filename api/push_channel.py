@@ -0,0 +1,110 @@
+import asyncio
+import json
+from typing import Dict, Optional, Set
+
+class Subscription:
+    __slots__ = ("user_id", "count", "queue")
+    
+    def __init__(self, user_id: str, count: int, queue_size: int):
+        self.user_id = user_id
+        self.count = count
+        self.queue = asyncio.Queue(maxsize=queue_size)
+    
+    def push(self, event: Optional[bytes]):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+def format_event(event: str, data: Dict, event_id: str = None) -> bytes:
+    lines = [f"event: {event}"]
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data)}")
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+class RecommendationPushChannel:
+    def __init__(self, compute, coalesce_ms: float = 50.0, max_subscribers: int = 10000, queue_size: int = 4):
+        self.compute = compute
+        self.coalesce_ms = coalesce_ms
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+        self.subscribers: Dict[str, Set[Subscription]] = {}
+        self.pending = {}
+        self.dirty = set()
+        self.subscriber_count = 0
+        self.stats = {"notifications": 0, "recomputes": 0, "events_pushed": 0, "failed_recomputes": 0}
+    
+    def subscribe(self, user_id: str, count: int) -> Optional[Subscription]:
+        if self.subscriber_count >= self.max_subscribers:
+            return None
+        
+        subscription = Subscription(user_id, count, self.queue_size)
+        self.subscribers.setdefault(user_id, set()).add(subscription)
+        self.subscriber_count += 1
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription):
+        subscriptions = self.subscribers.get(subscription.user_id)
+        if subscriptions is None or subscription not in subscriptions:
+            return
+        
+        subscriptions.discard(subscription)
+        self.subscriber_count -= 1
+        if not subscriptions:
+            del self.subscribers[subscription.user_id]
+    
+    def notify(self, user_id: Optional[str]):
+        users = list(self.subscribers) if user_id is None else [user_id]
+        for subscribed_user in users:
+            if subscribed_user not in self.subscribers:
+                continue
+            if subscribed_user in self.pending:
+                self.dirty.add(subscribed_user)
+                continue
+            
+            self.stats["notifications"] += 1
+            task = asyncio.get_running_loop().create_task(self._recompute(subscribed_user))
+            self.pending[subscribed_user] = task
+            task.add_done_callback(lambda _, user=subscribed_user: self._finish(user))
+    
+    def _finish(self, user_id: str):
+        self.pending.pop(user_id, None)
+        self.dirty.discard(user_id)
+    
+    async def _recompute(self, user_id: str):
+        while True:
+            await asyncio.sleep(self.coalesce_ms / 1000)
+            self.dirty.discard(user_id)
+            subscriptions = list(self.subscribers.get(user_id, ()))
+            if not subscriptions:
+                return
+            
+            try:
+                result = await self.compute(user_id, max(subscription.count for subscription in subscriptions))
+            except Exception as e:
+                self.stats["failed_recomputes"] += 1
+                print(f"Push recompute failed for {user_id}: {e}")
+                return
+            self.stats["recomputes"] += 1
+            
+            for subscription in subscriptions:
+                subscription.push(format_event("recommendations", {
+                    "user_id": user_id,
+                    "recommendations": result["recommendations"][:subscription.count],
+                    "source": result.get("source")
+                }))
+                self.stats["events_pushed"] += 1
+            
+            if user_id not in self.dirty:
+                return
+    
+    def get_stats(self) -> Dict:
+        return {**self.stats, "subscribers": self.subscriber_count, "subscribed_users": len(self.subscribers),
+                "pending_recomputes": len(self.pending)}
+    
+    async def close(self):
+        for task in list(self.pending.values()):
+            task.cancel()
+        for subscriptions in self.subscribers.values():
+            for subscription in subscriptions:
+                subscription.push(None)
\ No newline at end of file
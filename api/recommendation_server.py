@@ -1,28 +1,57 @@
 import asyncio
 import json
+import math
+import os
 import time
 from aiohttp import web, ClientError
-from typing import Dict, Any
+from typing import Any, AsyncIterator, Dict, Optional
+from api.admission_control import AdmissionController, AdmissionRejected
+from api.push_channel import RecommendationPushChannel, format_event
+from api.response_cache import CachedResponse, ResponseCache, encode_payload, etag_matches
 from models.cached_hybrid_recommender import CachedHybridRecommender
+from monitoring.metrics import REGISTRY, REQUEST_DURATION, REQUESTS_TOTAL, stage_timer
+from monitoring.tracing import get_tracer
 
 class RecommendationAPI:
-    def __init__(self, host: str = "localhost", port: int = 8000):
+    def __init__(self, host: str = "localhost", port: int = 8000, max_batch_users: int = 1000,
+                 stream_batch_size: int = 5000, max_reported_errors: int = 100, max_line_bytes: int = 65536,
+                 response_cache_entries: int = 10000, admission: AdmissionController = None,
+                 recommendation_deadline_ms: float = None, push_coalesce_ms: float = 50.0,
+                 max_push_subscribers: int = 10000, push_heartbeat_seconds: float = 15.0):
         self.host = host
         self.port = port
+        self.max_batch_users = max_batch_users
+        self.stream_batch_size = stream_batch_size
+        self.max_reported_errors = max_reported_errors
+        self.max_line_bytes = max_line_bytes
         self.recommender = CachedHybridRecommender()
+        self.response_cache = ResponseCache(response_cache_entries)
+        self.response_cache_source = None
+        self.admission = admission or AdmissionController()
+        self.recommendation_deadline_ms = recommendation_deadline_ms
+        self.push_channel = RecommendationPushChannel(self._compute_pushed_recommendations, push_coalesce_ms,
+                                                      max_push_subscribers)
+        self.push_heartbeat_seconds = push_heartbeat_seconds
         self.app = self._create_app()
         self.request_count = 0
         self.start_time = time.time()
     
     def _create_app(self):
-        app = web.Application()
+        app = web.Application(middlewares=[self._metrics_middleware, self._tracing_middleware])
         
         app.router.add_get('/health', self.health_check)
         app.router.add_get('/recommendations/{user_id}', self.get_recommendations)
+        app.router.add_get('/recommendations/{user_id}/stream', self.stream_recommendations)
+        app.router.add_post('/recommendations/batch', self.get_batch_recommendations)
         app.router.add_post('/interactions', self.record_interaction)
+        app.router.add_post('/interactions/stream', self.stream_interactions)
         app.router.add_get('/similar/{item_id}', self.get_similar_items)
         app.router.add_get('/popular', self.get_popular_items)
         app.router.add_get('/stats', self.get_system_stats)
+        app.router.add_get('/metrics', self.get_metrics)
+        app.router.add_get('/debug/traces', self.get_traces)
+        app.router.add_get('/admin/model', self.get_model_status)
+        app.router.add_post('/admin/model/retrain', self.retrain_model)
         
         return app
     
@@ -37,12 +66,130 @@ class RecommendationAPI:
         await site.start()
         print(f"Server started on http://{self.host}:{self.port}")
     
+    @web.middleware
+    async def _metrics_middleware(self, request, handler):
+        start_time = time.perf_counter()
+        status = 500
+        try:
+            response = await handler(request)
+            status = response.status
+            return response
+        except web.HTTPException as e:
+            status = e.status
+            raise
+        except asyncio.CancelledError:
+            status = 499
+            raise
+        finally:
+            resource = request.match_info.route.resource
+            endpoint = resource.canonical if resource is not None else "unmatched"
+            REGISTRY.observe(REQUEST_DURATION, time.perf_counter() - start_time, endpoint=endpoint,
+                             method=request.method)
+            REGISTRY.increment(REQUESTS_TOTAL, endpoint=endpoint, method=request.method, status=status)
+    
+    @web.middleware
+    async def _tracing_middleware(self, request, handler):
+        tracer = get_tracer()
+        if not tracer.enabled:
+            return await handler(request)
+        
+        resource = request.match_info.route.resource
+        endpoint = resource.canonical if resource is not None else "unmatched"
+        trace = tracer.start_trace(f"{request.method} {endpoint}", path=request.path_qs)
+        status = 500
+        try:
+            response = await handler(request)
+            status = response.status
+            if not response.prepared:
+                response.headers["X-Trace-Id"] = trace.trace_id
+            return response
+        except web.HTTPException as e:
+            status = e.status
+            raise
+        except asyncio.CancelledError:
+            status = 499
+            raise
+        finally:
+            tracer.finish_trace(trace, status=status)
+    
+    def _bind_cache_listeners(self):
+        cache = getattr(self.recommender, "cache", None)
+        if cache is not None and cache is not self.response_cache_source:
+            self.response_cache.clear()
+            cache.add_invalidation_listener(self.response_cache.invalidate)
+            cache.add_invalidation_listener(self.push_channel.notify)
+            self.response_cache_source = cache
+    
+    def _encoded_response(self, request, entry: CachedResponse, source: str, start_time: float) -> web.Response:
+        headers = {
+            "ETag": entry.etag,
+            "Cache-Control": "no-cache",
+            "X-Source": source,
+            "X-Response-Time-Ms": f"{(time.time() - start_time) * 1000:.2f}"
+        }
+        if etag_matches(request.headers.get("If-None-Match"), entry.etag):
+            self.response_cache.stats["not_modified"] += 1
+            return web.Response(status=304, headers=headers)
+        return web.Response(body=entry.body, content_type="application/json", headers=headers)
+    
+    def _overloaded_response(self, error: AdmissionRejected) -> web.Response:
+        return web.json_response({
+            "error": str(error),
+            "reason": error.reason
+        }, status=503, headers={"Retry-After": f"{error.retry_after:.0f}"})
+    
+    async def _cached_response(self, request, start_time: float, endpoint: str, key: tuple, ttl: float, compute,
+                               user_id: str = None, degraded=None, admission_timeout_ms: float = None
+                               ) -> web.Response:
+        self._bind_cache_listeners()
+        
+        with stage_timer("response_cache_lookup"):
+            entry = self.response_cache.get(key)
+        if entry is not None and user_id is not None:
+            if self.recommender.cache.should_refresh_user_recommendations(user_id):
+                self.response_cache.invalidate(user_id)
+                entry = None
+            else:
+                self.recommender.cache.record_user_recommendation_read(user_id)
+        if entry is not None:
+            return self._encoded_response(request, entry, "response_cache", start_time)
+        
+        version = self.response_cache.version(user_id)
+        try:
+            async with self.admission.admit(endpoint, admission_timeout_ms):
+                result = await compute()
+        except AdmissionRejected as e:
+            if degraded is None:
+                return self._overloaded_response(e)
+            self.admission.record_degraded(endpoint)
+            result = await degraded()
+        
+        if result.get("revalidating") or result.get("degraded"):
+            body, etag = encode_payload(result)
+            entry = CachedResponse(body, etag, 0, user_id)
+        else:
+            entry = self.response_cache.put(key, result, ttl, user_id, version)
+        return self._encoded_response(request, entry, result.get("source", "computed"), start_time)
+    
+    async def _degraded_recommendations(self, user_id: str, num_recs: int) -> Dict[str, Any]:
+        popular = await self.recommender.get_popular_items("all", num_recs)
+        return {
+            "recommendations": [
+                {"item": item["item"], "score": item["score"], "strategy": "popular"}
+                for item in popular["popular_items"]
+            ],
+            "user_id": user_id,
+            "degraded": True,
+            "source": "degraded:popular"
+        }
+    
     async def health_check(self, request):
         return web.json_response({
             "status": "healthy",
             "service": "recommendation-engine",
             "uptime_seconds": int(time.time() - self.start_time),
-            "requests_served": self.request_count
+            "requests_served": self.request_count,
+            "pid": os.getpid()
         })
     
     async def get_recommendations(self, request):
@@ -58,18 +205,155 @@ class RecommendationAPI:
                     "error": "Maximum 50 recommendations allowed"
                 }, status=400)
             
-            result = await self.recommender.get_recommendations(user_id, num_recs)
+            deadline_ms = self.recommendation_deadline_ms
+            if 'X-Deadline-Ms' in request.headers:
+                try:
+                    deadline_ms = float(request.headers['X-Deadline-Ms'])
+                except ValueError:
+                    deadline_ms = math.nan
+                if not math.isfinite(deadline_ms) or deadline_ms <= 0:
+                    return web.json_response({
+                        "error": "X-Deadline-Ms must be a positive number of milliseconds"
+                    }, status=400)
             
-            response_time = (time.time() - start_time) * 1000
-            result['api_response_time_ms'] = f"{response_time:.2f}"
+            def remaining_ms():
+                if deadline_ms is None:
+                    return None
+                return max(deadline_ms - (time.time() - start_time) * 1000, 0)
             
-            return web.json_response(result)
+            admission_timeout_ms = None
+            if deadline_ms is not None:
+                admission_timeout_ms = min(self.admission.queue_timeout_ms, deadline_ms)
             
+            return await self._cached_response(
+                request, start_time, "recommendations", ("recommendations", user_id, num_recs), 300,
+                lambda: self.recommender.get_recommendations(user_id, num_recs, remaining_ms()), user_id,
+                lambda: self._degraded_recommendations(user_id, num_recs), admission_timeout_ms
+            )
+        
         except Exception as e:
             return web.json_response({
                 "error": f"Failed to get recommendations: {str(e)}"
             }, status=500)
     
+    async def _compute_pushed_recommendations(self, user_id: str, count: int) -> Dict[str, Any]:
+        version = self.response_cache.version(user_id)
+        result = await self.recommender.get_recommendations(user_id, count)
+        if not (result.get("revalidating") or result.get("degraded")):
+            self.response_cache.put(("recommendations", user_id, count), result, 300, user_id, version)
+        return result
+    
+    async def stream_recommendations(self, request):
+        self.request_count += 1
+        user_id = request.match_info['user_id']
+        try:
+            count = int(request.query.get('count', 5))
+        except ValueError:
+            return web.json_response({
+                "error": "count must be an integer"
+            }, status=400)
+        if count > 50:
+            return web.json_response({
+                "error": "Maximum 50 recommendations allowed"
+            }, status=400)
+        
+        self._bind_cache_listeners()
+        subscription = self.push_channel.subscribe(user_id, count)
+        if subscription is None:
+            return web.json_response({
+                "error": "Too many push subscribers"
+            }, status=503, headers={"Retry-After": "5"})
+        
+        response = web.StreamResponse(headers={
+            "Content-Type": "text/event-stream",
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        })
+        try:
+            await response.prepare(request)
+            current = await self.recommender.get_recommendations(user_id, count)
+            await response.write(format_event("recommendations", {
+                "user_id": user_id,
+                "recommendations": current["recommendations"],
+                "source": current.get("source")
+            }))
+            
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), self.push_heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    await response.write(b": keep-alive\n\n")
+                    continue
+                if event is None:
+                    break
+                await response.write(event)
+        except (ConnectionResetError, ClientError):
+            pass
+        finally:
+            self.push_channel.unsubscribe(subscription)
+        
+        return response
+    
+    async def get_batch_recommendations(self, request):
+        start_time = time.time()
+        self.request_count += 1
+        
+        try:
+            data = await request.json()
+            
+            users = data.get('users') if isinstance(data, dict) else None
+            if not isinstance(users, list) or not users:
+                return web.json_response({
+                    "error": "Request body must contain a non-empty 'users' list"
+                }, status=400)
+            
+            if len(users) > self.max_batch_users:
+                return web.json_response({
+                    "error": f"Maximum {self.max_batch_users} users per batch"
+                }, status=400)
+            
+            default_count = int(data.get('count', 5))
+            requests = []
+            for entry in users:
+                if isinstance(entry, str):
+                    user_id, num_recs = entry, default_count
+                elif isinstance(entry, dict) and isinstance(entry.get('user_id'), str):
+                    user_id, num_recs = entry['user_id'], int(entry.get('count', default_count))
+                else:
+                    return web.json_response({
+                        "error": f"Invalid batch entry: {entry}"
+                    }, status=400)
+                
+                if num_recs > 50:
+                    return web.json_response({
+                        "error": "Maximum 50 recommendations allowed"
+                    }, status=400)
+                requests.append((user_id, num_recs))
+            
+            async with self.admission.admit("batch"):
+                result = await self.recommender.get_batch_recommendations(requests)
+            
+            response_time = (time.time() - start_time) * 1000
+            result['api_response_time_ms'] = f"{response_time:.2f}"
+            
+            with stage_timer("serialization"):
+                return web.json_response(result)
+        
+        except AdmissionRejected as e:
+            return self._overloaded_response(e)
+        except json.JSONDecodeError:
+            return web.json_response({
+                "error": "Invalid JSON in request body"
+            }, status=400)
+        except ValueError as e:
+            return web.json_response({
+                "error": f"Invalid data: {str(e)}"
+            }, status=400)
+        except Exception as e:
+            return web.json_response({
+                "error": f"Failed to get batch recommendations: {str(e)}"
+            }, status=500)
+    
     async def record_interaction(self, request):
         start_time = time.time()
         self.request_count += 1
@@ -93,13 +377,16 @@ class RecommendationAPI:
                     "error": "Rating must be between 1 and 5"
                 }, status=400)
             
-            result = await self.recommender.record_user_interaction(user_id, item_id, rating)
+            async with self.admission.admit("interactions"):
+                result = await self.recommender.record_user_interaction(user_id, item_id, rating)
             
             response_time = (time.time() - start_time) * 1000
             result['api_response_time_ms'] = f"{response_time:.2f}"
             
             return web.json_response(result)
-            
+        
+        except AdmissionRejected as e:
+            return self._overloaded_response(e)
         except json.JSONDecodeError:
             return web.json_response({
                 "error": "Invalid JSON in request body"
@@ -113,6 +400,114 @@ class RecommendationAPI:
                 "error": f"Failed to record interaction: {str(e)}"
             }, status=500)
     
+    @staticmethod
+    def _parse_interaction(line: bytes) -> Dict[str, Any]:
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError:
+            raise ValueError("Invalid JSON")
+        
+        if not isinstance(data, dict):
+            raise ValueError("Record must be a JSON object")
+        for field in ('user_id', 'item_id', 'rating'):
+            if field not in data:
+                raise ValueError(f"Missing required field: {field}")
+        if not isinstance(data['user_id'], str) or not isinstance(data['item_id'], str):
+            raise ValueError("user_id and item_id must be strings")
+        
+        try:
+            rating = float(data['rating'])
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid rating: {data['rating']!r}")
+        if not (1 <= rating <= 5):
+            raise ValueError("Rating must be between 1 and 5")
+        
+        return {"user_id": data['user_id'], "item_id": data['item_id'], "rating": rating}
+    
+    async def _read_lines(self, content) -> AsyncIterator[Optional[bytes]]:
+        buffer = bytearray()
+        oversized = False
+        async for chunk in content.iter_any():
+            buffer += chunk
+            while True:
+                end = buffer.find(b"\n")
+                if end < 0:
+                    break
+                line = bytes(buffer[:end + 1])
+                del buffer[:end + 1]
+                yield None if oversized or len(line) > self.max_line_bytes else line
+                oversized = False
+            if len(buffer) > self.max_line_bytes:
+                buffer.clear()
+                oversized = True
+        if oversized or len(buffer) > self.max_line_bytes:
+            yield None
+        elif buffer:
+            yield bytes(buffer)
+    
+    async def stream_interactions(self, request):
+        start_time = time.time()
+        self.request_count += 1
+        
+        summary = {"received": 0, "recorded": 0, "rejected": 0, "batches": 0, "model_updates": 0, "errors": []}
+        batch = []
+        batch_lines = []
+        
+        def report_error(line_number: int, error: str):
+            summary["rejected"] += 1
+            if len(summary["errors"]) < self.max_reported_errors:
+                summary["errors"].append({"line": line_number, "error": error})
+        
+        async def apply_batch():
+            result = await self.recommender.record_user_interactions(batch)
+            summary["recorded"] += result["recorded"]
+            summary["model_updates"] += result["model_updates"]
+            summary["batches"] += 1
+            for error in result["errors"]:
+                report_error(batch_lines[error["index"]], error["error"])
+            batch.clear()
+            batch_lines.clear()
+        
+        try:
+            async with self.admission.admit("stream"):
+                line_number = 0
+                async for line in self._read_lines(request.content):
+                    line_number += 1
+                    if line is None:
+                        summary["received"] += 1
+                        report_error(line_number, f"Line exceeds {self.max_line_bytes} bytes")
+                        continue
+                    if not line.strip():
+                        continue
+                    
+                    summary["received"] += 1
+                    try:
+                        batch.append(self._parse_interaction(line))
+                        batch_lines.append(line_number)
+                    except ValueError as e:
+                        report_error(line_number, str(e))
+                        continue
+                    
+                    if len(batch) >= self.stream_batch_size:
+                        await apply_batch()
+                
+                if batch:
+                    await apply_batch()
+        
+        except AdmissionRejected as e:
+            return self._overloaded_response(e)
+        except Exception as e:
+            summary["error"] = f"Stream aborted: {str(e)}"
+            response_time = (time.time() - start_time) * 1000
+            summary['api_response_time_ms'] = f"{response_time:.2f}"
+            return web.json_response(summary, status=500)
+        
+        elapsed = time.time() - start_time
+        summary["records_per_sec"] = round(summary["received"] / elapsed, 1) if elapsed > 0 else None
+        summary['api_response_time_ms'] = f"{elapsed * 1000:.2f}"
+        
+        return web.json_response(summary)
+    
     async def get_similar_items(self, request):
         start_time = time.time()
         self.request_count += 1
@@ -126,13 +521,11 @@ class RecommendationAPI:
                     "error": "Maximum 20 similar items allowed"
                 }, status=400)
             
-            result = await self.recommender.get_similar_items(item_id, num_similar)
-            
-            response_time = (time.time() - start_time) * 1000
-            result['api_response_time_ms'] = f"{response_time:.2f}"
-            
-            return web.json_response(result)
-            
+            return await self._cached_response(
+                request, start_time, "similar", ("similar", item_id, num_similar), 86400,
+                lambda: self.recommender.get_similar_items(item_id, num_similar)
+            )
+        
         except Exception as e:
             return web.json_response({
                 "error": f"Failed to get similar items: {str(e)}"
@@ -151,13 +544,11 @@ class RecommendationAPI:
                     "error": "Maximum 50 popular items allowed"
                 }, status=400)
             
-            result = await self.recommender.get_popular_items(category, num_items)
-            
-            response_time = (time.time() - start_time) * 1000
-            result['api_response_time_ms'] = f"{response_time:.2f}"
-            
-            return web.json_response(result)
-            
+            return await self._cached_response(
+                request, start_time, "popular", ("popular", category, num_items), 1800,
+                lambda: self.recommender.get_popular_items(category, num_items)
+            )
+        
         except Exception as e:
             return web.json_response({
                 "error": f"Failed to get popular items: {str(e)}"
@@ -170,15 +561,70 @@ class RecommendationAPI:
             system_stats = {
                 "service_uptime_seconds": int(time.time() - self.start_time),
                 "total_api_requests": self.request_count,
+                "response_cache": self.response_cache.get_stats(),
+                "admission": self.admission.get_stats(),
+                "push": self.push_channel.get_stats(),
+                "latency": REGISTRY.get_stats(),
+                "tracing": get_tracer().get_stats(),
                 "performance": performance_stats
             }
             
             return web.json_response(system_stats)
-            
+        
         except Exception as e:
             return web.json_response({
                 "error": f"Failed to get stats: {str(e)}"
             }, status=500)
     
+    async def get_traces(self, request):
+        kind = request.query.get('kind', 'all')
+        if kind not in ("all", "slow", "sampled"):
+            return web.json_response({
+                "error": "kind must be one of all, slow or sampled"
+            }, status=400)
+        try:
+            limit = int(request.query.get('limit', 20))
+        except ValueError:
+            return web.json_response({
+                "error": "limit must be an integer"
+            }, status=400)
+        
+        tracer = get_tracer()
+        return web.json_response({**tracer.get_traces(kind, limit), "stats": tracer.get_stats()})
+    
+    async def get_model_status(self, request):
+        recommender = self.recommender.recommender
+        scheduler = getattr(self.recommender, "retrain_scheduler", None)
+        return web.json_response({
+            "trained": recommender.is_trained,
+            "users": len(recommender.collaborative.users),
+            "items": len(recommender.content_based.items),
+            **self.recommender.model_manager.get_stats(),
+            "scheduler": scheduler.get_stats() if scheduler else None
+        })
+    
+    async def retrain_model(self, request):
+        manager = self.recommender.model_manager
+        already_running = manager.retraining
+        try:
+            task = manager.retrain(reason="admin")
+        except ValueError as e:
+            return web.json_response({
+                "error": str(e)
+            }, status=400)
+        
+        if request.query.get('wait', 'false').lower() not in ("1", "true", "yes"):
+            return web.json_response({
+                "status": "running" if already_running else "started"
+            }, status=202)
+        
+        result = await asyncio.shield(task)
+        return web.json_response(result, status=500 if result["status"] == "failed" else 200)
+    
+    async def get_metrics(self, request):
+        return web.Response(body=REGISTRY.render().encode("utf-8"),
+                            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+    
     async def close(self):
+        await self.push_channel.close()
         await self.recommender.close()
\ No newline at end of file
@@ -0,0 +1,107 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from monitoring.metrics import stage_timer
+
+VOLATILE_FIELDS = ("source", "response_time_ms", "api_response_time_ms", "timestamp", "revalidating")
+
+class CachedResponse:
+    __slots__ = ("body", "etag", "expires_at", "user_id")
+    
+    def __init__(self, body: bytes, etag: str, expires_at: float, user_id: Optional[str]):
+        self.body = body
+        self.etag = etag
+        self.expires_at = expires_at
+        self.user_id = user_id
+
+def encode_payload(payload: Dict) -> Tuple[bytes, str]:
+    with stage_timer("serialization"):
+        body = json.dumps({key: value for key, value in payload.items() if key not in VOLATILE_FIELDS}).encode("utf-8")
+        etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+    return body, etag
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Tuple, CachedResponse]" = OrderedDict()
+        self.user_keys = {}
+        self.user_epochs = {}
+        self.epoch = 0
+        self.stats = {"hits": 0, "misses": 0, "not_modified": 0, "invalidations": 0, "evictions": 0}
+    
+    def get(self, key: Tuple) -> Optional[CachedResponse]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        
+        if time.time() >= entry.expires_at:
+            self._remove(key)
+            self.stats["misses"] += 1
+            return None
+        
+        self.entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return entry
+    
+    def version(self, user_id: str = None) -> Tuple[int, int]:
+        return self.epoch, self.user_epochs.get(user_id, 0)
+    
+    def put(self, key: Tuple, payload: Dict, ttl: float, user_id: str = None,
+            version: Tuple[int, int] = None) -> CachedResponse:
+        body, etag = encode_payload(payload)
+        entry = CachedResponse(body, etag, time.time() + ttl, user_id)
+        if version is not None and version != self.version(user_id):
+            return entry
+        
+        if key in self.entries:
+            self._remove(key)
+        self.entries[key] = entry
+        if user_id is not None:
+            self.user_keys.setdefault(user_id, set()).add(key)
+        
+        while len(self.entries) > self.max_entries:
+            self._remove(next(iter(self.entries)))
+            self.stats["evictions"] += 1
+        return entry
+    
+    def _remove(self, key: Tuple):
+        entry = self.entries.pop(key, None)
+        if entry is None or entry.user_id is None:
+            return
+        
+        keys = self.user_keys.get(entry.user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.user_keys[entry.user_id]
+    
+    def invalidate(self, user_id: Optional[str]):
+        if user_id is None:
+            self.clear()
+            return
+        
+        self.user_epochs[user_id] = self.user_epochs.get(user_id, 0) + 1
+        for key in list(self.user_keys.get(user_id, ())):
+            self._remove(key)
+            self.stats["invalidations"] += 1
+    
+    def clear(self):
+        self.epoch += 1
+        self.stats["invalidations"] += len(self.entries)
+        self.entries.clear()
+        self.user_keys.clear()
+    
+    def get_stats(self) -> Dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        hit_rate = self.stats["hits"] / lookups * 100 if lookups > 0 else 0
+        return {**self.stats, "entries": len(self.entries), "hit_rate": f"{hit_rate:.2f}%"}
\ No newline at end of file
@@ -0,0 +1,93 @@
+import time
+import numpy as np
+from typing import Dict, List, Tuple
+
+INTERACTION_DTYPE = np.dtype([("item", np.int32), ("rating", np.float64), ("timestamp", np.float64)])
+
+class InteractionRingBuffer:
+    def __init__(self, capacity: int):
+        self.records = np.zeros(capacity, dtype=INTERACTION_DTYPE)
+        self.head = 0
+        self.size = 0
+    
+    def append(self, item_idx: int, rating: float, timestamp: float):
+        self.records[self.head] = (item_idx, rating, timestamp)
+        self.head = (self.head + 1) % len(self.records)
+        if self.size < len(self.records):
+            self.size += 1
+    
+    def views(self) -> Tuple[np.ndarray, ...]:
+        if self.size < len(self.records):
+            return (self.records[:self.size],)
+        if self.head == 0:
+            return (self.records,)
+        return (self.records[self.head:], self.records[:self.head])
+
+class InteractionStore:
+    def __init__(self, capacity: int = 50, ttl: int = 7200):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.buffers = {}
+        self.expiry = {}
+        self.item_index = {}
+        self.item_ids = []
+    
+    def _item_code(self, item_id: str) -> int:
+        code = self.item_index.get(item_id)
+        if code is None:
+            code = len(self.item_ids)
+            self.item_index[item_id] = code
+            self.item_ids.append(item_id)
+        return code
+    
+    def contains(self, user_id: str) -> bool:
+        expiry = self.expiry.get(user_id)
+        if expiry is None:
+            return False
+        if time.time() >= expiry:
+            self.remove(user_id)
+            return False
+        return True
+    
+    def append(self, user_id: str, item_id: str, rating: float, timestamp: float = None):
+        now = time.time()
+        buffer = self.buffers.get(user_id) if self.contains(user_id) else None
+        if buffer is None:
+            buffer = InteractionRingBuffer(self.capacity)
+            self.buffers[user_id] = buffer
+        
+        buffer.append(self._item_code(item_id), rating, timestamp if timestamp is not None else now)
+        self.expiry[user_id] = now + self.ttl
+    
+    def load(self, user_id: str, interactions: List[Tuple[str, float, float]]):
+        buffer = InteractionRingBuffer(self.capacity)
+        for item_id, rating, timestamp in interactions[-self.capacity:]:
+            buffer.append(self._item_code(item_id), rating, timestamp)
+        
+        self.buffers[user_id] = buffer
+        self.expiry[user_id] = time.time() + self.ttl
+    
+    def records(self, user_id: str) -> Tuple[np.ndarray, ...]:
+        if not self.contains(user_id):
+            return ()
+        return self.buffers[user_id].views()
+    
+    def get_interactions(self, user_id: str) -> List[Dict]:
+        latest = {}
+        for records in self.records(user_id):
+            for item_idx, rating, timestamp in zip(records["item"].tolist(), records["rating"].tolist(),
+                                                   records["timestamp"].tolist()):
+                latest.pop(item_idx, None)
+                latest[item_idx] = (rating, timestamp)
+        
+        return [
+            {"item_id": self.item_ids[item_idx], "rating": rating, "timestamp": timestamp}
+            for item_idx, (rating, timestamp) in latest.items()
+        ]
+    
+    def remove(self, user_id: str):
+        self.buffers.pop(user_id, None)
+        self.expiry.pop(user_id, None)
+    
+    def __len__(self) -> int:
+        return len(self.buffers)
\ No newline at end of file
@@ -1,43 +1,213 @@
 import asyncio
 import json
+import os
 import time
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Callable, Dict, List, Tuple, Optional, Any
+from cache.interaction_store import InteractionStore
+from cache.snapshot import encode_snapshot, write_snapshot, read_snapshot
 
 class MemoryCache:
-    def __init__(self):
+    def __init__(self, refresh_ahead_reads: int = 10, refresh_ahead_window: float = 0.2):
         self.cache = {}
-        self.cache_stats = {"hits": 0, "misses": 0}
+        self.cache_stats = {"hits": 0, "misses": 0, "stale_hits": 0}
+        self.refresh_meta = {}
+        self.refresh_ahead_reads = refresh_ahead_reads
+        self.refresh_ahead_window = refresh_ahead_window
+        self.generation = 0
+        self.generation_keys = set()
+        self.retired_keys = []
+        self.reclaim_batch_size = 64
+        self.user_versions = {}
+        self.interactions = InteractionStore(capacity=50, ttl=7200)
+        self.snapshot_path = None
+        self.snapshot_task = None
+        self.invalidation_listeners = []
+    
+    def add_invalidation_listener(self, listener: Callable[[Optional[str]], None]):
+        self.invalidation_listeners.append(listener)
+    
+    def _notify_invalidation(self, user_id: Optional[str]):
+        for listener in self.invalidation_listeners:
+            listener(user_id)
     
     async def connect(self):
         print("Using in-memory cache")
     
     async def close(self):
-        pass
+        if self.snapshot_task:
+            self.snapshot_task.cancel()
+            self.snapshot_task = None
+            await self.save_snapshot(self.snapshot_path)
+    
+    async def save_snapshot(self, path: str) -> int:
+        while self.retired_keys:
+            self._reclaim_retired_keys()
+        
+        now = time.time()
+        entries = [(key, entry) for key, entry in self.cache.items() if entry[1] > now]
+        refresh_meta = {key: dict(meta) for key, meta in self.refresh_meta.items()}
+        
+        loop = asyncio.get_running_loop()
+        payload = await loop.run_in_executor(
+            None, encode_snapshot, self.generation, entries, refresh_meta, now
+        )
+        await loop.run_in_executor(None, write_snapshot, path, payload)
+        return len(entries)
+    
+    async def load_snapshot(self, path: str) -> int:
+        if not os.path.exists(path):
+            return 0
+        
+        loop = asyncio.get_running_loop()
+        try:
+            generation, saved_at, records = await loop.run_in_executor(None, read_snapshot, path)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable cache snapshot {path}: {e}")
+            return 0
+        
+        now = time.time()
+        self.generation = max(self.generation, generation)
+        generation_prefix = f":g{self.generation}:"
+        
+        restored = 0
+        for key, data, expiry, soft_expiry, ttl in records:
+            if expiry <= now:
+                continue
+            self.cache[key] = (data, expiry)
+            if soft_expiry:
+                self.refresh_meta[key] = {"soft_expiry": soft_expiry, "ttl": ttl, "reads": 0}
+            if generation_prefix in key:
+                self.generation_keys.add(key)
+            restored += 1
+        
+        print(f"Restored {restored} cache entries from snapshot saved {now - saved_at:.0f}s ago")
+        return restored
+    
+    def start_snapshots(self, path: str, interval: float = 60.0):
+        self.snapshot_path = path
+        if self.snapshot_task is None:
+            self.snapshot_task = asyncio.create_task(self._snapshot_loop(interval))
+    
+    async def _snapshot_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.save_snapshot(self.snapshot_path)
+            except Exception as e:
+                print(f"Cache snapshot failed: {e}")
+    
+    def _generation_key(self, prefix: str, user_id: str) -> str:
+        return f"{prefix}:g{self.generation}:{user_id}"
+    
+    def bump_generation(self) -> int:
+        if self.generation_keys:
+            self.retired_keys.append(self.generation_keys)
+        self.generation_keys = set()
+        self.generation += 1
+        self._notify_invalidation(None)
+        return self.generation
+    
+    def _reclaim_retired_keys(self):
+        budget = self.reclaim_batch_size
+        while budget > 0 and self.retired_keys:
+            retired = self.retired_keys[-1]
+            while budget > 0 and retired:
+                key = retired.pop()
+                self.cache.pop(key, None)
+                self.refresh_meta.pop(key, None)
+                budget -= 1
+            if not retired:
+                self.retired_keys.pop()
     
     async def get_user_recommendations(self, user_id: str) -> Optional[List[Dict]]:
-        key = f"user_recs:{user_id}"
+        entry = await self.get_user_recommendation_entry(user_id)
+        return entry["recommendations"] if entry else None
+    
+    async def get_user_recommendation_entry(self, user_id: str) -> Optional[Dict]:
+        self._reclaim_retired_keys()
+        key = self._generation_key("user_recs", user_id)
         
         if key in self.cache:
             data, expiry = self.cache[key]
-            if time.time() < expiry:
+            now = time.time()
+            if now < expiry:
                 self.cache_stats["hits"] += 1
+                meta = self.refresh_meta.get(key)
+                if meta:
+                    meta["reads"] += 1
+                    if now >= meta["soft_expiry"]:
+                        self.cache_stats["stale_hits"] += 1
                 return json.loads(data)
             else:
-                del self.cache[key]
+                self._delete(key)
         
         self.cache_stats["misses"] += 1
         return None
     
+    def user_version(self, user_id: str) -> Tuple[int, int]:
+        return self.generation, self.user_versions.get(user_id, 0)
+    
     async def set_user_recommendations(self, user_id: str, recommendations: List[Tuple[str, float, str]], 
-                                     ttl: int = 300):
-        key = f"user_recs:{user_id}"
-        data = [{"item": item, "score": score, "strategy": strategy} 
-                for item, score, strategy in recommendations]
+                                     ttl: int = 300, stale_ttl: int = 300, depth: int = None,
+                                     version: Tuple[int, int] = None) -> bool:
+        if version is not None and version != self.user_version(user_id):
+            return False
         
-        self.cache[key] = (json.dumps(data), time.time() + ttl)
+        self._reclaim_retired_keys()
+        key = self._generation_key("user_recs", user_id)
+        data = {
+            "depth": depth if depth is not None else len(recommendations),
+            "recommendations": [{"item": item, "score": score, "strategy": strategy} 
+                                for item, score, strategy in recommendations]
+        }
+        
+        now = time.time()
+        self.cache[key] = (json.dumps(data), now + ttl + stale_ttl)
+        self.refresh_meta[key] = {"soft_expiry": now + ttl, "ttl": ttl, "reads": 0}
+        self.generation_keys.add(key)
+        return True
+    
+    async def extend_user_recommendations(self, user_id: str, recommendations: List[Tuple[str, float, str]],
+                                          depth: int, version: Tuple[int, int] = None) -> Optional[List[Dict]]:
+        key = self._generation_key("user_recs", user_id)
+        
+        if key not in self.cache or (version is not None and version != self.user_version(user_id)):
+            return None
+        
+        data, expiry = self.cache[key]
+        if time.time() >= expiry:
+            self._delete(key)
+            return None
+        
+        entry = json.loads(data)
+        entry["recommendations"].extend(
+            {"item": item, "score": score, "strategy": strategy}
+            for item, score, strategy in recommendations
+        )
+        entry["depth"] = depth
+        
+        self.cache[key] = (json.dumps(entry), expiry)
+        return entry["recommendations"]
+    
+    def record_user_recommendation_read(self, user_id: str):
+        meta = self.refresh_meta.get(self._generation_key("user_recs", user_id))
+        if meta:
+            meta["reads"] += 1
+    
+    def should_refresh_user_recommendations(self, user_id: str) -> bool:
+        meta = self.refresh_meta.get(self._generation_key("user_recs", user_id))
+        if not meta:
+            return False
+        
+        remaining = meta["soft_expiry"] - time.time()
+        if remaining <= 0:
+            return True
+        
+        return (meta["reads"] >= self.refresh_ahead_reads and
+                remaining <= meta["ttl"] * self.refresh_ahead_window)
     
     async def get_user_profile(self, user_id: str) -> Optional[Dict]:
-        key = f"user_profile:{user_id}"
+        key = self._generation_key("user_profile", user_id)
         
         if key in self.cache:
             data, expiry = self.cache[key]
@@ -45,14 +215,15 @@ class MemoryCache:
                 self.cache_stats["hits"] += 1
                 return json.loads(data)
             else:
-                del self.cache[key]
+                self._delete(key)
         
         self.cache_stats["misses"] += 1
         return None
     
     async def set_user_profile(self, user_id: str, profile: Dict, ttl: int = 3600):
-        key = f"user_profile:{user_id}"
+        key = self._generation_key("user_profile", user_id)
         self.cache[key] = (json.dumps(profile), time.time() + ttl)
+        self.generation_keys.add(key)
     
     async def get_item_similarity(self, item_id: str) -> Optional[List[Dict]]:
         key = f"item_sim:{item_id}"
@@ -74,45 +245,43 @@ class MemoryCache:
         data = [{"item": item, "score": score} for item, score in similar_items]
         self.cache[key] = (json.dumps(data), time.time() + ttl)
     
+    def has_item_similarity(self, item_id: str) -> bool:
+        entry = self.cache.get(f"item_sim:{item_id}")
+        return entry is not None and time.time() < entry[1]
+    
     async def invalidate_user_cache(self, user_id: str):
+        self.user_versions[user_id] = self.user_versions.get(user_id, 0) + 1
         keys_to_delete = [
-            f"user_recs:{user_id}",
-            f"user_profile:{user_id}"
+            self._generation_key("user_recs", user_id),
+            self._generation_key("user_profile", user_id)
         ]
         
         for key in keys_to_delete:
-            if key in self.cache:
-                del self.cache[key]
+            self._delete(key)
+        self._notify_invalidation(user_id)
+    
+    def _delete(self, key: str):
+        self.cache.pop(key, None)
+        self.refresh_meta.pop(key, None)
+        self.generation_keys.discard(key)
     
     async def update_user_interaction(self, user_id: str, item_id: str, rating: float):
-        interaction_key = f"user_interactions:{user_id}"
-        
-        interactions = []
-        if interaction_key in self.cache:
-            data, expiry = self.cache[interaction_key]
-            if time.time() < expiry:
-                interactions = json.loads(data)
-        
-        interactions.append({
-            "item_id": item_id,
-            "rating": rating,
-            "timestamp": time.time()
-        })
-        
-        interactions = interactions[-50:]
-        
-        self.cache[interaction_key] = (json.dumps(interactions), time.time() + 7200)
+        self.interactions.append(user_id, item_id, rating)
         await self.invalidate_user_cache(user_id)
     
-    async def get_user_interactions(self, user_id: str) -> List[Dict]:
-        key = f"user_interactions:{user_id}"
-        
-        if key in self.cache:
-            data, expiry = self.cache[key]
-            if time.time() < expiry:
-                return json.loads(data)
+    async def update_user_interactions(self, interactions: List[Dict], tracked_only: bool = False):
+        users = set()
+        for interaction in interactions:
+            user_id = interaction["user_id"]
+            if not tracked_only or self.interactions.contains(user_id):
+                self.interactions.append(user_id, interaction["item_id"], interaction["rating"])
+            users.add(user_id)
         
-        return []
+        for user_id in users:
+            await self.invalidate_user_cache(user_id)
+    
+    async def get_user_interactions(self, user_id: str) -> List[Dict]:
+        return self.interactions.get_interactions(user_id)
     
     def get_cache_stats(self) -> Dict[str, Any]:
         total_requests = self.cache_stats["hits"] + self.cache_stats["misses"]
@@ -121,8 +290,12 @@ class MemoryCache:
         return {
             "hits": self.cache_stats["hits"],
             "misses": self.cache_stats["misses"],
+            "stale_hits": self.cache_stats["stale_hits"],
             "hit_rate": f"{hit_rate:.2%}",
-            "cache_size": len(self.cache)
+            "cache_size": len(self.cache),
+            "interaction_users": len(self.interactions),
+            "generation": self.generation,
+            "retired_keys": sum(len(keys) for keys in self.retired_keys)
         }
     
     async def get_popular_items(self, category: str = "all") -> Optional[List[Dict]]:
@@ -138,7 +311,11 @@ class MemoryCache:
         
         self.cache_stats["misses"] += 1
         return None
-
+    
+    def has_popular_items(self, category: str) -> bool:
+        entry = self.cache.get(f"popular:{category}")
+        return entry is not None and time.time() < entry[1]
+    
     async def set_popular_items(self, category: str, items: List[Tuple[str, float]], 
                             ttl: int = 1800):
         key = f"popular:{category}"
@@ -0,0 +1,61 @@
+import mmap
+import os
+import struct
+from typing import Dict, List, Tuple
+
+SNAPSHOT_MAGIC = b"RCSN"
+SNAPSHOT_VERSION = 1
+HEADER = struct.Struct("<4sHIQd")
+RECORD = struct.Struct("<HIddd")
+
+def encode_snapshot(generation: int, entries: List[Tuple[str, Tuple[str, float]]],
+                    refresh_meta: Dict[str, Dict], saved_at: float) -> bytes:
+    chunks = [HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, generation, len(entries), saved_at)]
+    
+    for key, (data, expiry) in entries:
+        key_bytes = key.encode("utf-8")
+        data_bytes = data.encode("utf-8")
+        meta = refresh_meta.get(key)
+        soft_expiry = meta["soft_expiry"] if meta else 0.0
+        ttl = meta["ttl"] if meta else 0.0
+        
+        chunks.append(RECORD.pack(len(key_bytes), len(data_bytes), expiry, soft_expiry, ttl))
+        chunks.append(key_bytes)
+        chunks.append(data_bytes)
+    
+    return b"".join(chunks)
+
+def write_snapshot(path: str, payload: bytes):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def read_snapshot(path: str) -> Tuple[int, float, List[Tuple[str, str, float, float, float]]]:
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < HEADER.size:
+            raise ValueError(f"Snapshot {path} is truncated")
+        
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            magic, version, generation, count, saved_at = HEADER.unpack_from(view, 0)
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                raise ValueError(f"Unsupported snapshot format in {path}")
+            
+            records = []
+            offset = HEADER.size
+            for _ in range(count):
+                if offset + RECORD.size > len(view):
+                    raise ValueError(f"Snapshot {path} is truncated")
+                key_len, data_len, expiry, soft_expiry, ttl = RECORD.unpack_from(view, offset)
+                offset += RECORD.size
+                if offset + key_len + data_len > len(view):
+                    raise ValueError(f"Snapshot {path} is truncated")
+                key = view[offset:offset + key_len].decode("utf-8")
+                offset += key_len
+                data = view[offset:offset + data_len].decode("utf-8")
+                offset += data_len
+                records.append((key, data, expiry, soft_expiry, ttl))
+    
+    return generation, saved_at, records
\ No newline at end of file
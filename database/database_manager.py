@@ -2,19 +2,91 @@ import sqlite3
 import json
 import time
 import asyncio
-from typing import Dict, List, Optional
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 import aiosqlite
+import numpy as np
+from monitoring.tracing import NOOP_SPAN, span
+
+PERFORMANCE_PROFILES = {
+    "default": {
+        "journal_mode": None,
+        "pragmas": {},
+        "read_pool_size": 0
+    },
+    "performance": {
+        "journal_mode": "WAL",
+        "pragmas": {
+            "synchronous": "NORMAL",
+            "cache_size": -65536,
+            "mmap_size": 268435456,
+            "temp_store": "MEMORY"
+        },
+        "read_pool_size": 4
+    }
+}
 
 class DatabaseManager:
-    def __init__(self, db_path: str = "recommendation_engine.db"):
+    def __init__(self, db_path: str = "recommendation_engine.db", profile: str = "performance",
+                 read_pool_size: int = None):
+        if profile not in PERFORMANCE_PROFILES:
+            raise ValueError(f"Unknown database profile: {profile}")
+        
         self.db_path = db_path
+        self.profile = PERFORMANCE_PROFILES[profile]
+        self.read_pool_size = read_pool_size if read_pool_size is not None else self.profile["read_pool_size"]
         self.connection = None
+        self.readers = []
+        self.read_pool = None
+        self.write_lock = asyncio.Lock()
     
     async def initialize(self):
         self.connection = await aiosqlite.connect(self.db_path)
+        await self._apply_pragmas(self.connection)
         await self._create_tables()
+        await self._open_read_pool()
         print(f"Database initialized at {self.db_path}")
     
+    async def _apply_pragmas(self, connection, read_only: bool = False):
+        if self.profile["journal_mode"] and not read_only:
+            await connection.execute(f"PRAGMA journal_mode = {self.profile['journal_mode']}")
+        for pragma, value in self.profile["pragmas"].items():
+            await connection.execute(f"PRAGMA {pragma} = {value}")
+        if read_only:
+            await connection.execute("PRAGMA query_only = ON")
+    
+    async def _open_read_pool(self):
+        if self.read_pool_size <= 0 or self.db_path == ":memory:":
+            return
+        
+        self.read_pool = asyncio.Queue()
+        reader_uri = f"{Path(self.db_path).absolute().as_uri()}?mode=ro"
+        for _ in range(self.read_pool_size):
+            reader = await aiosqlite.connect(reader_uri, uri=True)
+            await self._apply_pragmas(reader, read_only=True)
+            self.readers.append(reader)
+            self.read_pool.put_nowait(reader)
+    
+    @asynccontextmanager
+    async def _reader(self, operation: str = None):
+        with span(f"db.{operation}") if operation else NOOP_SPAN:
+            if self.read_pool is None:
+                yield self.connection
+                return
+            
+            reader = await self.read_pool.get()
+            try:
+                yield reader
+            finally:
+                self.read_pool.put_nowait(reader)
+    
+    @asynccontextmanager
+    async def _writer(self, operation: str):
+        with span(f"db.{operation}"):
+            async with self.write_lock:
+                yield self.connection
+    
     async def _create_tables(self):
         await self.connection.execute("""
             CREATE TABLE IF NOT EXISTS users (
@@ -49,28 +121,122 @@ class DatabaseManager:
         
         await self.connection.execute("CREATE INDEX IF NOT EXISTS idx_interactions_user ON user_interactions(user_id)")
         await self.connection.execute("CREATE INDEX IF NOT EXISTS idx_interactions_item ON user_interactions(item_id)")
+        await self.connection.execute("CREATE INDEX IF NOT EXISTS idx_items_rating ON items(average_rating DESC)")
+        await self.connection.execute("CREATE INDEX IF NOT EXISTS idx_interactions_timestamp ON user_interactions(timestamp)")
+        
+        await self._create_aggregate_triggers()
+        
+        cursor = await self.connection.execute("PRAGMA user_version")
+        schema_version = (await cursor.fetchone())[0]
+        if schema_version < 1:
+            await self._recompute_item_aggregates()
+            await self.connection.execute("PRAGMA user_version = 1")
         
         await self.connection.commit()
     
+    async def _create_aggregate_triggers(self):
+        await self.connection.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_item_rating_insert
+            AFTER INSERT ON user_interactions
+            BEGIN
+                UPDATE items SET
+                    average_rating = (average_rating * total_ratings + NEW.rating) / (total_ratings + 1),
+                    total_ratings = total_ratings + 1
+                WHERE item_id = NEW.item_id;
+            END
+        """)
+        
+        await self.connection.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_item_rating_update
+            AFTER UPDATE OF rating ON user_interactions
+            WHEN OLD.rating != NEW.rating
+            BEGIN
+                UPDATE items SET
+                    average_rating = average_rating + (NEW.rating - OLD.rating) / total_ratings
+                WHERE item_id = NEW.item_id AND total_ratings > 0;
+            END
+        """)
+        
+        await self.connection.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_item_rating_delete
+            AFTER DELETE ON user_interactions
+            BEGIN
+                UPDATE items SET
+                    average_rating = CASE WHEN total_ratings > 1
+                        THEN (average_rating * total_ratings - OLD.rating) / (total_ratings - 1)
+                        ELSE 0.0 END,
+                    total_ratings = MAX(total_ratings - 1, 0)
+                WHERE item_id = OLD.item_id;
+            END
+        """)
+        
+        await self.connection.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_item_rating_backfill
+            AFTER INSERT ON items
+            BEGIN
+                UPDATE items SET
+                    average_rating = COALESCE(
+                        (SELECT AVG(rating) FROM user_interactions WHERE item_id = NEW.item_id), 0.0
+                    ),
+                    total_ratings = (SELECT COUNT(*) FROM user_interactions WHERE item_id = NEW.item_id)
+                WHERE item_id = NEW.item_id;
+            END
+        """)
+    
+    async def _recompute_item_aggregates(self):
+        await self.connection.execute("""
+            UPDATE items SET
+                average_rating = COALESCE(
+                    (SELECT AVG(rating) FROM user_interactions ui WHERE ui.item_id = items.item_id), 0.0
+                ),
+                total_ratings = (
+                    SELECT COUNT(*) FROM user_interactions ui WHERE ui.item_id = items.item_id
+                )
+        """)
+    
+    async def check_shard_layout(self, shard_index: int, shard_count: int):
+        async with self._writer("check_shard_layout") as connection:
+            await connection.execute("""
+                CREATE TABLE IF NOT EXISTS shard_layout (
+                    shard_index INTEGER NOT NULL,
+                    shard_count INTEGER NOT NULL
+                )
+            """)
+            cursor = await connection.execute("SELECT shard_index, shard_count FROM shard_layout")
+            row = await cursor.fetchone()
+            if row is None:
+                await connection.execute("INSERT INTO shard_layout (shard_index, shard_count) VALUES (?, ?)",
+                                         (shard_index, shard_count))
+            await connection.commit()
+        
+        if row is not None and tuple(row) != (shard_index, shard_count):
+            raise ValueError(f"{self.db_path} is shard {row[0]} of {row[1]}, "
+                             f"but was opened as shard {shard_index} of {shard_count}")
+    
     async def create_or_update_user(self, user_id: str):
+        async with self._writer("create_or_update_user"):
+            await self._upsert_user(user_id)
+            await self.connection.commit()
+    
+    async def _upsert_user(self, user_id: str):
         await self.connection.execute("""
             INSERT INTO users (user_id, last_active)
             VALUES (?, CURRENT_TIMESTAMP)
             ON CONFLICT(user_id) DO UPDATE SET
                 last_active = CURRENT_TIMESTAMP
         """, (user_id,))
-        await self.connection.commit()
     
     async def get_user_stats(self, user_id: str) -> Optional[Dict]:
-        cursor = await self.connection.execute("""
-            SELECT u.*, COUNT(ui.id) as interaction_count
-            FROM users u
-            LEFT JOIN user_interactions ui ON u.user_id = ui.user_id
-            WHERE u.user_id = ?
-            GROUP BY u.user_id
-        """, (user_id,))
-        
-        row = await cursor.fetchone()
+        async with self._reader("get_user_stats") as reader:
+            cursor = await reader.execute("""
+                SELECT u.*, COUNT(ui.id) as interaction_count
+                FROM users u
+                LEFT JOIN user_interactions ui ON u.user_id = ui.user_id
+                WHERE u.user_id = ?
+                GROUP BY u.user_id
+            """, (user_id,))
+            
+            row = await cursor.fetchone()
         if row:
             return {
                 "user_id": row[0],
@@ -82,72 +248,149 @@ class DatabaseManager:
         return None
     
     async def create_or_update_item(self, item_data: Dict):
-        await self.connection.execute("""
-            INSERT INTO items (item_id, category, brand, description)
-            VALUES (?, ?, ?, ?)
-            ON CONFLICT(item_id) DO UPDATE SET
-                category = excluded.category,
-                brand = excluded.brand,
-                description = excluded.description
-        """, (
-            item_data['item_id'],
-            item_data['category'],
-            item_data['brand'],
-            item_data['description']
-        ))
-        await self.connection.commit()
+        async with self._writer("create_or_update_item"):
+            await self.connection.execute("""
+                INSERT INTO items (item_id, category, brand, description)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(item_id) DO UPDATE SET
+                    category = excluded.category,
+                    brand = excluded.brand,
+                    description = excluded.description
+            """, (
+                item_data['item_id'],
+                item_data['category'],
+                item_data['brand'],
+                item_data['description']
+            ))
+            await self.connection.commit()
     
-    async def get_all_items(self) -> List[Dict]:
-        cursor = await self.connection.execute("""
-            SELECT i.*, AVG(ui.rating) as avg_rating, COUNT(ui.id) as rating_count
-            FROM items i
-            LEFT JOIN user_interactions ui ON i.item_id = ui.item_id
-            GROUP BY i.item_id
-            ORDER BY avg_rating DESC
-        """)
+    async def bulk_upsert_items(self, items_data: List[Dict]) -> Dict:
+        start_time = time.time()
+        
+        async with self._writer("bulk_upsert_items"):
+            try:
+                await self.connection.executemany("""
+                    INSERT INTO items (item_id, category, brand, description)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(item_id) DO UPDATE SET
+                        category = excluded.category,
+                        brand = excluded.brand,
+                        description = excluded.description
+                """, [
+                    (item['item_id'], item['category'], item['brand'], item['description'])
+                    for item in items_data
+                ])
+                await self.connection.commit()
+            except Exception:
+                await self.connection.rollback()
+                raise
         
-        rows = await cursor.fetchall()
+        return self._load_report(len(items_data), start_time)
+    
+    async def bulk_record_interactions(self, interactions: List[Dict]) -> Dict:
+        start_time = time.time()
+        user_ids = list({interaction['user_id'] for interaction in interactions})
+        
+        async with self._writer("bulk_record_interactions"):
+            try:
+                await self.connection.executemany("""
+                    INSERT INTO users (user_id, last_active)
+                    VALUES (?, CURRENT_TIMESTAMP)
+                    ON CONFLICT(user_id) DO UPDATE SET
+                        last_active = CURRENT_TIMESTAMP
+                """, [(user_id,) for user_id in user_ids])
+                
+                await self.connection.executemany("""
+                    INSERT INTO user_interactions (user_id, item_id, rating)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT(user_id, item_id) DO UPDATE SET
+                        rating = excluded.rating,
+                        timestamp = CURRENT_TIMESTAMP
+                """, [
+                    (interaction['user_id'], interaction['item_id'], interaction['rating'])
+                    for interaction in interactions
+                ])
+                
+                await self.connection.executemany("""
+                    UPDATE users SET
+                        total_interactions = (
+                            SELECT COUNT(*) FROM user_interactions WHERE user_id = ?
+                        )
+                    WHERE user_id = ?
+                """, [(user_id, user_id) for user_id in user_ids])
+                
+                await self.connection.commit()
+            except Exception:
+                await self.connection.rollback()
+                raise
+        
+        return self._load_report(len(interactions), start_time)
+    
+    @staticmethod
+    def _load_report(rows: int, start_time: float) -> Dict:
+        elapsed = time.time() - start_time
+        return {
+            "rows": rows,
+            "seconds": round(elapsed, 3),
+            "rows_per_sec": round(rows / elapsed, 1) if elapsed > 0 else float(rows)
+        }
+    
+    async def get_all_items(self) -> List[Dict]:
+        async with self._reader("get_all_items") as reader:
+            cursor = await reader.execute("""
+                SELECT item_id, category, brand, description, average_rating, total_ratings
+                FROM items
+                ORDER BY average_rating DESC
+            """)
+            
+            rows = await cursor.fetchall()
         return [{
             "item_id": row[0],
             "category": row[1],
             "brand": row[2],
             "description": row[3],
-            "current_avg_rating": row[6] or 0.0,
-            "current_rating_count": row[7] or 0
+            "current_avg_rating": row[4] or 0.0,
+            "current_rating_count": row[5] or 0
         } for row in rows]
     
     async def record_interaction(self, user_id: str, item_id: str, rating: float):
-        await self.create_or_update_user(user_id)
-        
-        await self.connection.execute("""
-            INSERT INTO user_interactions (user_id, item_id, rating)
-            VALUES (?, ?, ?)
-            ON CONFLICT(user_id, item_id) DO UPDATE SET
-                rating = excluded.rating,
-                timestamp = CURRENT_TIMESTAMP
-        """, (user_id, item_id, rating))
-        
-        await self.connection.execute("""
-            UPDATE users SET 
-                total_interactions = (
-                    SELECT COUNT(*) FROM user_interactions WHERE user_id = ?
-                ),
-                last_active = CURRENT_TIMESTAMP
-            WHERE user_id = ?
-        """, (user_id, user_id))
-        
-        await self.connection.commit()
+        async with self._writer("record_interaction"):
+            try:
+                await self._upsert_user(user_id)
+                
+                await self.connection.execute("""
+                    INSERT INTO user_interactions (user_id, item_id, rating)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT(user_id, item_id) DO UPDATE SET
+                        rating = excluded.rating,
+                        timestamp = CURRENT_TIMESTAMP
+                """, (user_id, item_id, rating))
+                
+                await self.connection.execute("""
+                    UPDATE users SET 
+                        total_interactions = (
+                            SELECT COUNT(*) FROM user_interactions WHERE user_id = ?
+                        ),
+                        last_active = CURRENT_TIMESTAMP
+                    WHERE user_id = ?
+                """, (user_id, user_id))
+                
+                await self.connection.commit()
+            except Exception:
+                await self.connection.rollback()
+                raise
     
     async def get_user_interactions(self, user_id: str, limit: int = 50) -> List[Dict]:
-        cursor = await self.connection.execute("""
-            SELECT ui.item_id, ui.rating, ui.timestamp
-            FROM user_interactions ui
-            WHERE ui.user_id = ?
-            ORDER BY ui.timestamp DESC
-            LIMIT ?
-        """, (user_id, limit))
-        
-        rows = await cursor.fetchall()
+        async with self._reader("get_user_interactions") as reader:
+            cursor = await reader.execute("""
+                SELECT ui.item_id, ui.rating, ui.timestamp
+                FROM user_interactions ui
+                WHERE ui.user_id = ?
+                ORDER BY ui.timestamp DESC
+                LIMIT ?
+            """, (user_id, limit))
+            
+            rows = await cursor.fetchall()
         return [{
             "item_id": row[0],
             "rating": row[1],
@@ -155,19 +398,91 @@ class DatabaseManager:
         } for row in rows]
     
     async def get_all_interactions(self) -> List[Dict]:
-        cursor = await self.connection.execute("""
-            SELECT user_id, item_id, rating
-            FROM user_interactions
-            ORDER BY timestamp
-        """)
-        
-        rows = await cursor.fetchall()
+        async with self._reader("get_all_interactions") as reader:
+            cursor = await reader.execute("""
+                SELECT user_id, item_id, rating
+                FROM user_interactions
+                ORDER BY timestamp
+            """)
+            
+            rows = await cursor.fetchall()
+        return [{
+            "user_id": row[0],
+            "item_id": row[1],
+            "rating": row[2]
+        } for row in rows]
+    
+    async def count_interactions(self) -> int:
+        async with self._reader("count_interactions") as reader:
+            cursor = await reader.execute("SELECT COUNT(*) FROM user_interactions")
+            row = await cursor.fetchone()
+        return row[0]
+    
+    async def get_interaction_watermark(self) -> Dict:
+        async with self._reader("get_interaction_watermark") as reader:
+            cursor = await reader.execute("SELECT COALESCE(MAX(id), 0), MAX(timestamp) FROM user_interactions")
+            row = await cursor.fetchone()
+        return {"last_id": row[0], "last_timestamp": row[1]}
+    
+    async def get_interactions_since(self, watermark: Dict) -> List[Dict]:
+        async with self._reader("get_interactions_since") as reader:
+            cursor = await reader.execute("""
+                SELECT user_id, item_id, rating
+                FROM user_interactions
+                WHERE id > ? OR timestamp >= ?
+                ORDER BY id
+            """, (watermark["last_id"], watermark["last_timestamp"] or ""))
+            
+            rows = await cursor.fetchall()
         return [{
             "user_id": row[0],
             "item_id": row[1],
             "rating": row[2]
         } for row in rows]
     
+    async def get_interaction_vocabulary(self) -> Tuple[Dict[str, int], Dict[str, int]]:
+        async with self._reader("get_interaction_vocabulary") as reader:
+            cursor = await reader.execute("SELECT DISTINCT user_id FROM user_interactions")
+            user_rows = await cursor.fetchall()
+            cursor = await reader.execute("SELECT DISTINCT item_id FROM user_interactions")
+            item_rows = await cursor.fetchall()
+        
+        user_index = {row[0]: idx for idx, row in enumerate(user_rows)}
+        item_index = {row[0]: idx for idx, row in enumerate(item_rows)}
+        return user_index, item_index
+    
+    async def stream_interactions(self, user_index: Dict[str, int], item_index: Dict[str, int],
+                                  chunk_size: int = 50000
+                                  ) -> AsyncIterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        async with self._reader() as reader:
+            cursor = await reader.execute("""
+                SELECT user_id, item_id, rating
+                FROM user_interactions
+                ORDER BY id
+            """)
+            
+            while True:
+                rows = await cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                
+                user_codes = np.fromiter(
+                    (user_index.setdefault(row[0], len(user_index)) for row in rows),
+                    dtype=np.int64, count=len(rows)
+                )
+                item_codes = np.fromiter(
+                    (item_index.setdefault(row[1], len(item_index)) for row in rows),
+                    dtype=np.int64, count=len(rows)
+                )
+                ratings = np.fromiter((row[2] for row in rows), dtype=np.float64, count=len(rows))
+                
+                yield user_codes, item_codes, ratings
+    
     async def close(self):
+        for reader in self.readers:
+            await reader.close()
+        self.readers = []
+        self.read_pool = None
+        
         if self.connection:
             await self.connection.close()
\ No newline at end of file
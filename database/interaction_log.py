@@ -0,0 +1,147 @@
+import mmap
+import os
+import struct
+import time
+import numpy as np
+from typing import Dict, List, Tuple
+
+LOG_MAGIC = b"RILG"
+LOG_VERSION = 1
+HEADER = struct.Struct("<4sHH")
+LOG_RECORD = np.dtype([("user", "<u4"), ("item", "<u4"), ("rating", "<f4"), ("timestamp", "<f8")])
+NAME_ENTRY = struct.Struct("<BH")
+USER_NAME = 0
+ITEM_NAME = 1
+
+def _read_names(path: str) -> Tuple[List[str], List[str]]:
+    users, items = [], []
+    if not os.path.exists(path):
+        return users, items
+    
+    with open(path, "rb") as f:
+        data = f.read()
+    
+    offset = 0
+    while offset + NAME_ENTRY.size <= len(data):
+        kind, length = NAME_ENTRY.unpack_from(data, offset)
+        if offset + NAME_ENTRY.size + length > len(data):
+            break
+        name = data[offset + NAME_ENTRY.size:offset + NAME_ENTRY.size + length].decode("utf-8")
+        (users if kind == USER_NAME else items).append(name)
+        offset += NAME_ENTRY.size + length
+    return users, items
+
+def _read_records(path: str) -> np.ndarray:
+    if not os.path.exists(path) or os.path.getsize(path) <= HEADER.size:
+        return np.zeros(0, dtype=LOG_RECORD)
+    
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            magic, version, _ = HEADER.unpack_from(view, 0)
+            if magic != LOG_MAGIC or version != LOG_VERSION:
+                raise ValueError(f"Unsupported interaction log format in {path}")
+            
+            count = (len(view) - HEADER.size) // LOG_RECORD.itemsize
+            return np.frombuffer(view, dtype=LOG_RECORD, count=count, offset=HEADER.size).copy()
+
+def replay_log(path: str) -> Tuple[Dict[str, int], Dict[str, int], np.ndarray, np.ndarray, np.ndarray]:
+    users, items = _read_names(f"{path}.names")
+    records = _read_records(path)
+    records = records[(records["user"] < len(users)) & (records["item"] < len(items))]
+    
+    pair_keys = records["user"].astype(np.int64) * max(len(items), 1) + records["item"]
+    _, last_from_end = np.unique(pair_keys[::-1], return_index=True)
+    latest = records[np.sort(len(records) - 1 - last_from_end)]
+    
+    user_codes_used, user_codes = np.unique(latest["user"], return_inverse=True)
+    item_codes_used, item_codes = np.unique(latest["item"], return_inverse=True)
+    user_index = {users[code]: idx for idx, code in enumerate(user_codes_used.tolist())}
+    item_index = {items[code]: idx for idx, code in enumerate(item_codes_used.tolist())}
+    
+    return (user_index, item_index, user_codes.astype(np.int64), item_codes.astype(np.int64),
+            latest["rating"].astype(np.float64))
+
+class InteractionLog:
+    def __init__(self, path: str = "recommendation_engine.log"):
+        self.path = path
+        self.names_path = f"{path}.names"
+        self.users = {}
+        self.items = {}
+        self.records_file = None
+        self.names_file = None
+        self.record_count = 0
+    
+    def open(self):
+        users, items = _read_names(self.names_path)
+        self.users = {user_id: idx for idx, user_id in enumerate(users)}
+        self.items = {item_id: idx for idx, item_id in enumerate(items)}
+        
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < HEADER.size:
+            with open(self.path, "wb") as f:
+                f.write(HEADER.pack(LOG_MAGIC, LOG_VERSION, 0))
+        
+        size = os.path.getsize(self.path)
+        self.record_count = (size - HEADER.size) // LOG_RECORD.itemsize
+        complete_size = HEADER.size + self.record_count * LOG_RECORD.itemsize
+        if size != complete_size:
+            os.truncate(self.path, complete_size)
+        
+        self.records_file = open(self.path, "ab")
+        self.names_file = open(self.names_path, "ab")
+    
+    def _code(self, names: Dict[str, int], kind: int, name: str) -> int:
+        code = names.get(name)
+        if code is None:
+            encoded = name.encode("utf-8")
+            self.names_file.write(NAME_ENTRY.pack(kind, len(encoded)) + encoded)
+            code = len(names)
+            names[name] = code
+        return code
+    
+    def append_many(self, interactions: List[Dict]):
+        if not interactions:
+            return
+        
+        now = time.time()
+        records = np.zeros(len(interactions), dtype=LOG_RECORD)
+        for idx, interaction in enumerate(interactions):
+            records[idx] = (
+                self._code(self.users, USER_NAME, interaction["user_id"]),
+                self._code(self.items, ITEM_NAME, interaction["item_id"]),
+                interaction["rating"],
+                interaction.get("timestamp", now)
+            )
+        
+        self.names_file.flush()
+        self.records_file.write(records.tobytes())
+        self.records_file.flush()
+        self.record_count += len(records)
+    
+    def append(self, user_id: str, item_id: str, rating: float, timestamp: float = None):
+        interaction = {"user_id": user_id, "item_id": item_id, "rating": rating}
+        if timestamp is not None:
+            interaction["timestamp"] = timestamp
+        self.append_many([interaction])
+    
+    def discard(self):
+        self.close()
+        for path in (self.path, self.names_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self.users = {}
+        self.items = {}
+        self.record_count = 0
+    
+    def sync(self):
+        for f in (self.names_file, self.records_file):
+            if f:
+                f.flush()
+                os.fsync(f.fileno())
+    
+    def close(self):
+        self.sync()
+        for f in (self.names_file, self.records_file):
+            if f:
+                f.close()
+        self.names_file = None
+        self.records_file = None
\ No newline at end of file
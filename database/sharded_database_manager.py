@@ -0,0 +1,140 @@
+import asyncio
+import time
+import zlib
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import numpy as np
+from database.database_manager import DatabaseManager
+
+class ShardedDatabaseManager:
+    def __init__(self, db_path: str = "recommendation_engine.db", shards: int = 4, profile: str = "performance",
+                 read_pool_size: int = None):
+        if shards < 1:
+            raise ValueError(f"Shard count must be at least 1, got {shards}")
+        
+        self.db_path = db_path
+        path = Path(db_path)
+        self.shards = [
+            DatabaseManager(str(path.with_name(f"{path.stem}.shard{idx}{path.suffix}")), profile, read_pool_size)
+            for idx in range(shards)
+        ]
+    
+    @property
+    def connection(self):
+        return self.shards[0].connection
+    
+    def _shard_index(self, user_id: str) -> int:
+        return zlib.crc32(user_id.encode("utf-8")) % len(self.shards)
+    
+    def shard_for(self, user_id: str) -> DatabaseManager:
+        return self.shards[self._shard_index(user_id)]
+    
+    def _partition(self, interactions: List[Dict]) -> Dict[int, List[Dict]]:
+        partitions = {}
+        for interaction in interactions:
+            partitions.setdefault(self._shard_index(interaction["user_id"]), []).append(interaction)
+        return partitions
+    
+    async def initialize(self):
+        await asyncio.gather(*[shard.initialize() for shard in self.shards])
+        try:
+            for idx, shard in enumerate(self.shards):
+                await shard.check_shard_layout(idx, len(self.shards))
+        except ValueError:
+            await self.close()
+            raise
+        print(f"Sharded database initialized with {len(self.shards)} shards")
+    
+    async def create_or_update_user(self, user_id: str):
+        await self.shard_for(user_id).create_or_update_user(user_id)
+    
+    async def get_user_stats(self, user_id: str) -> Optional[Dict]:
+        return await self.shard_for(user_id).get_user_stats(user_id)
+    
+    async def create_or_update_item(self, item_data: Dict):
+        await asyncio.gather(*[shard.create_or_update_item(item_data) for shard in self.shards])
+    
+    async def bulk_upsert_items(self, items_data: List[Dict]) -> Dict:
+        start_time = time.time()
+        await asyncio.gather(*[shard.bulk_upsert_items(items_data) for shard in self.shards])
+        return DatabaseManager._load_report(len(items_data), start_time)
+    
+    async def bulk_record_interactions(self, interactions: List[Dict]) -> Dict:
+        start_time = time.time()
+        partitions = self._partition(interactions)
+        await asyncio.gather(*[
+            self.shards[idx].bulk_record_interactions(rows) for idx, rows in partitions.items()
+        ])
+        return DatabaseManager._load_report(len(interactions), start_time)
+    
+    async def get_all_items(self) -> List[Dict]:
+        shard_items = await asyncio.gather(*[shard.get_all_items() for shard in self.shards])
+        
+        merged = {}
+        for items in shard_items:
+            for item in items:
+                rating_sum = item["current_avg_rating"] * item["current_rating_count"]
+                entry = merged.get(item["item_id"])
+                if entry is None:
+                    merged[item["item_id"]] = dict(item, rating_sum=rating_sum)
+                    continue
+                entry["rating_sum"] += rating_sum
+                entry["current_rating_count"] += item["current_rating_count"]
+        
+        for entry in merged.values():
+            rating_sum = entry.pop("rating_sum")
+            count = entry["current_rating_count"]
+            entry["current_avg_rating"] = rating_sum / count if count else 0.0
+        
+        return sorted(merged.values(), key=lambda item: item["current_avg_rating"], reverse=True)
+    
+    async def record_interaction(self, user_id: str, item_id: str, rating: float):
+        await self.shard_for(user_id).record_interaction(user_id, item_id, rating)
+    
+    async def get_user_interactions(self, user_id: str, limit: int = 50) -> List[Dict]:
+        return await self.shard_for(user_id).get_user_interactions(user_id, limit)
+    
+    async def get_all_interactions(self) -> List[Dict]:
+        shard_interactions = await asyncio.gather(*[shard.get_all_interactions() for shard in self.shards])
+        return [interaction for interactions in shard_interactions for interaction in interactions]
+    
+    async def count_interactions(self) -> int:
+        counts = await asyncio.gather(*[shard.count_interactions() for shard in self.shards])
+        return sum(counts)
+    
+    async def get_interaction_watermark(self) -> Dict:
+        watermarks = await asyncio.gather(*[shard.get_interaction_watermark() for shard in self.shards])
+        return {"shards": list(watermarks)}
+    
+    async def get_interactions_since(self, watermark: Dict) -> List[Dict]:
+        watermarks = watermark.get("shards", [])
+        if len(watermarks) != len(self.shards):
+            watermarks = [{"last_id": 0, "last_timestamp": None}] * len(self.shards)
+        
+        shard_interactions = await asyncio.gather(*[
+            shard.get_interactions_since(shard_watermark)
+            for shard, shard_watermark in zip(self.shards, watermarks)
+        ])
+        return [interaction for interactions in shard_interactions for interaction in interactions]
+    
+    async def get_interaction_vocabulary(self) -> Tuple[Dict[str, int], Dict[str, int]]:
+        vocabularies = await asyncio.gather(*[shard.get_interaction_vocabulary() for shard in self.shards])
+        
+        user_index = {}
+        item_index = {}
+        for shard_users, shard_items in vocabularies:
+            for user_id in shard_users:
+                user_index.setdefault(user_id, len(user_index))
+            for item_id in shard_items:
+                item_index.setdefault(item_id, len(item_index))
+        return user_index, item_index
+    
+    async def stream_interactions(self, user_index: Dict[str, int], item_index: Dict[str, int],
+                                  chunk_size: int = 50000
+                                  ) -> AsyncIterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        for shard in self.shards:
+            async for chunk in shard.stream_interactions(user_index, item_index, chunk_size):
+                yield chunk
+    
+    async def close(self):
+        await asyncio.gather(*[shard.close() for shard in self.shards])
\ No newline at end of file
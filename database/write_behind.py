@@ -0,0 +1,140 @@
+import asyncio
+import time
+from typing import Dict, List
+
+class WriteBehindBuffer:
+    def __init__(self, db, max_batch: int = 500, max_delay_ms: float = 5.0):
+        self.db = db
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self.pending = []
+        self.in_flight = []
+        self.has_pending = asyncio.Event()
+        self.batch_full = asyncio.Event()
+        self.flush_task = None
+        self.closing = False
+        self.flush_lock = asyncio.Lock()
+        self.stats = {"batches": 0, "rows": 0, "largest_batch": 0, "failed_batches": 0,
+                      "failed_rows": 0, "last_flush_ms": 0.0}
+    
+    def start(self):
+        if self.flush_task is None:
+            self.flush_task = asyncio.create_task(self._run())
+    
+    def submit(self, user_id: str, item_id: str, rating: float) -> asyncio.Future:
+        row = self._validate(user_id, item_id, rating)
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((row, future))
+        
+        self.has_pending.set()
+        if len(self.pending) >= self.max_batch:
+            self.batch_full.set()
+        return future
+    
+    @staticmethod
+    def _validate(user_id: str, item_id: str, rating: float) -> Dict:
+        if not isinstance(user_id, str) or not user_id:
+            raise ValueError(f"Invalid user_id: {user_id!r}")
+        if not isinstance(item_id, str) or not item_id:
+            raise ValueError(f"Invalid item_id: {item_id!r}")
+        try:
+            rating = float(rating)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid rating: {rating!r}")
+        if rating != rating:
+            raise ValueError(f"Invalid rating: {rating!r}")
+        return {"user_id": user_id, "item_id": item_id, "rating": rating}
+    
+    async def record(self, user_id: str, item_id: str, rating: float, wait_durable: bool = True) -> asyncio.Future:
+        future = self.submit(user_id, item_id, rating)
+        if wait_durable:
+            await future
+        else:
+            future.add_done_callback(self._report_failure)
+        return future
+    
+    async def record_many(self, interactions: List[Dict]) -> Dict:
+        await self.flush()
+        async with self.flush_lock:
+            return await self.db.bulk_record_interactions(interactions)
+    
+    def pending_for(self, user_id: str) -> List[Dict]:
+        in_flight = [entry for batch in self.in_flight for entry in batch]
+        return [row for row, _ in in_flight + self.pending if row["user_id"] == user_id]
+    
+    async def _run(self):
+        while not (self.closing and not self.pending):
+            await self.has_pending.wait()
+            if len(self.pending) < self.max_batch and not self.closing:
+                try:
+                    await asyncio.wait_for(self.batch_full.wait(), self.max_delay)
+                except asyncio.TimeoutError:
+                    pass
+            await self._flush_batch()
+    
+    async def _flush_batch(self):
+        batch = self.pending[:self.max_batch]
+        self.pending = self.pending[self.max_batch:]
+        if not self.pending:
+            self.has_pending.clear()
+        if len(self.pending) < self.max_batch:
+            self.batch_full.clear()
+        if not batch:
+            return
+        
+        start_time = time.time()
+        self.in_flight.append(batch)
+        try:
+            async with self.flush_lock:
+                await self.db.bulk_record_interactions([row for row, _ in batch])
+        except Exception:
+            self.stats["failed_batches"] += 1
+            await self._flush_rows(batch)
+            return
+        finally:
+            self.in_flight.remove(batch)
+        
+        for _, future in batch:
+            if not future.done():
+                future.set_result(True)
+        
+        self.stats["batches"] += 1
+        self.stats["rows"] += len(batch)
+        self.stats["largest_batch"] = max(self.stats["largest_batch"], len(batch))
+        self.stats["last_flush_ms"] = round((time.time() - start_time) * 1000, 2)
+    
+    async def _flush_rows(self, batch: List):
+        for row, future in batch:
+            try:
+                async with self.flush_lock:
+                    await self.db.bulk_record_interactions([row])
+            except Exception as e:
+                self.stats["failed_rows"] += 1
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                self.stats["rows"] += 1
+                if not future.done():
+                    future.set_result(True)
+    
+    def _report_failure(self, future: asyncio.Future):
+        if not future.cancelled() and future.exception():
+            print(f"Write-behind persistence failed: {future.exception()}")
+    
+    async def flush(self):
+        while self.pending:
+            await self._flush_batch()
+        in_flight = [future for batch in self.in_flight for _, future in batch]
+        if in_flight:
+            await asyncio.gather(*in_flight, return_exceptions=True)
+    
+    async def close(self):
+        self.closing = True
+        if self.flush_task:
+            self.has_pending.set()
+            await self.flush_task
+            self.flush_task = None
+        await self.flush()
+    
+    def get_stats(self) -> Dict:
+        return dict(self.stats, pending=len(self.pending))
\ No newline at end of file
@@ -1,14 +1,32 @@
+import argparse
 import asyncio
 import sys
 import signal
 from api.recommendation_server import RecommendationAPI
+from api.prefork_server import PreforkServer
+from api.admission_control import AdmissionController
 from models.persistent_cached_hybrid_recommender import PersistentCachedHybridRecommender
+from database.database_manager import PERFORMANCE_PROFILES
+from monitoring.tracing import RecordingTracer, set_tracer
 from shell.user_shell import RecommendationShell
 
 class RecommendationSystem:
-    def __init__(self):
+    def __init__(self, db_profile: str = "performance", read_pool_size: int = None, shards: int = 1,
+                 workers: int = 1, admission_options: dict = None, live_updates: bool = False,
+                 tracing_options: dict = None, retrain_interval: float = None, retrain_policy: dict = None):
         self.api = None
+        self.prefork_server = None
+        self.coordinator_recommender = None
         self.running = False
+        self.db_profile = db_profile
+        self.read_pool_size = read_pool_size
+        self.shards = shards
+        self.workers = workers
+        self.admission_options = admission_options or {}
+        self.live_updates = live_updates
+        self.tracing_options = tracing_options
+        self.retrain_interval = retrain_interval
+        self.retrain_policy = retrain_policy
     
     async def start_system(self):
         interactions = [
@@ -39,35 +57,79 @@ class RecommendationSystem:
         print("Starting Real-time Recommendation Engine with Persistent Storage...")
         print("=" * 60)
         
-        self.api = RecommendationAPI(port=8000)
-        
-        # Replace the old recommender with the persistent one
-        self.api.recommender = PersistentCachedHybridRecommender()
-        await self.api.recommender.initialize(interactions, items_data)
-        
-        await self.api.start()
+        if self.workers > 1:
+            await self._start_prefork(interactions, items_data)
+        else:
+            if self.tracing_options:
+                set_tracer(RecordingTracer(**self.tracing_options))
+            self.api = RecommendationAPI(port=8000, admission=AdmissionController(**self.admission_options))
+            
+            # Replace the old recommender with the persistent one
+            self.api.recommender = PersistentCachedHybridRecommender(
+                snapshot_path="recommendation_engine.cache",
+                model_path="recommendation_engine.model",
+                interaction_log_path="recommendation_engine.log",
+                model_refresh_interval=300.0,
+                retrain_interval=self.retrain_interval,
+                retrain_policy=self.retrain_policy,
+                profile=self.db_profile,
+                read_pool_size=self.read_pool_size,
+                shards=self.shards
+            )
+            await self.api.recommender.initialize(interactions, items_data, seed_empty_only=True)
+            
+            await self.api.start()
         
         self.running = True
         
         print("Server started successfully with persistent storage!")
-        print("Database: recommendation_engine.db")
+        print(f"Database: recommendation_engine.db ({self.db_profile} profile)")
+        if self.workers > 1:
+            print(f"Workers: {self.workers} processes sharing the published model")
         print("API: http://localhost:8000")
         print("=" * 60)
         
         await asyncio.sleep(1)
         
-        shell = RecommendationShell()
+        shell = RecommendationShell(live_updates=self.live_updates)
         await shell.start()
     
+    async def _start_prefork(self, interactions, items_data):
+        db_options = {"profile": self.db_profile, "read_pool_size": self.read_pool_size, "shards": self.shards}
+        self.coordinator_recommender = PersistentCachedHybridRecommender(
+            model_path="recommendation_engine.model",
+            retrain_interval=self.retrain_interval,
+            retrain_policy=self.retrain_policy,
+            **db_options
+        )
+        await self.coordinator_recommender.initialize(interactions, items_data, seed_empty_only=True)
+        
+        self.prefork_server = PreforkServer(
+            self.coordinator_recommender,
+            port=8000,
+            workers=self.workers,
+            admission_options=self.admission_options,
+            tracing_options=self.tracing_options,
+            db_options=db_options
+        )
+        await self.prefork_server.start()
+    
     async def stop_system(self):
         print("\nShutting down recommendation system...")
+        if self.prefork_server:
+            await self.prefork_server.close()
+        if self.coordinator_recommender:
+            await self.coordinator_recommender.close()
         if self.api:
             await self.api.close()
         self.running = False
         print("System stopped")
 
-async def run_system():
-    system = RecommendationSystem()
+async def run_system(db_profile: str = "performance", read_pool_size: int = None, shards: int = 1,
+                     workers: int = 1, admission_options: dict = None, live_updates: bool = False,
+                     tracing_options: dict = None, retrain_interval: float = None, retrain_policy: dict = None):
+    system = RecommendationSystem(db_profile, read_pool_size, shards, workers, admission_options, live_updates,
+                                  tracing_options, retrain_interval, retrain_policy)
     
     try:
         await system.start_system()
@@ -106,14 +168,24 @@ async def show_help():
     print("  - bob: Likes technology and gaming equipment")  
     print("  - carol: Likes cooking and kitchen items")
 
-async def main():
+async def main(args: argparse.Namespace):
     while True:
         try:
             show_menu()
             choice = input("Enter choice (1-3): ").strip()
             
             if choice == "1":
-                await run_system()
+                tracing_options = None
+                if args.trace_slow_ms is not None:
+                    tracing_options = {"slow_threshold_ms": args.trace_slow_ms, "sample_rate": args.trace_sample_rate}
+                retrain_policy = None
+                if args.drift_retrain:
+                    retrain_policy = {"min_interval": args.retrain_min_interval, "cpu_budget": args.retrain_cpu_budget}
+                await run_system(args.db_profile, args.read_pool_size, args.shards, args.workers, {
+                    "max_concurrent": args.max_concurrent_requests,
+                    "max_queue": args.max_queued_requests,
+                    "queue_timeout_ms": args.queue_timeout_ms
+                }, args.live_updates, tracing_options, args.retrain_interval, retrain_policy)
                 break
             elif choice == "2":
                 await show_help()
@@ -124,7 +196,7 @@ async def main():
                 break
             else:
                 print("Invalid choice. Please try again.\n")
-                
+        
         except KeyboardInterrupt:
             print("\nGoodbye!")
             break
@@ -132,6 +204,37 @@ async def main():
             break
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Real-time Recommendation Engine")
+    parser.add_argument("--db-profile", choices=sorted(PERFORMANCE_PROFILES), default="performance",
+                        help="SQLite tuning profile")
+    parser.add_argument("--read-pool-size", type=int, default=None,
+                        help="Read-only connections (defaults to the profile's setting)")
+    parser.add_argument("--shards", type=int, default=1,
+                        help="Split interactions across this many SQLite files by user")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Serve the API from this many processes sharing one port (SO_REUSEPORT)")
+    parser.add_argument("--max-concurrent-requests", type=int, default=64,
+                        help="Requests processed at once per API process; the rest wait in a queue")
+    parser.add_argument("--max-queued-requests", type=int, default=256,
+                        help="Requests allowed to wait for a slot before new ones are rejected with 503")
+    parser.add_argument("--queue-timeout-ms", type=float, default=100.0,
+                        help="How long a queued request may wait before it is shed or degraded")
+    parser.add_argument("--live-updates", action="store_true",
+                        help="Have the shell wait for pushed recommendation updates after each rating")
+    parser.add_argument("--trace-slow-ms", type=float, default=None,
+                        help="Record spans for every request and keep traces slower than this for /debug/traces")
+    parser.add_argument("--trace-sample-rate", type=float, default=0.01,
+                        help="Fraction of faster traced requests kept as samples")
+    parser.add_argument("--retrain-interval", type=float, default=None,
+                        help="Retrain the model from the database in the background every this many seconds")
+    parser.add_argument("--drift-retrain", action="store_true",
+                        help="Retrain in the background when enough new data or fallback traffic builds up")
+    parser.add_argument("--retrain-min-interval", type=float, default=600.0,
+                        help="Minimum seconds between drift-triggered retrains")
+    parser.add_argument("--retrain-cpu-budget", type=float, default=0.5,
+                        help="Postpone drift retrains while the process uses more than this many CPU cores")
+    args = parser.parse_args()
+    
     if sys.platform != "win32":
         def signal_handler(sig, frame):
             print("\nReceived interrupt signal, shutting down...")
@@ -141,7 +244,7 @@ if __name__ == "__main__":
         signal.signal(signal.SIGTERM, signal_handler)
     
     try:
-        asyncio.run(main())
+        asyncio.run(main(args))
     except KeyboardInterrupt:
         print("\nGoodbye!")
     except Exception as e:
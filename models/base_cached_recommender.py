@@ -0,0 +1,282 @@
+import asyncio
+import contextvars
+import time
+from typing import Dict, List, Tuple
+from .hybrid_recommender import HybridRecommender
+from .fallbacks import fallback_recommendations
+from cache.memory_cache import MemoryCache
+from monitoring.metrics import stage_timer
+from monitoring.tracing import span
+
+class BaseCachedRecommender:
+    def __init__(self):
+        self.recommender = HybridRecommender()
+        self.cache = MemoryCache()
+        self.performance_stats = {"cache_hits": 0, "cache_misses": 0, "background_refreshes": 0,
+                                  "cache_extensions": 0, "discarded_refreshes": 0, "deadline_fallbacks": 0}
+        self.refresh_tasks = {}
+        self.deadline_tasks = {}
+        self.model_save_lock = asyncio.Lock()
+    
+    async def _get_model_interactions(self, user_id: str) -> List[Dict]:
+        raise NotImplementedError
+    
+    async def get_recommendations(self, user_id: str, num_recommendations: int = 5,
+                                  deadline_ms: float = None) -> Dict:
+        start_time = time.time()
+        
+        with stage_timer("cache_lookup"):
+            cached_entry = await self.cache.get_user_recommendation_entry(user_id)
+        
+        if cached_entry:
+            self.performance_stats["cache_hits"] += 1
+            cached_recs = cached_entry["recommendations"]
+            depth = cached_entry["depth"]
+            source = "cache"
+            
+            if len(cached_recs) < num_recommendations and len(cached_recs) >= depth:
+                depth = max(num_recommendations * 2, depth * 2)
+                with span("cache_extend", depth=depth):
+                    cached_recs = await self._extend_recommendations(user_id, cached_recs, depth)
+                self.performance_stats["cache_extensions"] += 1
+                source = "cache_extended"
+            
+            revalidating = self.cache.should_refresh_user_recommendations(user_id)
+            if revalidating:
+                self._schedule_refresh(user_id, max(depth, num_recommendations * 2))
+            
+            response_time = (time.time() - start_time) * 1000
+            
+            return {
+                "recommendations": cached_recs[:num_recommendations],
+                "user_id": user_id,
+                "source": source,
+                "revalidating": revalidating,
+                "response_time_ms": f"{response_time:.2f}",
+                "timestamp": time.time()
+            }
+        
+        self.performance_stats["cache_misses"] += 1
+        
+        source = "computed"
+        if deadline_ms is None:
+            recommendations = await self._compute_recommendations(user_id, num_recommendations * 2)
+        else:
+            recommendations, source = await self._compute_within_deadline(
+                user_id, num_recommendations, start_time + deadline_ms / 1000
+            )
+        
+        response_time = (time.time() - start_time) * 1000
+        
+        result = {
+            "recommendations": [
+                {"item": item, "score": score, "strategy": strategy}
+                for item, score, strategy in recommendations[:num_recommendations]
+            ],
+            "user_id": user_id,
+            "source": source,
+            "response_time_ms": f"{response_time:.2f}",
+            "timestamp": time.time()
+        }
+        if source != "computed":
+            result["degraded"] = True
+        return result
+    
+    async def _compute_within_deadline(self, user_id: str, num_recommendations: int,
+                                       deadline: float) -> Tuple[List[Tuple[str, float, str]], str]:
+        task = self.deadline_tasks.get(user_id)
+        if task is None:
+            task = asyncio.create_task(self._compute_recommendations(user_id, num_recommendations * 2, offload=True))
+            self.deadline_tasks[user_id] = task
+            task.add_done_callback(lambda done: self._finish_deadline_task(user_id, done))
+        
+        try:
+            with span("deadline_wait"):
+                recommendations = await asyncio.wait_for(asyncio.shield(task), max(deadline - time.time(), 0))
+            return recommendations, "computed"
+        except asyncio.TimeoutError:
+            self.performance_stats["deadline_fallbacks"] += 1
+        
+        user_interactions = (self.cache.interactions.get_interactions(user_id)
+                             if self.cache.interactions.contains(user_id) else [])
+        item_categories = {
+            item_id: features["category"]
+            for item_id, features in self.recommender.content_based.item_features.items()
+        }
+        with span("fallback"):
+            return await fallback_recommendations(self.cache, user_interactions, item_categories,
+                                                  num_recommendations)
+    
+    def _finish_deadline_task(self, user_id: str, task: asyncio.Task):
+        self.deadline_tasks.pop(user_id, None)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Deadline-bound computation failed for {user_id}: {task.exception()}")
+    
+    async def get_batch_recommendations(self, requests: List[Tuple[str, int]]) -> Dict:
+        start_time = time.time()
+        
+        wanted = {}
+        for user_id, num_recommendations in requests:
+            wanted[user_id] = max(wanted.get(user_id, 0), num_recommendations)
+        
+        served = {}
+        misses = []
+        for user_id, num_recommendations in wanted.items():
+            lookup_start = time.time()
+            with stage_timer("cache_lookup"):
+                cached_entry = await self.cache.get_user_recommendation_entry(user_id)
+            
+            if cached_entry and (len(cached_entry["recommendations"]) >= num_recommendations or
+                                 len(cached_entry["recommendations"]) < cached_entry["depth"]):
+                self.performance_stats["cache_hits"] += 1
+                if self.cache.should_refresh_user_recommendations(user_id):
+                    self._schedule_refresh(user_id, max(cached_entry["depth"], num_recommendations * 2))
+                served[user_id] = (cached_entry["recommendations"], "cache", (time.time() - lookup_start) * 1000)
+            else:
+                self.performance_stats["cache_misses"] += 1
+                misses.append((user_id, num_recommendations * 2))
+        
+        if misses:
+            compute_start = time.time()
+            with span("batch_compute", users=len(misses)):
+                computed = await self._compute_batch_recommendations(misses)
+            compute_time = (time.time() - compute_start) * 1000
+            for user_id, recommendations in computed.items():
+                served[user_id] = ([
+                    {"item": item, "score": score, "strategy": strategy}
+                    for item, score, strategy in recommendations
+                ], "computed", compute_time)
+        
+        results = []
+        for user_id, num_recommendations in requests:
+            recommendations, source, latency = served[user_id]
+            results.append({
+                "user_id": user_id,
+                "recommendations": recommendations[:num_recommendations],
+                "source": source,
+                "response_time_ms": f"{latency:.2f}"
+            })
+        
+        response_time = (time.time() - start_time) * 1000
+        
+        return {
+            "results": results,
+            "users": len(wanted),
+            "cache_hits": len(wanted) - len(misses),
+            "computed": len(misses),
+            "response_time_ms": f"{response_time:.2f}",
+            "timestamp": time.time()
+        }
+    
+    async def _compute_batch_recommendations(self, misses: List[Tuple[str, int]]
+                                             ) -> Dict[str, List[Tuple[str, float, str]]]:
+        recommender = self.recommender
+        versions = {user_id: self.cache.user_version(user_id) for user_id, _ in misses}
+        interactions = await asyncio.gather(*[self._get_model_interactions(user_id) for user_id, _ in misses])
+        
+        batch = recommender.get_batch_recommendations([
+            (user_id, user_interactions, depth)
+            for (user_id, depth), user_interactions in zip(misses, interactions)
+        ])
+        
+        computed = {}
+        for (user_id, depth), recommendations in zip(misses, batch):
+            stored = await self.cache.set_user_recommendations(user_id, recommendations, ttl=300, depth=depth,
+                                                               version=versions[user_id])
+            if not stored:
+                self.performance_stats["discarded_refreshes"] += 1
+            computed[user_id] = recommendations
+        return computed
+    
+    async def _compute_recommendations(self, user_id: str, depth: int,
+                                       offload: bool = False) -> List[Tuple[str, float, str]]:
+        recommender = self.recommender
+        version = self.cache.user_version(user_id)
+        with span("interactions_fetch", user_id=user_id):
+            user_interactions = await self._get_model_interactions(user_id)
+        
+        with span("scoring", depth=depth, offload=offload):
+            if offload:
+                loop = asyncio.get_running_loop()
+                recommendations = await loop.run_in_executor(
+                    None, contextvars.copy_context().run, recommender.get_recommendations, user_id,
+                    user_interactions, depth
+                )
+            else:
+                recommendations = recommender.get_recommendations(
+                    user_id, user_interactions, depth
+                )
+        
+        with span("cache_store"):
+            stored = await self.cache.set_user_recommendations(user_id, recommendations, ttl=300, depth=depth,
+                                                               version=version)
+        if not stored:
+            self.performance_stats["discarded_refreshes"] += 1
+        return recommendations
+    
+    async def _extend_recommendations(self, user_id: str, cached_recs: List[Dict], depth: int) -> List[Dict]:
+        recommender = self.recommender
+        version = self.cache.user_version(user_id)
+        user_interactions = await self._get_model_interactions(user_id)
+        
+        extra_recs = recommender.get_recommendations(
+            user_id, user_interactions, depth - len(cached_recs),
+            exclude_items={rec["item"] for rec in cached_recs}
+        )
+        
+        extended = await self.cache.extend_user_recommendations(user_id, extra_recs, depth, version)
+        if extended is None:
+            extended = cached_recs + [
+                {"item": item, "score": score, "strategy": strategy}
+                for item, score, strategy in extra_recs
+            ]
+        return extended
+    
+    def _schedule_refresh(self, user_id: str, depth: int):
+        if user_id in self.refresh_tasks:
+            return
+        
+        task = asyncio.create_task(self._refresh_recommendations(user_id, depth))
+        self.refresh_tasks[user_id] = task
+        task.add_done_callback(lambda _: self.refresh_tasks.pop(user_id, None))
+    
+    async def _refresh_recommendations(self, user_id: str, depth: int):
+        try:
+            await self._compute_recommendations(user_id, depth)
+            self.performance_stats["background_refreshes"] += 1
+        except Exception as e:
+            print(f"Background refresh failed for {user_id}: {e}")
+    
+    async def get_similar_items(self, item_id: str, num_similar: int = 5) -> Dict:
+        start_time = time.time()
+        
+        cached_similar = await self.cache.get_item_similarity(item_id)
+        
+        if cached_similar:
+            response_time = (time.time() - start_time) * 1000
+            return {
+                "item_id": item_id,
+                "similar_items": cached_similar[:num_similar],
+                "source": "cache",
+                "response_time_ms": f"{response_time:.2f}"
+            }
+        
+        similar_items = self.recommender.content_based.get_similar_items(item_id, num_similar * 2)
+        
+        await self.cache.set_item_similarity(item_id, similar_items, ttl=86400)
+        
+        response_time = (time.time() - start_time) * 1000
+        
+        return {
+            "item_id": item_id,
+            "similar_items": [
+                {"item": item, "score": score}
+                for item, score in similar_items[:num_similar]
+            ],
+            "source": "computed",
+            "response_time_ms": f"{response_time:.2f}"
+        }
+    
+    def _cancel_background_tasks(self):
+        for task in list(self.refresh_tasks.values()) + list(self.deadline_tasks.values()):
+            task.cancel()
\ No newline at end of file
@@ -1,62 +1,87 @@
+import asyncio
 import time
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List
+from .base_cached_recommender import BaseCachedRecommender
 from .hybrid_recommender import HybridRecommender
-from cache.memory_cache import MemoryCache
+from .model_manager import ModelManager, TrainingPlan
+from .model_store import interactions_fingerprint, load_content_model, load_model, save_model
 
-class CachedHybridRecommender:
-    def __init__(self):
-        self.recommender = HybridRecommender()
-        self.cache = MemoryCache()
-        self.performance_stats = {"cache_hits": 0, "cache_misses": 0, "avg_response_time": 0}
+class CachedHybridRecommender(BaseCachedRecommender):
+    def __init__(self, model_path: str = None):
+        super().__init__()
+        self.model_path = model_path
+        self.model_manager = ModelManager(lambda: self.recommender, self._install_model)
     
     async def initialize(self, interactions: List[Dict], items_data: List[Dict]):
         await self.cache.connect()
-        self.recommender.fit(interactions, items_data)
+        if not await self._restore_model(interactions, items_data):
+            self.recommender.fit(interactions, items_data)
+            await self._save_model(interactions)
         
         await self._precompute_popular_items(items_data)
         await self._precompute_item_similarities(items_data)
         
         print("Cached hybrid recommender initialized")
     
-    async def get_recommendations(self, user_id: str, num_recommendations: int = 5) -> Dict:
-        start_time = time.time()
+    async def retrain(self, interactions: List[Dict], items_data: List[Dict], reason: str = "manual") -> Dict:
+        async def prepare() -> TrainingPlan:
+            def build() -> HybridRecommender:
+                recommender = HybridRecommender()
+                recommender.fit(interactions, items_data)
+                return recommender
+            return build, {"interactions": interactions, "items_data": items_data}
+        
+        return await asyncio.shield(self.model_manager.retrain(prepare, reason))
+    
+    async def _install_model(self, recommender: HybridRecommender, context: Dict):
+        self.recommender = recommender
+        generation = self.cache.bump_generation()
         
-        cached_recs = await self.cache.get_user_recommendations(user_id)
+        await self._precompute_popular_items(context["items_data"])
+        await self._precompute_item_similarities(context["items_data"])
+        await self._save_model(context["interactions"])
         
-        if cached_recs:
-            self.performance_stats["cache_hits"] += 1
-            response_time = (time.time() - start_time) * 1000
+        print(f"Swapped in retrained model, cache generation is now {generation}")
+    
+    async def _restore_model(self, interactions: List[Dict], items_data: List[Dict]) -> bool:
+        if not self.model_path:
+            return False
+        
+        loop = asyncio.get_running_loop()
+        try:
+            checkpoint = await loop.run_in_executor(None, load_model, self.model_path)
+            if checkpoint is None:
+                return False
             
-            return {
-                "recommendations": cached_recs[:num_recommendations],
-                "user_id": user_id,
-                "source": "cache",
-                "response_time_ms": f"{response_time:.2f}",
-                "timestamp": time.time()
-            }
-        
-        self.performance_stats["cache_misses"] += 1
-        
-        user_interactions = await self.cache.get_user_interactions(user_id)
-        
-        recommendations = self.recommender.get_recommendations(
-            user_id, user_interactions, num_recommendations * 2
-        )
-        
-        await self.cache.set_user_recommendations(user_id, recommendations, ttl=300)
-        
-        response_time = (time.time() - start_time) * 1000
-        
-        return {
-            "recommendations": [
-                {"item": item, "score": score, "strategy": strategy}
-                for item, score, strategy in recommendations[:num_recommendations]
-            ],
-            "user_id": user_id,
-            "source": "computed",
-            "response_time_ms": f"{response_time:.2f}",
-            "timestamp": time.time()
-        }
+            collaborative, watermark = checkpoint
+            if watermark != {"interactions": interactions_fingerprint(interactions)}:
+                print(f"Model checkpoint {self.model_path} is stale, retraining")
+                return False
+            content_based = await loop.run_in_executor(None, load_content_model, self.model_path, items_data)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable model checkpoint {self.model_path}: {e}")
+            return False
+        
+        self.recommender.restore(collaborative, items_data, content_based)
+        if content_based is None:
+            await self._save_model(interactions)
+        return True
+    
+    async def _save_model(self, interactions: List[Dict]):
+        if not self.model_path:
+            return
+        
+        async with self.model_save_lock:
+            collaborative = self.recommender.collaborative
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                None, save_model, self.model_path, dict(collaborative.users), dict(collaborative.items),
+                collaborative.user_item_matrix.copy(), collaborative.user_similarity.copy(),
+                {"interactions": interactions_fingerprint(interactions)}, self.recommender.content_based
+            )
+    
+    async def _get_model_interactions(self, user_id: str) -> List[Dict]:
+        return await self.cache.get_user_interactions(user_id)
     
     async def record_user_interaction(self, user_id: str, item_id: str, rating: float):
         start_time = time.time()
@@ -64,6 +89,7 @@ class CachedHybridRecommender:
         await self.cache.update_user_interaction(user_id, item_id, rating)
         
         self.recommender.update_user_interaction(user_id, item_id, rating)
+        self.model_manager.observe(user_id, item_id, rating)
         
         response_time = (time.time() - start_time) * 1000
         
@@ -76,33 +102,19 @@ class CachedHybridRecommender:
             "response_time_ms": f"{response_time:.2f}"
         }
     
-    async def get_similar_items(self, item_id: str, num_similar: int = 5) -> Dict:
+    async def record_user_interactions(self, interactions: List[Dict]) -> Dict:
         start_time = time.time()
         
-        cached_similar = await self.cache.get_item_similarity(item_id)
-        
-        if cached_similar:
-            response_time = (time.time() - start_time) * 1000
-            return {
-                "item_id": item_id,
-                "similar_items": cached_similar[:num_similar],
-                "source": "cache",
-                "response_time_ms": f"{response_time:.2f}"
-            }
-        
-        similar_items = self.recommender.content_based.get_similar_items(item_id, num_similar * 2)
-        
-        await self.cache.set_item_similarity(item_id, similar_items, ttl=86400)
+        await self.cache.update_user_interactions(interactions)
+        model_updates = self.recommender.update_user_interactions(interactions)
+        self.model_manager.observe_many(interactions)
         
         response_time = (time.time() - start_time) * 1000
         
         return {
-            "item_id": item_id,
-            "similar_items": [
-                {"item": item, "score": score}
-                for item, score in similar_items[:num_similar]
-            ],
-            "source": "computed",
+            "recorded": len(interactions),
+            "model_updates": model_updates,
+            "errors": [],
             "response_time_ms": f"{response_time:.2f}"
         }
     
@@ -163,8 +175,11 @@ class CachedHybridRecommender:
             "recommendation_requests": total_requests,
             "cache_hit_rate": cache_stats["hit_rate"],
             "cache_performance": cache_stats,
-            "system_performance": self.performance_stats
+            "system_performance": self.performance_stats,
+            "model_manager": self.model_manager.get_stats()
         }
     
     async def close(self):
+        self._cancel_background_tasks()
+        await self.model_manager.close()
         await self.cache.close()
\ No newline at end of file
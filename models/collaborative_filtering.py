@@ -1,5 +1,5 @@
 import numpy as np
-from typing import Dict, List, Tuple
+from typing import Dict, List, Tuple, Set
 import pandas as pd
 
 class CollaborativeFilter:
@@ -15,22 +15,86 @@ class CollaborativeFilter:
         unique_users = df['user_id'].unique()
         unique_items = df['item_id'].unique()
         
-        self.users = {user: idx for idx, user in enumerate(unique_users)}
-        self.items = {item: idx for idx, item in enumerate(unique_items)}
-        
-        n_users = len(unique_users)
-        n_items = len(unique_items)
-        self.user_item_matrix = np.zeros((n_users, n_items))
-        
-        for _, row in df.iterrows():
-            user_idx = self.users[row['user_id']]
-            item_idx = self.items[row['item_id']]
-            self.user_item_matrix[user_idx, item_idx] = row['rating']
+        user_index = {user: idx for idx, user in enumerate(unique_users)}
+        item_index = {item: idx for idx, item in enumerate(unique_items)}
         
+        self.start_fit(user_index, item_index)
+        self.add_ratings(
+            df['user_id'].map(user_index).to_numpy(),
+            df['item_id'].map(item_index).to_numpy(),
+            df['rating'].to_numpy(dtype=float)
+        )
+        self.finish_fit()
+    
+    def start_fit(self, user_index: Dict[str, int], item_index: Dict[str, int]):
+        self.users = user_index
+        self.items = item_index
+        self.user_item_matrix = np.zeros((len(user_index), len(item_index)))
+    
+    def add_ratings(self, user_codes: np.ndarray, item_codes: np.ndarray, ratings: np.ndarray):
+        n_users, n_items = self.user_item_matrix.shape
+        if len(self.users) > n_users or len(self.items) > n_items:
+            grown = np.zeros((len(self.users), len(self.items)))
+            grown[:n_users, :n_items] = self.user_item_matrix
+            self.user_item_matrix = grown
+        
+        self.user_item_matrix[user_codes, item_codes] = ratings
+    
+    def finish_fit(self):
         self._calculate_user_similarity()
         
+        n_users, n_items = self.user_item_matrix.shape
         print(f"Model trained with {n_users} users and {n_items} items")
     
+    def apply_ratings(self, user_ids: List[str], item_ids: List[str], ratings: List[float]):
+        if self.user_similarity is None:
+            self.fit([
+                {"user_id": user_id, "item_id": item_id, "rating": rating}
+                for user_id, item_id, rating in zip(user_ids, item_ids, ratings)
+            ])
+            return
+        
+        user_codes = np.fromiter((self.users.setdefault(user_id, len(self.users)) for user_id in user_ids),
+                                 dtype=np.int64, count=len(user_ids))
+        item_codes = np.fromiter((self.items.setdefault(item_id, len(self.items)) for item_id in item_ids),
+                                 dtype=np.int64, count=len(item_ids))
+        self.add_ratings(user_codes, item_codes, np.asarray(ratings, dtype=np.float64))
+        self._update_user_similarity(np.unique(user_codes))
+    
+    def copy(self) -> "CollaborativeFilter":
+        clone = CollaborativeFilter()
+        clone.users = dict(self.users)
+        clone.items = dict(self.items)
+        if self.user_item_matrix is not None:
+            clone.user_item_matrix = np.array(self.user_item_matrix)
+        if self.user_similarity is not None:
+            clone.user_similarity = np.array(self.user_similarity)
+        return clone
+    
+    def with_ratings(self, user_ids: List[str], item_ids: List[str], ratings: List[float]) -> "CollaborativeFilter":
+        clone = self.copy()
+        clone.apply_ratings(user_ids, item_ids, ratings)
+        return clone
+    
+    def get_rating(self, user_id: str, item_id: str) -> float:
+        if user_id not in self.users or item_id not in self.items:
+            return 0.0
+        return float(self.user_item_matrix[self.users[user_id], self.items[item_id]])
+    
+    def _update_user_similarity(self, changed_users: np.ndarray):
+        from sklearn.metrics.pairwise import cosine_similarity
+        
+        n_users = self.user_item_matrix.shape[0]
+        previous = self.user_similarity.shape[0]
+        if n_users > previous:
+            grown = np.zeros((n_users, n_users))
+            grown[:previous, :previous] = self.user_similarity
+            self.user_similarity = grown
+        
+        changed_rows = cosine_similarity(self.user_item_matrix[changed_users], self.user_item_matrix)
+        self.user_similarity[changed_users, :] = changed_rows
+        self.user_similarity[:, changed_users] = changed_rows.T
+    
     def _calculate_user_similarity(self):
         from sklearn.metrics.pairwise import cosine_similarity
         
@@ -39,9 +103,10 @@ class CollaborativeFilter:
         
         self.user_similarity = cosine_similarity(self.user_item_matrix)
     
-    def get_recommendations(self, user_id: str, num_recommendations: int = 5) -> List[Tuple[str, float]]:
+    def get_recommendations(self, user_id: str, num_recommendations: int = 5,
+                          exclude_items: Set[str] = None) -> List[Tuple[str, float]]:
         if user_id not in self.users:
-            return self._get_popular_items(num_recommendations)
+            return self._get_popular_items(num_recommendations, exclude_items)
         
         user_idx = self.users[user_id]
         user_ratings = self.user_item_matrix[user_idx]
@@ -52,6 +117,10 @@ class CollaborativeFilter:
         
         recommendations = []
         
+        if exclude_items:
+            excluded = [self.items[item] for item in exclude_items if item in self.items]
+            unrated_items = np.setdiff1d(unrated_items, excluded)
+        
         for item_idx in unrated_items:
             predicted_rating = self._predict_rating(user_idx, item_idx, similarities)
             
@@ -62,6 +131,38 @@ class CollaborativeFilter:
         recommendations.sort(key=lambda x: x[1], reverse=True)
         return recommendations[:num_recommendations]
     
+    def get_batch_recommendations(self, user_ids: List[str], num_recommendations: int = 5,
+                                  exclude_items: Dict[str, Set[str]] = None) -> Dict[str, List[Tuple[str, float]]]:
+        known_users = [user_id for user_id in user_ids if user_id in self.users]
+        if not known_users:
+            return {}
+        
+        user_codes = np.array([self.users[user_id] for user_id in known_users])
+        rated = self.user_item_matrix > 0
+        similarities = self.user_similarity[user_codes].copy()
+        similarities[np.arange(len(user_codes)), user_codes] = 0
+        
+        numerator = similarities @ self.user_item_matrix
+        denominator = np.abs(similarities) @ rated
+        predicted = np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+        predicted[self.user_item_matrix[user_codes] != 0] = 0
+        
+        item_ids = np.empty(len(self.items), dtype=object)
+        for item_id, idx in self.items.items():
+            item_ids[idx] = item_id
+        
+        results = {}
+        for row, user_id in enumerate(known_users):
+            scores = predicted[row]
+            if exclude_items and exclude_items.get(user_id):
+                excluded = [self.items[item] for item in exclude_items[user_id] if item in self.items]
+                scores = scores.copy()
+                scores[excluded] = 0
+            
+            ranked = np.argsort(-scores, kind="stable")[:num_recommendations]
+            results[user_id] = [(item_ids[idx], scores[idx]) for idx in ranked if scores[idx] > 0]
+        return results
+    
     def _predict_rating(self, user_idx: int, item_idx: int, similarities: np.ndarray) -> float:
         rated_users = np.where(self.user_item_matrix[:, item_idx] > 0)[0]
         
@@ -81,14 +182,22 @@ class CollaborativeFilter:
         
         return numerator / denominator if denominator > 0 else 0.0
     
-    def _get_popular_items(self, num_items: int) -> List[Tuple[str, float]]:
+    def _get_popular_items(self, num_items: int, exclude_items: Set[str] = None) -> List[Tuple[str, float]]:
         if self.user_item_matrix is None:
             return []
         
         item_ratings = np.mean(self.user_item_matrix, axis=0)
-        top_items = np.argsort(item_ratings)[::-1][:num_items]
+        ranked = np.argsort(item_ratings)[::-1]
+        
+        popular = []
+        for idx in ranked:
+            if len(popular) >= num_items or item_ratings[idx] <= 0:
+                break
+            item_id = self._get_item_id(idx)
+            if not exclude_items or item_id not in exclude_items:
+                popular.append((item_id, item_ratings[idx]))
         
-        return [(self._get_item_id(idx), item_ratings[idx]) for idx in top_items if item_ratings[idx] > 0]
+        return popular
     
     def _get_item_id(self, item_idx: int) -> str:
         for item_id, idx in self.items.items():
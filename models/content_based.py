@@ -1,5 +1,5 @@
 import numpy as np
-from typing import Dict, List, Tuple
+from typing import Dict, List, Tuple, Set
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 
@@ -10,9 +10,31 @@ class ContentBasedFilter:
         self.items = []
         self.vectorizer = TfidfVectorizer(stop_words='english')
         self.feature_matrix = None
+        self.ranked_items = []
+        self.neighbor_indices = None
+        self.neighbor_scores = None
+    
+    @classmethod
+    def from_state(cls, items: List[str], item_features: Dict[str, Dict], ranked_items: List[str],
+                   vocabulary: Dict[str, int], idf: np.ndarray, feature_matrix, item_similarity: np.ndarray,
+                   neighbor_indices: np.ndarray, neighbor_scores: np.ndarray) -> "ContentBasedFilter":
+        content = cls()
+        content.items = list(items)
+        content.item_features = item_features
+        content.ranked_items = ranked_items
+        content.vectorizer.vocabulary_ = vocabulary
+        content.vectorizer.idf_ = np.asarray(idf)
+        content.feature_matrix = feature_matrix
+        content.item_similarity = item_similarity
+        content.neighbor_indices = neighbor_indices
+        content.neighbor_scores = neighbor_scores
+        return content
     
     def fit(self, items_data: List[Dict]):
         self.items = [item['item_id'] for item in items_data]
+        self.ranked_items = list(self.items)
+        self.neighbor_indices = None
+        self.neighbor_scores = None
         
         for item in items_data:
             self.item_features[item['item_id']] = item
@@ -27,9 +49,10 @@ class ContentBasedFilter:
         
         print(f"Content model trained with {len(items_data)} items")
     
-    def get_recommendations(self, user_interactions: List[Dict], num_recommendations: int = 5) -> List[Tuple[str, float]]:
+    def get_recommendations(self, user_interactions: List[Dict], num_recommendations: int = 5,
+                          exclude_items: Set[str] = None) -> List[Tuple[str, float]]:
         if not user_interactions:
-            return self._get_popular_items(num_recommendations)
+            return self._get_popular_items(num_recommendations, exclude_items)
         
         user_profile = self._build_user_profile(user_interactions)
         
@@ -37,6 +60,8 @@ class ContentBasedFilter:
         similarities = cosine_similarity(user_profile, feature_matrix_dense)[0]
         
         rated_items = {interaction['item_id'] for interaction in user_interactions}
+        if exclude_items:
+            rated_items |= exclude_items
         
         recommendations = []
         for i, item_id in enumerate(self.items):
@@ -66,6 +91,12 @@ class ContentBasedFilter:
             return []
         
         item_idx = self.items.index(item_id)
+        if self.neighbor_indices is not None and (num_similar <= self.neighbor_indices.shape[1] or
+                                                  self.neighbor_indices.shape[1] == len(self.items) - 1):
+            neighbors = self.neighbor_indices[item_idx][:num_similar]
+            scores = self.neighbor_scores[item_idx][:num_similar]
+            return [(self.items[i], score) for i, score in zip(neighbors, scores)]
+        
         similarities = self.item_similarity[item_idx]
         
         similar_items = []
@@ -76,5 +107,18 @@ class ContentBasedFilter:
         similar_items.sort(key=lambda x: x[1], reverse=True)
         return similar_items[:num_similar]
     
-    def _get_popular_items(self, num_items: int) -> List[Tuple[str, float]]:
-        return [(item, 0.5) for item in self.items[:num_items]]
\ No newline at end of file
+    def neighbor_table(self, num_neighbors: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        num_neighbors = min(num_neighbors, max(len(self.items) - 1, 0))
+        indices = np.zeros((len(self.items), num_neighbors), dtype=np.int32)
+        scores = np.zeros((len(self.items), num_neighbors))
+        for item_idx in range(len(self.items)):
+            order = np.argsort(-self.item_similarity[item_idx], kind="stable")
+            order = order[order != item_idx][:num_neighbors]
+            indices[item_idx] = order
+            scores[item_idx] = self.item_similarity[item_idx, order]
+        return indices, scores
+    
+    def _get_popular_items(self, num_items: int, exclude_items: Set[str] = None) -> List[Tuple[str, float]]:
+        ranked = self.ranked_items
+        items = [item for item in ranked if item not in exclude_items] if exclude_items else ranked
+        return [(item, 0.5) for item in items[:num_items]]
\ No newline at end of file
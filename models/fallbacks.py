@@ -0,0 +1,38 @@
+from typing import Dict, List, Tuple
+from cache.memory_cache import MemoryCache
+
+async def fallback_recommendations(cache: MemoryCache, user_interactions: List[Dict], item_categories: Dict[str, str],
+                                   num_recommendations: int, recent_items: int = 5
+                                   ) -> Tuple[List[Tuple[str, float, str]], str]:
+    rated = {interaction["item_id"] for interaction in user_interactions}
+    recent = sorted(user_interactions, key=lambda interaction: interaction.get("timestamp", 0),
+                    reverse=True)[:recent_items]
+    liked = [interaction for interaction in recent if interaction["rating"] >= 4] or recent
+    
+    scores = {}
+    for interaction in liked:
+        for neighbor in await cache.get_item_similarity(interaction["item_id"]) or []:
+            if neighbor["item"] not in rated:
+                weight = neighbor["score"] * interaction["rating"] / 5
+                scores[neighbor["item"]] = scores.get(neighbor["item"], 0.0) + weight
+    if scores:
+        ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:num_recommendations]
+        return [(item, score, "fallback") for item, score in ranked], "fallback:item_neighbors"
+    
+    categories = []
+    for interaction in recent:
+        category = item_categories.get(interaction["item_id"])
+        if category and category not in categories:
+            categories.append(category)
+    
+    for source, category_list in (("fallback:popular_category", categories), ("fallback:popular", ["all"])):
+        recommendations = []
+        for category in category_list:
+            for item in await cache.get_popular_items(category) or []:
+                if item["item"] not in rated and len(recommendations) < num_recommendations:
+                    recommendations.append((item["item"], item["score"], "fallback"))
+                    rated.add(item["item"])
+        if recommendations:
+            return recommendations, source
+    
+    return [], "fallback:none"
\ No newline at end of file
@@ -1,12 +1,14 @@
-from typing import Dict, List, Tuple
+from typing import Dict, List, Tuple, Set
 from .collaborative_filtering import CollaborativeFilter
 from .content_based import ContentBasedFilter
+from monitoring.metrics import stage_timer
 
 class HybridRecommender:
     def __init__(self):
         self.collaborative = CollaborativeFilter()
         self.content_based = ContentBasedFilter()
         self.is_trained = False
+        self.strategy_counts = {"collaborative": 0, "hybrid": 0, "content": 0, "popular": 0}
     
     def fit(self, interactions: List[Dict], items_data: List[Dict]):
         self.collaborative.fit(interactions)
@@ -14,45 +16,125 @@ class HybridRecommender:
         self.is_trained = True
         print("Hybrid model trained successfully")
     
+    def start_fit(self, user_index: Dict[str, int], item_index: Dict[str, int]):
+        self.collaborative.start_fit(user_index, item_index)
+    
+    def add_ratings(self, user_codes, item_codes, ratings):
+        self.collaborative.add_ratings(user_codes, item_codes, ratings)
+    
+    def finish_fit(self, items_data: List[Dict]):
+        self.collaborative.finish_fit()
+        self.content_based.fit(items_data)
+        self.is_trained = True
+        print("Hybrid model trained successfully")
+    
+    def restore(self, collaborative: CollaborativeFilter, items_data: List[Dict],
+                content_based: ContentBasedFilter = None):
+        self.collaborative = collaborative
+        if content_based is not None:
+            self.content_based = content_based
+        else:
+            self.content_based.fit(items_data)
+        self.is_trained = True
+        print(f"Hybrid model restored from checkpoint ({'with' if content_based else 'refit'} content model)")
+    
     def get_recommendations(self, user_id: str, user_interactions: List[Dict] = None, 
-                          num_recommendations: int = 5) -> List[Tuple[str, float, str]]:
+                          num_recommendations: int = 5,
+                          exclude_items: Set[str] = None) -> List[Tuple[str, float, str]]:
         if not self.is_trained:
             return []
         
         strategy = self._choose_strategy(user_id, user_interactions)
         
         if strategy == "collaborative":
-            recs = self.collaborative.get_recommendations(user_id, num_recommendations)
+            with stage_timer("cf_scoring"):
+                recs = self.collaborative.get_recommendations(user_id, num_recommendations, exclude_items)
             return [(item, score, "collaborative") for item, score in recs]
         
         elif strategy == "content":
-            recs = self.content_based.get_recommendations(user_interactions or [], num_recommendations)
+            with stage_timer("content_scoring"):
+                recs = self.content_based.get_recommendations(user_interactions or [], num_recommendations,
+                                                              exclude_items)
             return [(item, score, "content") for item, score in recs]
         
         elif strategy == "hybrid":
-            return self._blend_recommendations(user_id, user_interactions, num_recommendations)
+            return self._blend_recommendations(user_id, user_interactions, num_recommendations,
+                                               exclude_items)
         
         else:
-            return self._get_popular_fallback(num_recommendations)
+            return self._get_popular_fallback(num_recommendations, exclude_items)
+    
+    def get_batch_recommendations(self, requests: List[Tuple[str, List[Dict], int]]
+                                  ) -> List[List[Tuple[str, float, str]]]:
+        if not self.is_trained:
+            return [[] for _ in requests]
+        
+        strategies = [self._choose_strategy(user_id, user_interactions)
+                      for user_id, user_interactions, _ in requests]
+        
+        collab_depth = max([
+            num_recommendations * 2 if strategy == "hybrid" else num_recommendations
+            for (_, _, num_recommendations), strategy in zip(requests, strategies)
+            if strategy in ("collaborative", "hybrid")
+        ] or [0])
+        collab_users = [user_id for (user_id, _, _), strategy in zip(requests, strategies)
+                        if strategy in ("collaborative", "hybrid")]
+        with stage_timer("cf_scoring"):
+            collab_recs = self.collaborative.get_batch_recommendations(collab_users, collab_depth)
+        
+        popular = {}
+        results = []
+        for (user_id, user_interactions, num_recommendations), strategy in zip(requests, strategies):
+            if strategy == "collaborative":
+                recs = collab_recs.get(user_id, [])[:num_recommendations]
+                results.append([(item, score, "collaborative") for item, score in recs])
+            elif strategy == "content":
+                with stage_timer("content_scoring"):
+                    recs = self.content_based.get_recommendations(user_interactions, num_recommendations)
+                results.append([(item, score, "content") for item, score in recs])
+            elif strategy == "hybrid":
+                results.append(self._blend_recommendations(
+                    user_id, user_interactions, num_recommendations,
+                    collab_recs=collab_recs.get(user_id, [])[:num_recommendations * 2]
+                ))
+            else:
+                if num_recommendations not in popular:
+                    popular[num_recommendations] = self._get_popular_fallback(num_recommendations)
+                results.append(list(popular[num_recommendations]))
+        return results
     
     def _choose_strategy(self, user_id: str, user_interactions: List[Dict] = None) -> str:
         user_in_collab = user_id in self.collaborative.users if self.collaborative.users else False
         has_interactions = user_interactions and len(user_interactions) > 0
         
         if user_in_collab and has_interactions and len(user_interactions) >= 3:
-            return "hybrid"
+            strategy = "hybrid"
         elif user_in_collab:
-            return "collaborative" 
+            strategy = "collaborative"
         elif has_interactions:
-            return "content"
+            strategy = "content"
         else:
-            return "popular"
+            strategy = "popular"
+        self.strategy_counts[strategy] += 1
+        return strategy
     
     def _blend_recommendations(self, user_id: str, user_interactions: List[Dict], 
-                             num_recommendations: int) -> List[Tuple[str, float, str]]:
-        collab_recs = self.collaborative.get_recommendations(user_id, num_recommendations * 2)
-        content_recs = self.content_based.get_recommendations(user_interactions, num_recommendations * 2)
+                             num_recommendations: int,
+                             exclude_items: Set[str] = None,
+                             collab_recs: List[Tuple[str, float]] = None) -> List[Tuple[str, float, str]]:
+        if collab_recs is None:
+            with stage_timer("cf_scoring"):
+                collab_recs = self.collaborative.get_recommendations(user_id, num_recommendations * 2,
+                                                                     exclude_items)
+        with stage_timer("content_scoring"):
+            content_recs = self.content_based.get_recommendations(user_interactions, num_recommendations * 2,
+                                                                  exclude_items)
         
+        with stage_timer("blending"):
+            return self._blend_scores(collab_recs, content_recs, len(user_interactions), num_recommendations)
+    
+    def _blend_scores(self, collab_recs: List[Tuple[str, float]], content_recs: List[Tuple[str, float]],
+                      interaction_count: int, num_recommendations: int) -> List[Tuple[str, float, str]]:
         collab_dict = {item: score for item, score in collab_recs}
         content_dict = {item: score for item, score in content_recs}
         
@@ -63,7 +145,6 @@ class HybridRecommender:
             collab_score = collab_dict.get(item, 0)
             content_score = content_dict.get(item, 0)
             
-            interaction_count = len(user_interactions)
             if interaction_count >= 10:
                 weight_collab = 0.7
                 weight_content = 0.3
@@ -82,14 +163,27 @@ class HybridRecommender:
         blended_recs.sort(key=lambda x: x[1], reverse=True)
         return blended_recs[:num_recommendations]
     
-    def _get_popular_fallback(self, num_recommendations: int) -> List[Tuple[str, float, str]]:
-        popular_recs = self.content_based._get_popular_items(num_recommendations)
+    def _get_popular_fallback(self, num_recommendations: int,
+                              exclude_items: Set[str] = None) -> List[Tuple[str, float, str]]:
+        popular_recs = self.content_based._get_popular_items(num_recommendations, exclude_items)
         return [(item, score, "popular") for item, score in popular_recs]
     
     def update_user_interaction(self, user_id: str, item_id: str, rating: float):
-        if user_id in self.collaborative.users:
-            user_idx = self.collaborative.users[user_id]
-            if item_id in self.collaborative.items:
-                item_idx = self.collaborative.items[item_id]
-                self.collaborative.user_item_matrix[user_idx, item_idx] = rating
-                self.collaborative._calculate_user_similarity()
\ No newline at end of file
+        if user_id in self.collaborative.users and item_id in self.collaborative.items:
+            self.collaborative = self.collaborative.with_ratings([user_id], [item_id], [rating])
+    
+    def update_user_interactions(self, interactions: List[Dict]) -> int:
+        known = [
+            interaction for interaction in interactions
+            if interaction["user_id"] in self.collaborative.users and interaction["item_id"] in self.collaborative.items
+        ]
+        if known and self.collaborative.user_similarity is not None:
+            self.apply_ratings(known)
+        return len(known)
+    
+    def apply_ratings(self, interactions: List[Dict]):
+        self.collaborative = self.collaborative.with_ratings(
+            [interaction["user_id"] for interaction in interactions],
+            [interaction["item_id"] for interaction in interactions],
+            [interaction["rating"] for interaction in interactions]
+        )
\ No newline at end of file
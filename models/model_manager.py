@@ -0,0 +1,162 @@
+import asyncio
+import random
+import time
+import numpy as np
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from .hybrid_recommender import HybridRecommender
+
+TrainingPlan = Tuple[Callable[[], HybridRecommender], Dict]
+
+def validate_model(candidate: HybridRecommender, current: HybridRecommender, sample_users: int = 20,
+                   min_user_ratio: float = 0.9) -> List[str]:
+    if not candidate.is_trained:
+        return ["model is not trained"]
+    
+    problems = []
+    collaborative = candidate.collaborative
+    if collaborative.user_similarity is None or not np.isfinite(collaborative.user_similarity).all():
+        problems.append("user similarity has missing or non-finite values")
+    content_similarity = candidate.content_based.item_similarity
+    if content_similarity is None or not np.isfinite(content_similarity).all():
+        problems.append("item similarity has missing or non-finite values")
+    
+    if current.is_trained and len(collaborative.users) < min_user_ratio * len(current.collaborative.users):
+        problems.append(f"model knows {len(collaborative.users)} users, "
+                        f"down from {len(current.collaborative.users)}")
+    
+    users = list(collaborative.users)
+    for user_id in random.sample(users, min(sample_users, len(users))):
+        try:
+            candidate.get_recommendations(user_id, None, 5)
+        except Exception as e:
+            problems.append(f"scoring {user_id} failed: {e}")
+            break
+    return problems
+
+class ModelManager:
+    def __init__(self, current: Callable[[], HybridRecommender],
+                 install: Callable[[HybridRecommender, Dict], Awaitable[None]],
+                 prepare: Callable[[], Awaitable[TrainingPlan]] = None, validation_users: int = 20,
+                 min_user_ratio: float = 0.9):
+        self.current = current
+        self.install = install
+        self.prepare = prepare
+        self.validation_users = validation_users
+        self.min_user_ratio = min_user_ratio
+        self.journal: Optional[List[Dict]] = None
+        self.interactions_since_fit = 0
+        self.new_users = set()
+        self.new_items = set()
+        self.observed_ratings = {}
+        self.retrain_task = None
+        self.schedule_task = None
+        self.last_result = None
+        self.stats = {"retrains": 0, "swaps": 0, "rejected": 0, "failures": 0, "replayed_interactions": 0}
+    
+    def observe(self, user_id: str, item_id: str, rating: float):
+        if self.journal is not None:
+            self.journal.append({"user_id": user_id, "item_id": item_id, "rating": rating})
+        self._track_drift(user_id, item_id, rating)
+    
+    def observe_many(self, interactions: List[Dict]):
+        if self.journal is not None:
+            self.journal.extend(interactions)
+        for interaction in interactions:
+            self._track_drift(interaction["user_id"], interaction["item_id"], interaction["rating"])
+    
+    def _track_drift(self, user_id: str, item_id: str, rating: float):
+        if self.observed_ratings.get((user_id, item_id)) == float(rating):
+            return
+        self.observed_ratings[(user_id, item_id)] = float(rating)
+        
+        collaborative = self.current().collaborative
+        self.interactions_since_fit += 1
+        if user_id not in collaborative.users:
+            self.new_users.add(user_id)
+        if item_id not in collaborative.items:
+            self.new_items.add(item_id)
+    
+    def get_drift(self) -> Dict:
+        counts = self.current().strategy_counts
+        requests = sum(counts.values())
+        fallbacks = counts["content"] + counts["popular"]
+        return {
+            "interactions": self.interactions_since_fit,
+            "new_users": len(self.new_users),
+            "new_items": len(self.new_items),
+            "scored_requests": requests,
+            "fallback_requests": fallbacks,
+            "fallback_ratio": round(fallbacks / requests, 4) if requests else 0.0
+        }
+    
+    @property
+    def retraining(self) -> bool:
+        return self.retrain_task is not None and not self.retrain_task.done()
+    
+    def retrain(self, prepare: Callable[[], Awaitable[TrainingPlan]] = None, reason: str = "manual") -> asyncio.Task:
+        if not self.retraining:
+            prepare = prepare or self.prepare
+            if prepare is None:
+                raise ValueError("No training data source is configured for this model")
+            self.retrain_task = asyncio.create_task(self._retrain(prepare, reason))
+        return self.retrain_task
+    
+    async def _retrain(self, prepare: Callable[[], Awaitable[TrainingPlan]], reason: str) -> Dict:
+        start_time = time.time()
+        self.stats["retrains"] += 1
+        self.journal = []
+        result = {"reason": reason, "started_at": start_time}
+        try:
+            build, context = await prepare()
+            loop = asyncio.get_running_loop()
+            candidate = await loop.run_in_executor(None, build)
+            problems = await loop.run_in_executor(
+                None, validate_model, candidate, self.current(), self.validation_users, self.min_user_ratio
+            )
+            
+            if problems:
+                self.stats["rejected"] += 1
+                result.update(status="rejected", problems=problems)
+                print(f"Retrained model rejected: {'; '.join(problems)}")
+            else:
+                replayed = candidate.update_user_interactions(self.journal) if self.journal else 0
+                self.journal = None
+                candidate.strategy_counts = dict.fromkeys(candidate.strategy_counts, 0)
+                self.interactions_since_fit = 0
+                self.new_users = set()
+                self.new_items = set()
+                self.observed_ratings = {}
+                await self.install(candidate, context)
+                self.stats["swaps"] += 1
+                self.stats["replayed_interactions"] += replayed
+                result.update(status="swapped", replayed_interactions=replayed,
+                              users=len(candidate.collaborative.users), items=len(candidate.content_based.items))
+        except Exception as e:
+            self.stats["failures"] += 1
+            result.update(status="failed", error=str(e))
+            print(f"Model retrain failed: {e}")
+        finally:
+            self.journal = None
+        
+        result["duration_ms"] = round((time.time() - start_time) * 1000, 2)
+        self.last_result = result
+        return result
+    
+    async def _schedule_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            result = await asyncio.shield(self.retrain(reason="scheduled"))
+            print(f"Scheduled retrain {result['status']} in {result['duration_ms']}ms")
+    
+    def start_schedule(self, interval: float):
+        self.schedule_task = asyncio.create_task(self._schedule_loop(interval))
+    
+    def get_stats(self) -> Dict:
+        return {**self.stats, "retraining": self.retraining, "last_result": self.last_result,
+                "scheduled": self.schedule_task is not None, "drift": self.get_drift()}
+    
+    async def close(self):
+        for task in (self.schedule_task, self.retrain_task):
+            if task is not None and not task.done():
+                task.cancel()
+        self.schedule_task = None
\ No newline at end of file
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+import uuid
+import numpy as np
+from scipy.sparse import csr_matrix
+from typing import Dict, List, Optional, Tuple
+from .collaborative_filtering import CollaborativeFilter
+from .content_based import ContentBasedFilter
+
+MODEL_FORMAT_VERSION = 3
+SUPPORTED_FORMAT_VERSIONS = (1, 2, 3)
+MANIFEST_FILE = "manifest.json"
+RATINGS_FILE = "ratings.npy"
+SIMILARITY_FILE = "similarity.npy"
+CONTENT_FILES = {
+    "feature_data": "content_features_data.npy",
+    "feature_indices": "content_features_indices.npy",
+    "feature_indptr": "content_features_indptr.npy",
+    "item_similarity": "content_similarity.npy",
+    "idf": "content_idf.npy",
+    "neighbor_indices": "content_neighbors.npy",
+    "neighbor_scores": "content_neighbor_scores.npy"
+}
+VOCABULARY_FILE = "content_vocabulary.json"
+
+def _replace_file(path: str, write):
+    fd, tmp_path = tempfile.mkstemp(prefix=f"{os.path.basename(path)}.", suffix=".tmp", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def _versioned(filename: str, token: str) -> str:
+    stem, extension = os.path.splitext(filename)
+    return f"{stem}.{token}{extension}"
+
+def _model_files(manifest: Dict) -> Dict[str, str]:
+    return manifest.get("files", {"ratings": RATINGS_FILE, "similarity": SIMILARITY_FILE})
+
+def _content_files(content_manifest: Dict) -> Dict[str, str]:
+    return content_manifest.get("files", {**CONTENT_FILES, "vocabulary": VOCABULARY_FILE})
+
+def _referenced_files(manifest: Optional[Dict]) -> set:
+    if not manifest:
+        return set()
+    files = set(_model_files(manifest).values())
+    if manifest.get("content"):
+        files.update(_content_files(manifest["content"]).values())
+    return files
+
+def catalog_fingerprint(items_data: List[Dict]) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for item in sorted(items_data, key=lambda item: item["item_id"]):
+        fields = [item["item_id"], item["category"], item["brand"], item["description"]]
+        digest.update(json.dumps(fields).encode("utf-8"))
+    return digest.hexdigest()
+
+def interactions_fingerprint(interactions: List[Dict]) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for interaction in interactions:
+        fields = [interaction["user_id"], interaction["item_id"], float(interaction["rating"])]
+        digest.update(json.dumps(fields).encode("utf-8"))
+    return digest.hexdigest()
+
+def _save_content(path: str, content: ContentBasedFilter, previous: Optional[Dict], token: str) -> Dict:
+    catalog = catalog_fingerprint([content.item_features[item_id] for item_id in content.items])
+    if (previous and previous["catalog"] == catalog and previous["items"] == list(content.items)
+            and all(os.path.exists(os.path.join(path, filename)) for filename in _content_files(previous).values())):
+        return previous
+    
+    files = {name: _versioned(filename, token) for name, filename in CONTENT_FILES.items()}
+    files["vocabulary"] = _versioned(VOCABULARY_FILE, token)
+    
+    feature_matrix = csr_matrix(content.feature_matrix)
+    neighbor_indices, neighbor_scores = content.neighbor_table()
+    arrays = {
+        "feature_data": feature_matrix.data,
+        "feature_indices": feature_matrix.indices,
+        "feature_indptr": feature_matrix.indptr,
+        "item_similarity": np.asarray(content.item_similarity),
+        "idf": content.vectorizer.idf_,
+        "neighbor_indices": neighbor_indices,
+        "neighbor_scores": neighbor_scores
+    }
+    for name, array in arrays.items():
+        _replace_file(os.path.join(path, files[name]), lambda f, array=array: np.save(f, array))
+    
+    vocabulary = sorted(content.vectorizer.vocabulary_, key=content.vectorizer.vocabulary_.get)
+    _replace_file(os.path.join(path, files["vocabulary"]), lambda f: f.write(json.dumps(vocabulary).encode("utf-8")))
+    
+    return {
+        "files": files,
+        "items": list(content.items),
+        "catalog": catalog,
+        "features_shape": list(feature_matrix.shape),
+        "neighbors": int(neighbor_indices.shape[1])
+    }
+
+def save_model(path: str, users: Dict[str, int], items: Dict[str, int], user_item_matrix: np.ndarray,
+               user_similarity: np.ndarray, watermark: Dict, content: ContentBasedFilter = None):
+    os.makedirs(path, exist_ok=True)
+    try:
+        previous = _read_manifest(path)
+    except ValueError:
+        previous = None
+    
+    token = uuid.uuid4().hex[:12]
+    content_manifest = None
+    if content is not None and content.feature_matrix is not None:
+        content_manifest = _save_content(path, content, previous.get("content") if previous else None, token)
+    
+    files = {"ratings": _versioned(RATINGS_FILE, token), "similarity": _versioned(SIMILARITY_FILE, token)}
+    _replace_file(os.path.join(path, files["ratings"]), lambda f: np.save(f, user_item_matrix))
+    _replace_file(os.path.join(path, files["similarity"]), lambda f: np.save(f, user_similarity))
+    
+    manifest = {
+        "version": MODEL_FORMAT_VERSION,
+        "files": files,
+        "saved_at": time.time(),
+        "watermark": watermark,
+        "users": sorted(users, key=users.get),
+        "items": sorted(items, key=items.get),
+        "shape": list(user_item_matrix.shape),
+        "content": content_manifest
+    }
+    _replace_file(os.path.join(path, MANIFEST_FILE), lambda f: f.write(json.dumps(manifest).encode("utf-8")))
+    
+    for filename in _referenced_files(previous) - _referenced_files(manifest):
+        try:
+            os.remove(os.path.join(path, filename))
+        except FileNotFoundError:
+            pass
+
+def _read_manifest(path: str) -> Optional[Dict]:
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+    
+    with open(manifest_path, "rb") as f:
+        manifest = json.loads(f.read().decode("utf-8"))
+    if manifest.get("version") not in SUPPORTED_FORMAT_VERSIONS:
+        raise ValueError(f"Unsupported model format in {path}")
+    return manifest
+
+def load_model(path: str, mmap_mode: str = None) -> Optional[Tuple[CollaborativeFilter, Dict]]:
+    manifest = _read_manifest(path)
+    if manifest is None:
+        return None
+    
+    files = _model_files(manifest)
+    user_item_matrix = np.load(os.path.join(path, files["ratings"]), mmap_mode=mmap_mode)
+    user_similarity = np.load(os.path.join(path, files["similarity"]), mmap_mode=mmap_mode)
+    
+    n_users, n_items = manifest["shape"]
+    if (user_item_matrix.shape != (n_users, n_items) or user_similarity.shape != (n_users, n_users)
+            or len(manifest["users"]) != n_users or len(manifest["items"]) != n_items):
+        raise ValueError(f"Model files in {path} do not match the manifest")
+    
+    collaborative = CollaborativeFilter()
+    collaborative.users = {user_id: idx for idx, user_id in enumerate(manifest["users"])}
+    collaborative.items = {item_id: idx for idx, item_id in enumerate(manifest["items"])}
+    collaborative.user_item_matrix = user_item_matrix
+    collaborative.user_similarity = user_similarity
+    return collaborative, manifest["watermark"]
+
+def load_content_model(path: str, items_data: List[Dict], mmap_mode: str = None) -> Optional[ContentBasedFilter]:
+    manifest = _read_manifest(path)
+    content_manifest = manifest.get("content") if manifest else None
+    if not content_manifest or content_manifest["catalog"] != catalog_fingerprint(items_data):
+        return None
+    
+    files = _content_files(content_manifest)
+    arrays = {name: np.load(os.path.join(path, files[name]), mmap_mode=mmap_mode) for name in CONTENT_FILES}
+    with open(os.path.join(path, files["vocabulary"]), "rb") as f:
+        vocabulary = json.loads(f.read().decode("utf-8"))
+    
+    n_items, n_terms = content_manifest["features_shape"]
+    if (len(content_manifest["items"]) != n_items or arrays["item_similarity"].shape != (n_items, n_items)
+            or len(vocabulary) != n_terms or arrays["idf"].shape != (n_terms,)
+            or arrays["feature_indptr"].shape != (n_items + 1,)
+            or arrays["neighbor_indices"].shape != arrays["neighbor_scores"].shape):
+        raise ValueError(f"Content model files in {path} do not match the manifest")
+    
+    item_features = {item["item_id"]: item for item in items_data}
+    return ContentBasedFilter.from_state(
+        content_manifest["items"], item_features, [item["item_id"] for item in items_data],
+        {term: idx for idx, term in enumerate(vocabulary)}, arrays["idf"],
+        csr_matrix((arrays["feature_data"], arrays["feature_indices"], arrays["feature_indptr"]),
+                   shape=(n_items, n_terms), copy=False),
+        arrays["item_similarity"], arrays["neighbor_indices"], arrays["neighbor_scores"]
+    )
\ No newline at end of file
@@ -1,40 +1,129 @@
+import asyncio
 import time
-from typing import Dict, List, Tuple, Optional
+from datetime import datetime, timezone
+from typing import Dict, List
+from models.base_cached_recommender import BaseCachedRecommender
 from models.hybrid_recommender import HybridRecommender
-from cache.memory_cache import MemoryCache
+from models.model_store import save_model, load_model, load_content_model
+from models.model_manager import ModelManager, TrainingPlan
+from models.retrain_scheduler import RetrainScheduler
+from monitoring.metrics import stage_timer
 from database.database_manager import DatabaseManager
+from database.sharded_database_manager import ShardedDatabaseManager
+from database.interaction_log import InteractionLog, replay_log
+from database.write_behind import WriteBehindBuffer
 
-class PersistentCachedHybridRecommender:
-    def __init__(self, db_path: str = "recommendation_engine.db"):
-        self.recommender = HybridRecommender()
-        self.cache = MemoryCache()
-        self.db = DatabaseManager(db_path)
-        self.performance_stats = {"cache_hits": 0, "cache_misses": 0}
-    
-    async def initialize(self, interactions: List[Dict] = None, items_data: List[Dict] = None):
+class PersistentCachedHybridRecommender(BaseCachedRecommender):
+    def __init__(self, db_path: str = "recommendation_engine.db", snapshot_path: str = None,
+                 snapshot_interval: float = 60.0, write_behind: bool = True,
+                 write_batch_size: int = 500, write_delay_ms: float = 5.0,
+                 profile: str = "performance", read_pool_size: int = None,
+                 model_path: str = None, model_refresh_interval: float = None, shards: int = 1,
+                 interaction_log_path: str = None, shared_model_path: str = None, retrain_interval: float = None,
+                 retrain_policy: Dict = None):
+        super().__init__()
+        if shards > 1:
+            self.db = ShardedDatabaseManager(db_path, shards, profile, read_pool_size)
+        else:
+            self.db = DatabaseManager(db_path, profile, read_pool_size)
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self.write_buffer = WriteBehindBuffer(self.db, write_batch_size, write_delay_ms) if write_behind else None
+        self.model_path = model_path
+        self.model_refresh_interval = model_refresh_interval
+        self.model_watermark = None
+        self.model_refresh_task = None
+        self.interaction_log = InteractionLog(interaction_log_path) if interaction_log_path else None
+        self.shared_model_path = shared_model_path
+        self.retrain_interval = retrain_interval
+        self.model_manager = ModelManager(lambda: self.recommender, self._install_model,
+                                          None if shared_model_path else self._prepare_training)
+        self.retrain_scheduler = RetrainScheduler(self.model_manager, **retrain_policy) if retrain_policy else None
+    
+    async def initialize(self, interactions: List[Dict] = None, items_data: List[Dict] = None,
+                         seed_empty_only: bool = False):
         await self.db.initialize()
         await self.cache.connect()
+        if self.write_buffer:
+            self.write_buffer.start()
+        
+        restored = 0
+        if self.snapshot_path:
+            restored = await self.cache.load_snapshot(self.snapshot_path)
+        
+        if seed_empty_only and (items_data or interactions) and await self.db.get_all_items():
+            print("Database already populated, skipping seed data")
+            items_data, interactions = None, None
         
         if items_data:
-            for item in items_data:
-                await self.db.create_or_update_item(item)
+            report = await self.db.bulk_upsert_items(items_data)
+            print(f"Loaded {report['rows']} items ({report['rows_per_sec']} rows/sec)")
+        
+        if self.interaction_log:
+            await self._open_interaction_log()
         
         if interactions:
-            for interaction in interactions:
-                await self.db.record_interaction(
-                    interaction['user_id'],
-                    interaction['item_id'],
-                    interaction['rating']
-                )
+            report = await self.db.bulk_record_interactions(interactions)
+            print(f"Loaded {report['rows']} interactions ({report['rows_per_sec']} rows/sec)")
+            if self.interaction_log:
+                self.interaction_log.append_many(interactions)
+        
+        if self.shared_model_path:
+            await self.attach_shared_model(self.shared_model_path)
+        elif not await self._restore_model_from_checkpoint():
+            if not await self._train_from_interaction_log():
+                await self._load_and_train_from_database()
+        warm_start = restored > 0 and not items_data and not interactions
+        await self._precompute_popular_items(skip_cached=warm_start)
+        await self._precompute_item_similarities(skip_cached=warm_start)
+        
+        if self.snapshot_path:
+            self.cache.start_snapshots(self.snapshot_path, self.snapshot_interval)
+        if self.model_refresh_interval:
+            self.model_refresh_task = asyncio.create_task(self._model_refresh_loop(self.model_refresh_interval))
+        if self.retrain_interval and not self.shared_model_path:
+            self.model_manager.start_schedule(self.retrain_interval)
+        if self.retrain_scheduler and not self.shared_model_path:
+            self.retrain_scheduler.start()
+        
+        print("Persistent cached hybrid recommender initialized")
+    
+    async def retrain(self, reason: str = "manual") -> Dict:
+        return await asyncio.shield(self.model_manager.retrain(reason=reason))
+    
+    async def _prepare_training(self, chunk_size: int = 50000) -> TrainingPlan:
+        if self.write_buffer:
+            await self.write_buffer.flush()
+        
+        items_data = await self._get_items_data()
+        watermark = await self.db.get_interaction_watermark()
+        user_index, item_index = await self.db.get_interaction_vocabulary()
+        if not user_index or not items_data:
+            raise ValueError("No data found in database")
+        
+        recommender = HybridRecommender()
+        recommender.start_fit(user_index, item_index)
+        async for user_codes, item_codes, ratings in self.db.stream_interactions(user_index, item_index, chunk_size):
+            recommender.add_ratings(user_codes, item_codes, ratings)
+        
+        def build() -> HybridRecommender:
+            recommender.finish_fit(items_data)
+            return recommender
+        
+        return build, {"watermark": watermark}
+    
+    async def _install_model(self, recommender: HybridRecommender, context: Dict):
+        self.recommender = recommender
+        self.model_watermark = context["watermark"]
+        generation = self.cache.bump_generation()
         
-        await self._load_and_train_from_database()
         await self._precompute_popular_items()
         await self._precompute_item_similarities()
+        await self._save_model()
         
-        print("Persistent cached hybrid recommender initialized")
+        print(f"Swapped in retrained model, cache generation is now {generation}")
     
-    async def _load_and_train_from_database(self):
-        interactions = await self.db.get_all_interactions()
+    async def _get_items_data(self) -> List[Dict]:
         items_data = []
         
         all_items = await self.db.get_all_items()
@@ -45,76 +134,256 @@ class PersistentCachedHybridRecommender:
                 "brand": item["brand"],
                 "description": item["description"]
             })
-        
-        if interactions and items_data:
-            ml_interactions = [
-                {
-                    "user_id": interaction["user_id"],
-                    "item_id": interaction["item_id"],
-                    "rating": interaction["rating"]
-                }
-                for interaction in interactions
-            ]
+        return items_data
+    
+    async def _load_and_train_from_database(self, chunk_size: int = 50000):
+        items_data = await self._get_items_data()
+        watermark = await self.db.get_interaction_watermark()
+        user_index, item_index = await self.db.get_interaction_vocabulary()
+        
+        if user_index and items_data:
+            recommender = HybridRecommender()
+            recommender.start_fit(user_index, item_index)
             
-            self.recommender.fit(ml_interactions, items_data)
-            print(f"Trained models with {len(ml_interactions)} interactions and {len(items_data)} items")
+            total_interactions = 0
+            async for user_codes, item_codes, ratings in self.db.stream_interactions(
+                user_index, item_index, chunk_size
+            ):
+                recommender.add_ratings(user_codes, item_codes, ratings)
+                total_interactions += len(ratings)
+            
+            recommender.finish_fit(items_data)
+            self.recommender = recommender
+            self.model_watermark = watermark
+            print(f"Trained models with {total_interactions} interactions and {len(items_data)} items")
+            await self._save_model()
         else:
             print("No data found in database")
     
-    async def get_recommendations(self, user_id: str, num_recommendations: int = 5) -> Dict:
-        start_time = time.time()
-        
-        cached_recs = await self.cache.get_user_recommendations(user_id)
-        
-        if cached_recs:
-            self.performance_stats["cache_hits"] += 1
-            response_time = (time.time() - start_time) * 1000
-            
-            return {
-                "recommendations": cached_recs[:num_recommendations],
-                "user_id": user_id,
-                "source": "cache",
-                "response_time_ms": f"{response_time:.2f}",
-                "timestamp": time.time()
-            }
-        
-        self.performance_stats["cache_misses"] += 1
+    async def _open_interaction_log(self):
+        self.interaction_log.open()
+        if self.interaction_log.record_count == 0:
+            existing = await self.db.get_all_interactions()
+            self.interaction_log.append_many(existing)
+            if existing:
+                print(f"Backfilled interaction log with {len(existing)} interactions")
+    
+    async def _train_from_interaction_log(self) -> bool:
+        if not self.interaction_log or self.interaction_log.record_count == 0:
+            return False
         
-        user_interactions = await self.db.get_user_interactions(user_id, limit=50)
+        items_data = await self._get_items_data()
+        if not items_data:
+            return False
         
-        ml_interactions = [
-            {
-                "item_id": interaction["item_id"],
-                "rating": interaction["rating"]
+        start_time = time.time()
+        watermark = await self.db.get_interaction_watermark()
+        loop = asyncio.get_running_loop()
+        user_index, item_index, user_codes, item_codes, ratings = await loop.run_in_executor(
+            None, replay_log, self.interaction_log.path
+        )
+        if not user_index:
+            return False
+        
+        stored = await self.db.count_interactions()
+        if len(ratings) != stored:
+            print(f"Interaction log holds {len(ratings)} ratings but the database has {stored}, rebuilding the log")
+            self.interaction_log.discard()
+            await self._open_interaction_log()
+            return False
+        
+        recommender = HybridRecommender()
+        recommender.start_fit(user_index, item_index)
+        recommender.add_ratings(user_codes, item_codes, ratings)
+        recommender.finish_fit(items_data)
+        self.recommender = recommender
+        self.model_watermark = watermark
+        print(f"Rebuilt model from interaction log ({len(ratings)} ratings) in {time.time() - start_time:.2f}s")
+        
+        await self._save_model()
+        return True
+    
+    async def _restore_model_from_checkpoint(self) -> bool:
+        if not self.model_path:
+            return False
+        
+        loop = asyncio.get_running_loop()
+        try:
+            checkpoint = await loop.run_in_executor(None, load_model, self.model_path)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable model checkpoint {self.model_path}: {e}")
+            return False
+        
+        items_data = await self._get_items_data()
+        if checkpoint is None or not items_data:
+            return False
+        
+        collaborative, watermark = checkpoint
+        try:
+            content_based = await loop.run_in_executor(None, load_content_model, self.model_path, items_data)
+        except (OSError, ValueError) as e:
+            print(f"Refitting content model, checkpoint is unreadable: {e}")
+            content_based = None
+        
+        next_watermark = await self.db.get_interaction_watermark()
+        delta = [
+            row for row in await self.db.get_interactions_since(watermark)
+            if collaborative.get_rating(row["user_id"], row["item_id"]) != row["rating"]
+        ]
+        if delta:
+            collaborative.apply_ratings(
+                [row["user_id"] for row in delta],
+                [row["item_id"] for row in delta],
+                [row["rating"] for row in delta]
+            )
+        
+        recommender = HybridRecommender()
+        recommender.restore(collaborative, items_data, content_based)
+        self.recommender = recommender
+        self.model_watermark = next_watermark
+        print(f"Restored model from {self.model_path} with {len(delta)} interactions since its watermark")
+        
+        if delta or content_based is None:
+            await self._save_model()
+        return True
+    
+    async def attach_shared_model(self, path: str, retrained: bool = True) -> bool:
+        loop = asyncio.get_running_loop()
+        checkpoint = await loop.run_in_executor(None, load_model, path, "r")
+        items_data = await self._get_items_data()
+        if checkpoint is None or not items_data:
+            return False
+        
+        collaborative, watermark = checkpoint
+        content_based = await loop.run_in_executor(None, load_content_model, path, items_data, "r")
+        recommender = HybridRecommender()
+        recommender.restore(collaborative, items_data, content_based)
+        previous = self.recommender.collaborative
+        previously_trained = self.recommender.is_trained
+        previous_watermark = self.model_watermark
+        self.recommender = recommender
+        self.model_watermark = watermark
+        self.shared_model_path = path
+        self.model_manager.prepare = None
+        
+        if not previously_trained:
+            return True
+        if retrained or previous_watermark is None:
+            self.cache.bump_generation()
+            await self._precompute_item_similarities()
+        else:
+            changed_users = {
+                row["user_id"] for row in await self.db.get_interactions_since(previous_watermark)
+                if previous.get_rating(row["user_id"], row["item_id"]) != row["rating"]
             }
-            for interaction in user_interactions
+            for user_id in changed_users:
+                await self.cache.invalidate_user_cache(user_id)
+        await self._precompute_popular_items()
+        return True
+    
+    async def refresh_from_database(self) -> Dict:
+        if not self.recommender.is_trained or self.model_watermark is None:
+            await self._load_and_train_from_database()
+            return {"applied": None, "watermark": self.model_watermark}
+        
+        watermark = await self.db.get_interaction_watermark()
+        collaborative = self.recommender.collaborative
+        delta = [
+            row for row in await self.db.get_interactions_since(self.model_watermark)
+            if collaborative.get_rating(row["user_id"], row["item_id"]) != row["rating"]
         ]
-        
-        recommendations = self.recommender.get_recommendations(
-            user_id, ml_interactions, num_recommendations * 2
-        )
-        
-        await self.cache.set_user_recommendations(user_id, recommendations, ttl=300)
-        
-        response_time = (time.time() - start_time) * 1000
-        
-        return {
-            "recommendations": [
-                {"item": item, "score": score, "strategy": strategy}
-                for item, score, strategy in recommendations[:num_recommendations]
-            ],
-            "user_id": user_id,
-            "source": "computed",
-            "response_time_ms": f"{response_time:.2f}",
-            "timestamp": time.time()
-        }
+        if delta:
+            self.model_manager.observe_many(delta)
+            self.recommender.apply_ratings(delta)
+            for user_id in {row["user_id"] for row in delta}:
+                await self.cache.invalidate_user_cache(user_id)
+        
+        self.model_watermark = watermark
+        if delta:
+            await self._save_model()
+        return {"applied": len(delta), "watermark": watermark}
+    
+    async def _save_model(self):
+        if not self.model_path:
+            return
+        
+        async with self.model_save_lock:
+            collaborative = self.recommender.collaborative
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                None, save_model, self.model_path, dict(collaborative.users), dict(collaborative.items),
+                collaborative.user_item_matrix.copy(), collaborative.user_similarity.copy(), self.model_watermark,
+                self.recommender.content_based
+            )
+    
+    async def _model_refresh_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                result = await self.refresh_from_database()
+                if result["applied"]:
+                    print(f"Applied {result['applied']} new interactions to the model")
+            except Exception as e:
+                print(f"Model refresh failed: {e}")
+    
+    async def _get_model_interactions(self, user_id: str, attempts: int = 3) -> List[Dict]:
+        for _ in range(attempts):
+            if self.cache.interactions.contains(user_id):
+                return self.cache.interactions.get_interactions(user_id)
+            
+            version = self.cache.user_version(user_id)[1]
+            with stage_timer("db_fetch"):
+                user_interactions = await self.db.get_user_interactions(
+                    user_id, limit=self.cache.interactions.capacity
+                )
+            if self.cache.user_version(user_id)[1] != version:
+                continue
+            
+            self.cache.interactions.load(user_id, [
+                (interaction["item_id"], interaction["rating"], self._to_timestamp(interaction["timestamp"]))
+                for interaction in reversed(user_interactions)
+            ])
+            if self.write_buffer:
+                for pending in self.write_buffer.pending_for(user_id):
+                    self.cache.interactions.append(user_id, pending["item_id"], pending["rating"])
+            return self.cache.interactions.get_interactions(user_id)
+        
+        latest = {}
+        for interaction in reversed(user_interactions):
+            latest[interaction["item_id"]] = (interaction["rating"], self._to_timestamp(interaction["timestamp"]))
+        if self.write_buffer:
+            for pending in self.write_buffer.pending_for(user_id):
+                latest[pending["item_id"]] = (pending["rating"], time.time())
+        return [{"item_id": item_id, "rating": rating, "timestamp": timestamp}
+                for item_id, (rating, timestamp) in latest.items()]
     
-    async def record_user_interaction(self, user_id: str, item_id: str, rating: float):
+    @staticmethod
+    def _to_timestamp(value) -> float:
+        if isinstance(value, (int, float)):
+            return float(value)
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc).timestamp()
+    
+    async def record_user_interaction(self, user_id: str, item_id: str, rating: float,
+                                      wait_durable: bool = True):
         start_time = time.time()
         
-        await self.db.record_interaction(user_id, item_id, rating)
-        await self.cache.update_user_interaction(user_id, item_id, rating)
-        self.recommender.update_user_interaction(user_id, item_id, rating)
+        if self.write_buffer:
+            persisted = await self.write_buffer.record(user_id, item_id, rating, wait_durable)
+            if self.interaction_log and persisted.done():
+                self._log_persisted(persisted, user_id, item_id, rating)
+            elif self.interaction_log:
+                persisted.add_done_callback(lambda future: self._log_persisted(future, user_id, item_id, rating))
+        else:
+            await self.db.record_interaction(user_id, item_id, rating)
+            if self.interaction_log:
+                self.interaction_log.append(user_id, item_id, rating)
+        if self.cache.interactions.contains(user_id):
+            await self.cache.update_user_interaction(user_id, item_id, rating)
+        else:
+            await self.cache.invalidate_user_cache(user_id)
+        if not self.shared_model_path:
+            self.recommender.update_user_interaction(user_id, item_id, rating)
+            self.model_manager.observe(user_id, item_id, rating)
         
         response_time = (time.time() - start_time) * 1000
         
@@ -124,36 +393,46 @@ class PersistentCachedHybridRecommender:
             "rating": rating,
             "status": "recorded",
             "cache_invalidated": True,
-            "persisted": True,
+            "persisted": wait_durable or self.write_buffer is None,
             "response_time_ms": f"{response_time:.2f}"
         }
     
-    async def get_similar_items(self, item_id: str, num_similar: int = 5) -> Dict:
+    def _log_persisted(self, future: asyncio.Future, user_id: str, item_id: str, rating: float):
+        if self.interaction_log and self.interaction_log.records_file and not future.cancelled() \
+                and future.exception() is None:
+            self.interaction_log.append(user_id, item_id, rating)
+    
+    async def record_user_interactions(self, interactions: List[Dict]) -> Dict:
         start_time = time.time()
         
-        cached_similar = await self.cache.get_item_similarity(item_id)
-        
-        if cached_similar:
-            response_time = (time.time() - start_time) * 1000
-            return {
-                "item_id": item_id,
-                "similar_items": cached_similar[:num_similar],
-                "source": "cache",
-                "response_time_ms": f"{response_time:.2f}"
-            }
-        
-        similar_items = self.recommender.content_based.get_similar_items(item_id, num_similar * 2)
-        await self.cache.set_item_similarity(item_id, similar_items, ttl=86400)
+        errors = []
+        record_many = self.write_buffer.record_many if self.write_buffer else self.db.bulk_record_interactions
+        try:
+            await record_many(interactions)
+            recorded = interactions
+        except Exception:
+            recorded = []
+            for index, interaction in enumerate(interactions):
+                try:
+                    await record_many([interaction])
+                    recorded.append(interaction)
+                except Exception as e:
+                    errors.append({"index": index, "error": str(e)})
+        
+        if self.interaction_log:
+            self.interaction_log.append_many(recorded)
+        await self.cache.update_user_interactions(recorded, tracked_only=True)
+        model_updates = 0
+        if not self.shared_model_path:
+            model_updates = self.recommender.update_user_interactions(recorded)
+            self.model_manager.observe_many(recorded)
         
         response_time = (time.time() - start_time) * 1000
         
         return {
-            "item_id": item_id,
-            "similar_items": [
-                {"item": item, "score": score}
-                for item, score in similar_items[:num_similar]
-            ],
-            "source": "computed",
+            "recorded": len(recorded),
+            "model_updates": model_updates,
+            "errors": errors,
             "response_time_ms": f"{response_time:.2f}"
         }
     
@@ -171,7 +450,8 @@ class PersistentCachedHybridRecommender:
                 "response_time_ms": f"{response_time:.2f}"
             }
         
-        items = await self.db.get_all_items()
+        with stage_timer("db_fetch"):
+            items = await self.db.get_all_items()
         
         if category != "all":
             items = [item for item in items if item["category"] == category]
@@ -196,7 +476,10 @@ class PersistentCachedHybridRecommender:
             "response_time_ms": f"{response_time:.2f}"
         }
     
-    async def _precompute_popular_items(self):
+    async def _precompute_popular_items(self, skip_cached: bool = False):
+        if skip_cached and self.cache.has_popular_items("all"):
+            return
+        
         items = await self.db.get_all_items()
         categories = set(item["category"] for item in items)
         
@@ -216,11 +499,13 @@ class PersistentCachedHybridRecommender:
         all_popular.sort(key=lambda x: x[1], reverse=True)
         await self.cache.set_popular_items("all", all_popular, ttl=3600)
     
-    async def _precompute_item_similarities(self):
+    async def _precompute_item_similarities(self, skip_cached: bool = False):
         items = await self.db.get_all_items()
         
         for item in items:
             item_id = item["item_id"]
+            if skip_cached and self.cache.has_item_similarity(item_id):
+                continue
             if hasattr(self.recommender.content_based, 'items') and item_id in self.recommender.content_based.items:
                 similar_items = self.recommender.content_based.get_similar_items(item_id, 10)
                 await self.cache.set_item_similarity(item_id, similar_items, ttl=86400)
@@ -234,9 +519,25 @@ class PersistentCachedHybridRecommender:
             "cache_hit_rate": cache_stats["hit_rate"],
             "cache_performance": cache_stats,
             "system_performance": self.performance_stats,
-            "database_connected": self.db.connection is not None
+            "database_connected": self.db.connection is not None,
+            "shared_model": self.shared_model_path,
+            "model_manager": self.model_manager.get_stats(),
+            "retrain_scheduler": self.retrain_scheduler.get_stats() if self.retrain_scheduler else None,
+            "write_behind": self.write_buffer.get_stats() if self.write_buffer else None
         }
     
     async def close(self):
+        self._cancel_background_tasks()
+        if self.model_refresh_task:
+            self.model_refresh_task.cancel()
+            self.model_refresh_task = None
+        if self.retrain_scheduler:
+            await self.retrain_scheduler.close()
+        await self.model_manager.close()
+        if self.write_buffer:
+            await self.write_buffer.close()
+            await asyncio.sleep(0)
         await self.cache.close()
+        if self.interaction_log:
+            self.interaction_log.close()
         await self.db.close()
\ No newline at end of file
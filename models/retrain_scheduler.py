@@ -0,0 +1,112 @@
+import asyncio
+import time
+from typing import Dict, List
+from .model_manager import ModelManager
+
+class RetrainScheduler:
+    def __init__(self, manager: ModelManager, min_interactions: int = 10000, min_new_users: int = 100,
+                 min_new_items: int = 50, max_fallback_ratio: float = 0.2, min_scored_requests: int = 500,
+                 min_interval: float = 600.0, check_interval: float = 10.0, cpu_budget: float = 0.5,
+                 max_deferral: float = 3600.0):
+        self.manager = manager
+        self.min_interactions = min_interactions
+        self.min_new_users = min_new_users
+        self.min_new_items = min_new_items
+        self.max_fallback_ratio = max_fallback_ratio
+        self.min_scored_requests = min_scored_requests
+        self.min_interval = min_interval
+        self.check_interval = check_interval
+        self.cpu_budget = cpu_budget
+        self.max_deferral = max_deferral
+        self.last_fit = time.time()
+        self.last_check = time.monotonic()
+        self.last_cpu = time.process_time()
+        self.deferred_since = None
+        self.last_decision = None
+        self.task = None
+        self.stats = {"checks": 0, "triggered": 0, "rate_limited": 0, "deferred": 0}
+    
+    def drift_reasons(self, drift: Dict) -> List[str]:
+        reasons = []
+        if drift["interactions"] >= self.min_interactions:
+            reasons.append("interactions")
+        if drift["new_users"] >= self.min_new_users:
+            reasons.append("new_users")
+        if drift["new_items"] >= self.min_new_items:
+            reasons.append("new_items")
+        if drift["scored_requests"] >= self.min_scored_requests and drift["fallback_ratio"] > self.max_fallback_ratio:
+            reasons.append("fallback_ratio")
+        return reasons
+    
+    def _cpu_usage(self) -> float:
+        now, cpu = time.monotonic(), time.process_time()
+        usage = (cpu - self.last_cpu) / max(now - self.last_check, 1e-6)
+        self.last_check, self.last_cpu = now, cpu
+        return usage
+    
+    def evaluate(self) -> Dict:
+        self.stats["checks"] += 1
+        cpu_usage = self._cpu_usage()
+        drift = self.manager.get_drift()
+        reasons = self.drift_reasons(drift)
+        decision = {"action": "idle", "reasons": reasons, "cpu_usage": round(cpu_usage, 3), "drift": drift}
+        
+        if self.manager.last_result is not None:
+            self.last_fit = max(self.last_fit, self.manager.last_result["started_at"])
+        now = time.time()
+        
+        if self.manager.retraining:
+            decision["action"] = "running"
+        elif not reasons:
+            self.deferred_since = None
+        elif now - self.last_fit < self.min_interval:
+            decision["action"] = "rate_limited"
+            self.stats["rate_limited"] += 1
+        elif cpu_usage > self.cpu_budget and (self.deferred_since is None or
+                                              now - self.deferred_since < self.max_deferral):
+            decision["action"] = "deferred"
+            self.stats["deferred"] += 1
+            if self.deferred_since is None:
+                self.deferred_since = now
+        else:
+            self.manager.retrain(reason=f"drift:{','.join(reasons)}")
+            decision["action"] = "retrain"
+            self.stats["triggered"] += 1
+            self.last_fit = now
+            self.deferred_since = None
+        
+        self.last_decision = decision
+        return decision
+    
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                decision = self.evaluate()
+                if decision["action"] == "retrain":
+                    print(f"Drift retrain started ({', '.join(decision['reasons'])})")
+            except Exception as e:
+                print(f"Retrain scheduler check failed: {e}")
+    
+    def start(self):
+        self.last_check, self.last_cpu = time.monotonic(), time.process_time()
+        self.task = asyncio.create_task(self._run())
+    
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            "thresholds": {
+                "min_interactions": self.min_interactions,
+                "min_new_users": self.min_new_users,
+                "min_new_items": self.min_new_items,
+                "max_fallback_ratio": self.max_fallback_ratio,
+                "min_interval": self.min_interval,
+                "cpu_budget": self.cpu_budget
+            },
+            "last_decision": self.last_decision
+        }
+    
+    async def close(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
\ No newline at end of file
@@ -0,0 +1,173 @@
+import bisect
+import threading
+import time
+from typing import Dict, Tuple
+from monitoring.tracing import span
+
+DEFAULT_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+REQUEST_DURATION = "http_request_duration_seconds"
+REQUESTS_TOTAL = "http_requests_total"
+STAGE_DURATION = "recommendation_stage_duration_seconds"
+INF_LABEL = 'le="+Inf"'
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count", "lock")
+    
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+    
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+    
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return 0.0
+        
+        target = q * self.count
+        cumulative = 0
+        lower = 0.0
+        for index, upper in enumerate(self.buckets):
+            in_bucket = self.counts[index]
+            if in_bucket and cumulative + in_bucket >= target:
+                return lower + (upper - lower) * (target - cumulative) / in_bucket
+            cumulative += in_bucket
+            lower = upper
+        return self.buckets[-1]
+
+class Timer:
+    __slots__ = ("histogram", "start")
+    
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+class StageTimer(Timer):
+    __slots__ = ("span",)
+    
+    def __init__(self, histogram: Histogram, stage_span):
+        self.histogram = histogram
+        self.span = stage_span
+    
+    def __enter__(self):
+        self.span.__enter__()
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start)
+        self.span.__exit__(*exc_info)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: str = None) -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class MetricsRegistry:
+    def __init__(self):
+        self.histograms: Dict[str, Dict[Tuple, Histogram]] = {}
+        self.counters: Dict[str, Dict[Tuple, float]] = {}
+        self.stage_histograms: Dict[str, Histogram] = {}
+        self.descriptions = {
+            REQUEST_DURATION: "Time spent handling HTTP requests",
+            REQUESTS_TOTAL: "HTTP requests handled",
+            STAGE_DURATION: "Time spent in each stage of serving recommendations"
+        }
+        self.lock = threading.Lock()
+    
+    def histogram(self, name: str, **labels) -> Histogram:
+        key = tuple(sorted(labels.items()))
+        series = self.histograms.get(name)
+        if series is None:
+            series = self.histograms.setdefault(name, {})
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series.setdefault(key, Histogram())
+        return histogram
+    
+    def observe(self, name: str, value: float, **labels):
+        self.histogram(name, **labels).observe(value)
+    
+    def time(self, name: str, **labels) -> Timer:
+        return Timer(self.histogram(name, **labels))
+    
+    def increment(self, name: str, amount: float = 1.0, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+    
+    def describe(self, name: str, description: str):
+        self.descriptions[name] = description
+    
+    def clear(self):
+        self.histograms.clear()
+        self.counters.clear()
+        self.stage_histograms.clear()
+    
+    def render(self) -> str:
+        lines = []
+        for name, series in sorted(self.counters.items()):
+            lines.append(f"# HELP {name} {self.descriptions.get(name, name)}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in sorted(series.items()):
+                lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        
+        for name, series in sorted(self.histograms.items()):
+            lines.append(f"# HELP {name} {self.descriptions.get(name, name)}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in sorted(series.items()):
+                with histogram.lock:
+                    counts = list(histogram.counts)
+                    total = histogram.sum
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, counts):
+                    cumulative += count
+                    bucket_labels = _format_labels(labels, f'le="{float(bound)!r}"')
+                    lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                cumulative += counts[-1]
+                lines.append(f"{name}_bucket{_format_labels(labels, INF_LABEL)} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {total!r}")
+                lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+    
+    def get_stats(self) -> Dict:
+        return {
+            name: {
+                ",".join(f"{label}={value}" for label, value in labels) or "all": {
+                    "count": histogram.count,
+                    "avg_ms": f"{histogram.sum / histogram.count * 1000:.2f}" if histogram.count else "0.00",
+                    "p50_ms": f"{histogram.quantile(0.5) * 1000:.2f}",
+                    "p99_ms": f"{histogram.quantile(0.99) * 1000:.2f}"
+                }
+                for labels, histogram in sorted(series.items())
+            }
+            for name, series in sorted(self.histograms.items())
+        }
+
+REGISTRY = MetricsRegistry()
+
+def stage_timer(stage: str) -> StageTimer:
+    histogram = REGISTRY.stage_histograms.get(stage)
+    if histogram is None:
+        histogram = REGISTRY.stage_histograms.setdefault(stage, REGISTRY.histogram(STAGE_DURATION, stage=stage))
+    return StageTimer(histogram, span(stage))
\ No newline at end of file
@@ -0,0 +1,207 @@
+import contextvars
+import itertools
+import random
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+class NoopSpan:
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+    
+    def set_attribute(self, key: str, value):
+        pass
+
+NOOP_SPAN = NoopSpan()
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "attributes", "start", "end", "error", "token")
+    
+    def __init__(self, trace: "Trace", name: str, attributes: Dict):
+        self.trace = trace
+        self.span_id = next(trace.span_ids)
+        self.parent_id = None
+        self.name = name
+        self.attributes = attributes
+        self.start = 0.0
+        self.end = 0.0
+        self.error = None
+        self.token = None
+    
+    def __enter__(self):
+        self.parent_id = _current_span.get()
+        self.token = _current_span.set(self.span_id)
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback):
+        self.end = time.perf_counter()
+        _current_span.reset(self.token)
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        self.trace.add(self)
+        return False
+    
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+    
+    def to_dict(self, origin: float) -> Dict:
+        span = {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round((self.end - self.start) * 1000, 3)
+        }
+        if self.attributes:
+            span["attributes"] = self.attributes
+        if self.error:
+            span["error"] = self.error
+        return span
+
+class Trace:
+    __slots__ = ("trace_id", "name", "attributes", "started_at", "start", "end", "spans", "span_ids",
+                 "max_spans", "dropped_spans", "closed", "token")
+    
+    def __init__(self, trace_id: str, name: str, attributes: Dict, max_spans: int):
+        self.trace_id = trace_id
+        self.name = name
+        self.attributes = attributes
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.end = None
+        self.spans: List[Span] = []
+        self.span_ids = itertools.count(1)
+        self.max_spans = max_spans
+        self.dropped_spans = 0
+        self.closed = False
+        self.token = None
+    
+    def add(self, span: Span):
+        if self.closed:
+            return
+        if len(self.spans) >= self.max_spans:
+            self.dropped_spans += 1
+            return
+        self.spans.append(span)
+    
+    @property
+    def duration_ms(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000
+    
+    def stage_breakdown(self) -> Dict[str, Dict]:
+        stages = {}
+        for span in self.spans:
+            stage = stages.setdefault(span.name, {"count": 0, "total_ms": 0.0})
+            stage["count"] += 1
+            stage["total_ms"] += (span.end - span.start) * 1000
+        for stage in stages.values():
+            stage["total_ms"] = round(stage["total_ms"], 3)
+        return dict(sorted(stages.items(), key=lambda item: item[1]["total_ms"], reverse=True))
+    
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "attributes": self.attributes,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 3),
+            "stages": self.stage_breakdown(),
+            "spans": [span.to_dict(self.start) for span in sorted(self.spans, key=lambda span: span.start)],
+            "dropped_spans": self.dropped_spans
+        }
+
+class Tracer:
+    enabled = False
+    
+    def span(self, name: str, attributes: Dict) -> NoopSpan:
+        return NOOP_SPAN
+    
+    def start_trace(self, name: str, **attributes) -> Optional[Trace]:
+        return None
+    
+    def finish_trace(self, trace: Optional[Trace], **attributes) -> bool:
+        return False
+    
+    def get_traces(self, kind: str = "all", limit: int = 20) -> Dict:
+        return {"enabled": False, "slow": [], "sampled": []}
+    
+    def get_stats(self) -> Dict:
+        return {"enabled": False}
+
+class RecordingTracer(Tracer):
+    enabled = True
+    
+    def __init__(self, capacity: int = 100, slow_threshold_ms: float = 100.0, sample_rate: float = 0.01,
+                 max_spans: int = 256):
+        self.slow_threshold_ms = slow_threshold_ms
+        self.sample_rate = sample_rate
+        self.max_spans = max_spans
+        self.slow = deque(maxlen=capacity)
+        self.sampled = deque(maxlen=capacity)
+        self.trace_ids = itertools.count(1)
+        self.random = random.Random()
+        self.stats = {"traces": 0, "slow_traces": 0, "sampled_traces": 0}
+    
+    def span(self, name: str, attributes: Dict):
+        trace = _current_trace.get()
+        if trace is None:
+            return NOOP_SPAN
+        return Span(trace, name, attributes)
+    
+    def start_trace(self, name: str, **attributes) -> Trace:
+        trace = Trace(f"{next(self.trace_ids):x}", name, attributes, self.max_spans)
+        trace.token = _current_trace.set(trace)
+        return trace
+    
+    def finish_trace(self, trace: Optional[Trace], **attributes) -> bool:
+        if trace is None:
+            return False
+        
+        trace.end = time.perf_counter()
+        trace.closed = True
+        trace.attributes.update(attributes)
+        _current_trace.reset(trace.token)
+        trace.token = None
+        self.stats["traces"] += 1
+        
+        if trace.duration_ms >= self.slow_threshold_ms:
+            self.slow.append(trace)
+            self.stats["slow_traces"] += 1
+            return True
+        if self.random.random() < self.sample_rate:
+            self.sampled.append(trace)
+            self.stats["sampled_traces"] += 1
+            return True
+        return False
+    
+    def get_traces(self, kind: str = "all", limit: int = 20) -> Dict:
+        traces = {"enabled": True, "slow_threshold_ms": self.slow_threshold_ms, "sample_rate": self.sample_rate}
+        for name, buffer in (("slow", self.slow), ("sampled", self.sampled)):
+            selected = list(buffer)[-limit:] if kind in ("all", name) and limit > 0 else []
+            traces[name] = [trace.to_dict() for trace in reversed(selected)]
+        return traces
+    
+    def get_stats(self) -> Dict:
+        return {**self.stats, "enabled": True, "buffered_slow": len(self.slow), "buffered_sampled": len(self.sampled)}
+
+_tracer: Tracer = Tracer()
+
+def set_tracer(tracer: Optional[Tracer]):
+    global _tracer
+    _tracer = tracer or Tracer()
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+def span(name: str, **attributes):
+    return _tracer.span(name, attributes)
\ No newline at end of file
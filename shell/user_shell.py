@@ -4,10 +4,16 @@ import aiohttp
 from typing import Dict, List, Optional
 
 class RecommendationShell:
-    def __init__(self, api_url: str = "http://localhost:8000"):
+    def __init__(self, api_url: str = "http://localhost:8000", live_updates: bool = False):
         self.api_url = api_url
         self.current_user = None
         self.session = None
+        self.live_updates = live_updates
+        self.live_user = None
+        self.live_task = None
+        self.live_ready = asyncio.Event()
+        self.live_event = asyncio.Event()
+        self.latest_push = None
         self.items_catalog = {
             "iphone": {"name": "iPhone 15", "category": "electronics", "price": "$999"},
             "macbook": {"name": "MacBook Pro", "category": "electronics", "price": "$1999"},
@@ -43,6 +49,8 @@ class RecommendationShell:
             except EOFError:
                 break
         
+        if self.live_task:
+            self.live_task.cancel()
         await self.session.close()
     
     async def _check_server_connection(self):
@@ -115,7 +123,44 @@ class RecommendationShell:
         print(f"\nGetting {self.current_user}'s recommendation profile...")
         await self._get_recommendations_preview()
     
+    def _ensure_live_updates(self):
+        if not self.live_updates or self.live_user == self.current_user:
+            return
+        
+        if self.live_task:
+            self.live_task.cancel()
+        self.live_user = self.current_user
+        self.live_ready.clear()
+        self.live_task = asyncio.create_task(self._follow_live_updates(self.current_user))
+    
+    async def _follow_live_updates(self, user_id: str):
+        url = f"{self.api_url}/recommendations/{user_id}/stream?count=3"
+        try:
+            async with self.session.get(url, timeout=aiohttp.ClientTimeout(total=None)) as resp:
+                data_lines = []
+                async for raw_line in resp.content:
+                    line = raw_line.decode("utf-8").rstrip("\r\n")
+                    if line.startswith("data:"):
+                        data_lines.append(line[5:].strip())
+                    elif not line and data_lines:
+                        self.latest_push = json.loads("\n".join(data_lines))
+                        data_lines = []
+                        self.live_ready.set()
+                        self.live_event.set()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Live updates stopped: {e}")
+    
+    async def _wait_for_live_update(self, timeout: float = 2.0) -> Optional[Dict]:
+        try:
+            await asyncio.wait_for(self.live_event.wait(), timeout)
+            return self.latest_push
+        except asyncio.TimeoutError:
+            return None
+    
     async def _main_menu(self):
+        self._ensure_live_updates()
         print(f"\n" + "=" * 50)
         print(f"RECOMMENDATION ENGINE - User: {self.current_user}")
         print("=" * 50)
@@ -159,7 +204,7 @@ class RecommendationShell:
             async with self.session.get(f"{self.api_url}/recommendations/{self.current_user}?count={count}") as resp:
                 if resp.status == 200:
                     data = await resp.json()
-                    await self._display_recommendations(data)
+                    await self._display_recommendations(data, resp.headers)
                 else:
                     print(f"Error: {resp.status}")
         except Exception as e:
@@ -172,11 +217,11 @@ class RecommendationShell:
                     data = await resp.json()
                     recs = data['recommendations']
                     print(f"Top recommendations: {', '.join([r['item'] for r in recs])}")
-                    print(f"Source: {data['source']} | Response time: {data['api_response_time_ms']}ms")
+                    print(f"Source: {resp.headers.get('X-Source')} | Response time: {resp.headers.get('X-Response-Time-Ms')}ms")
         except:
             print("Getting fresh recommendations...")
     
-    async def _display_recommendations(self, data):
+    async def _display_recommendations(self, data, headers):
         print(f"\nRECOMMENDATIONS FOR {self.current_user.upper()}")
         print("-" * 50)
         
@@ -187,7 +232,7 @@ class RecommendationShell:
             print(f"   Category: {item_info['category']} | Price: {item_info['price']}")
             print()
         
-        print(f"Source: {data['source']} | Response time: {data['api_response_time_ms']}ms")
+        print(f"Source: {headers.get('X-Source')} | Response time: {headers.get('X-Response-Time-Ms')}ms")
         
         action = input("\nWould you like to rate any of these items? (y/n): ").lower()
         if action == 'y':
@@ -232,11 +277,24 @@ class RecommendationShell:
                     "rating": int(rating)
                 }
                 
+                if self.live_task:
+                    try:
+                        await asyncio.wait_for(self.live_ready.wait(), 2.0)
+                    except asyncio.TimeoutError:
+                        pass
+                    self.live_event.clear()
+                
                 async with self.session.post(f"{self.api_url}/interactions", json=payload) as resp:
                     if resp.status == 200:
                         data = await resp.json()
                         print(f"Rating recorded! Response time: {data['api_response_time_ms']}ms")
-                        print("Your recommendations have been updated in real-time!")
+                        update = await self._wait_for_live_update() if self.live_task else None
+                        if update:
+                            items = [self.items_catalog.get(r['item'], {"name": r['item']})['name']
+                                     for r in update['recommendations']]
+                            print(f"Updated recommendations (pushed): {', '.join(items)}")
+                        else:
+                            print("Your recommendations have been updated in real-time!")
                     else:
                         print(f"Error recording rating: {resp.status}")
             except Exception as e:
@@ -268,7 +326,7 @@ class RecommendationShell:
                         print(f"{i}. {item_info['name']} - {item_info['price']}")
                         print(f"   Popularity score: {item['score']:.2f}")
                     
-                    print(f"\nSource: {data['source']} | Response time: {data['api_response_time_ms']}ms")
+                    print(f"\nSource: {resp.headers.get('X-Source')} | Response time: {resp.headers.get('X-Response-Time-Ms')}ms")
         except Exception as e:
             print(f"Error: {e}")
     
@@ -296,7 +354,7 @@ class RecommendationShell:
                             print(f"{i}. {similar_info['name']} - {similar_info['price']}")
                             print(f"   Similarity: {item['score']:.3f}")
                         
-                        print(f"\nSource: {data['source']} | Response time: {data['api_response_time_ms']}ms")
+                        print(f"\nSource: {resp.headers.get('X-Source')} | Response time: {resp.headers.get('X-Response-Time-Ms')}ms")
             except Exception as e:
                 print(f"Error: {e}")
         else:
@@ -0,0 +1,109 @@
+import asyncio
+import os
+import tempfile
+from aiohttp.test_utils import TestClient, TestServer
+from api.admission_control import AdmissionController, AdmissionRejected
+from api.recommendation_server import RecommendationAPI
+from models.persistent_cached_hybrid_recommender import PersistentCachedHybridRecommender
+
+async def _hold(controller: AdmissionController, endpoint: str, release: asyncio.Event, order: list):
+    try:
+        async with controller.admit(endpoint):
+            order.append(endpoint)
+            await release.wait()
+    except AdmissionRejected as e:
+        order.append(f"{endpoint}:{e.reason}")
+
+async def test_admission_control():
+    print("Testing Admission Control")
+    print("=" * 40)
+    
+    print("\n1. Reads are admitted ahead of queued writes:")
+    controller = AdmissionController(max_concurrent=1, max_queue=2, queue_timeout_ms=1000)
+    release = asyncio.Event()
+    order = []
+    holder = asyncio.create_task(_hold(controller, "interactions", release, order))
+    await asyncio.sleep(0)
+    waiting = [asyncio.create_task(_hold(controller, endpoint, release, order))
+               for endpoint in ("interactions", "recommendations")]
+    await asyncio.sleep(0)
+    print(f"Queued: {controller.get_stats()['queued']}")
+    release.set()
+    await asyncio.gather(holder, *waiting)
+    print(f"Admission order: {order}")
+    assert order == ["interactions", "recommendations", "interactions"]
+    
+    print("\n2. A full queue sheds writes for reads, then rejects:")
+    release = asyncio.Event()
+    order = []
+    holder = asyncio.create_task(_hold(controller, "recommendations", release, order))
+    await asyncio.sleep(0)
+    tasks = [asyncio.create_task(_hold(controller, endpoint, release, order))
+             for endpoint in ("interactions", "interactions", "similar", "popular")]
+    await asyncio.sleep(0.01)
+    release.set()
+    await asyncio.gather(holder, *tasks)
+    print(f"Outcomes: {order}")
+    assert order.count("interactions:shed for higher-priority requests") == 2
+    assert order[-2:] == ["similar", "popular"]
+    
+    print("\n3. Queue deadline:")
+    controller = AdmissionController(max_concurrent=4, queue_timeout_ms=20, endpoint_limits={"batch": 1})
+    await controller.acquire("batch")
+    try:
+        await controller.acquire("batch")
+        assert False, "second batch request should time out"
+    except AdmissionRejected as e:
+        print(f"Rejected: {e}")
+    controller.release("batch")
+    print(f"Stats: {controller.get_stats()['endpoints']['batch']}")
+    
+    print("\n4. Overloaded API answers fast with 503 or a degraded answer:")
+    interactions = [
+        {"user_id": "alice", "item_id": "iphone", "rating": 5},
+        {"user_id": "alice", "item_id": "macbook", "rating": 4},
+        {"user_id": "bob", "item_id": "iphone", "rating": 5},
+        {"user_id": "bob", "item_id": "gaming_chair", "rating": 5},
+    ]
+    items_data = [
+        {"item_id": "iphone", "category": "electronics", "brand": "apple", "description": "smartphone mobile phone"},
+        {"item_id": "macbook", "category": "electronics", "brand": "apple", "description": "laptop computer"},
+        {"item_id": "gaming_chair", "category": "furniture", "brand": "dxracer", "description": "chair gaming seat"},
+    ]
+    with tempfile.TemporaryDirectory() as work_dir:
+        admission = AdmissionController(queue_timeout_ms=10,
+                                        endpoint_limits={"recommendations": 1, "interactions": 1})
+        api = RecommendationAPI(admission=admission)
+        api.recommender = PersistentCachedHybridRecommender(os.path.join(work_dir, "admission.db"))
+        await api.recommender.initialize(interactions, items_data)
+        client = TestClient(TestServer(api.app))
+        await client.start_server()
+        
+        try:
+            await admission.acquire("recommendations")
+            await admission.acquire("interactions")
+            
+            response = await client.get("/recommendations/alice?count=2")
+            data = await response.json()
+            print(f"Recommendations: {response.status} {response.headers['X-Source']} "
+                  f"{[r['item'] for r in data['recommendations']]}")
+            assert response.status == 200 and response.headers["X-Source"] == "degraded:popular"
+            
+            response = await client.post("/interactions", json={"user_id": "alice", "item_id": "iphone", "rating": 3})
+            print(f"Interaction: {response.status} Retry-After={response.headers.get('Retry-After')}")
+            assert response.status == 503
+            
+            admission.release("recommendations")
+            admission.release("interactions")
+            response = await client.get("/recommendations/alice?count=2")
+            print(f"After recovery: {response.headers['X-Source']}")
+            assert response.headers["X-Source"] != "degraded:popular"
+            
+            stats = await (await client.get("/stats")).json()
+            print(f"Admission stats: {stats['admission']['endpoints']}")
+        finally:
+            await client.close()
+            await api.close()
+
+if __name__ == "__main__":
+    asyncio.run(test_admission_control())
\ No newline at end of file
@@ -34,6 +34,7 @@ async def run_server():
     print("\nAPI Server is running! Try these commands in another terminal:")
     print("curl http://localhost:8000/health")
     print("curl http://localhost:8000/recommendations/alice")
+    print("curl -X POST http://localhost:8000/recommendations/batch -H 'Content-Type: application/json' -d '{\"users\": [\"alice\", {\"user_id\": \"bob\", \"count\": 3}], \"count\": 5}'")
     print("curl http://localhost:8000/similar/iphone")
     print("curl http://localhost:8000/popular?category=electronics")
     print("curl -X POST http://localhost:8000/interactions -H 'Content-Type: application/json' -d '{\"user_id\": \"alice\", \"item_id\": \"gaming_chair\", \"rating\": 5}'")
@@ -1,4 +1,6 @@
 import asyncio
+import os
+import tempfile
 import time
 from cache.memory_cache import MemoryCache
 
@@ -45,10 +47,35 @@ async def test_cache_system():
     cached_similar = await cache.get_item_similarity("iphone")
     print(f"Similar to iPhone: {cached_similar}")
     
-    print("\n6. Cache statistics:")
+    print("\n6. Testing stale-while-revalidate:")
+    await cache.set_user_recommendations("carol", user_recs, ttl=0, stale_ttl=300)
+    stale_recs = await cache.get_user_recommendations("carol")
+    print(f"Stale recs still served: {stale_recs is not None}")
+    print(f"Needs background refresh: {cache.should_refresh_user_recommendations('carol')}")
+    
+    version = cache.user_version("carol")
+    await cache.update_user_interaction("carol", "iphone", 5.0)
+    stored = await cache.set_user_recommendations("carol", user_recs, ttl=300, version=version)
+    print(f"Refresh started before new rating stored (should be False): {stored}")
+    
+    print("\n7. Testing generation bump (model retrain):")
+    await cache.set_user_recommendations("dave", user_recs, ttl=300)
+    cache.bump_generation()
+    print(f"Dave's recs after bump (should be None): {await cache.get_user_recommendations('dave')}")
+    
+    print("\n8. Cache statistics:")
     stats = cache.get_cache_stats()
     print(f"Cache stats: {stats}")
     
+    print("\n9. Testing snapshot round trip:")
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        snapshot_path = os.path.join(snapshot_dir, "test_cache_snapshot.cache")
+        saved = await cache.save_snapshot(snapshot_path)
+        restored_cache = MemoryCache()
+        restored = await restored_cache.load_snapshot(snapshot_path)
+    print(f"Saved {saved} entries, restored {restored}")
+    print(f"Similar to iPhone after restore: {await restored_cache.get_item_similarity('iphone')}")
+    
     await cache.close()
 
 if __name__ == "__main__":
@@ -72,7 +72,31 @@ async def test_performance_system():
     print(f"Response time: {popular_result['response_time_ms']}ms")
     print(f"Source: {popular_result['source']}")
     
-    print("\n8. Performance statistics:")
+    print("\n8. Batch request (mixed cache hits and misses):")
+    batch_result = await system.get_batch_recommendations([("alice", 5), ("bob", 3), ("carol", 5), ("newbie", 2)])
+    print(f"Response time: {batch_result['response_time_ms']}ms")
+    print(f"Cache hits: {batch_result['cache_hits']}, computed: {batch_result['computed']}")
+    for entry in batch_result['results']:
+        print(f"  {entry['user_id']} ({entry['source']}, {entry['response_time_ms']}ms): "
+              f"{[r['item'] for r in entry['recommendations']]}")
+        batch_items = [r['item'] for r in entry['recommendations']]
+        single = await system.get_recommendations(entry['user_id'], max(len(batch_items), 1))
+        assert [r['item'] for r in single['recommendations']][:len(batch_items)] == batch_items
+    
+    print("\n9. Batched interaction ingestion:")
+    ingest_result = await system.record_user_interactions([
+        {"user_id": "bob", "item_id": "macbook", "rating": 4.0},
+        {"user_id": "carol", "item_id": "gaming_chair", "rating": 2.0},
+        {"user_id": "newbie", "item_id": "iphone", "rating": 5.0},
+    ])
+    print(f"Recorded {ingest_result['recorded']} in {ingest_result['response_time_ms']}ms, "
+          f"model updates: {ingest_result['model_updates']}")
+    assert ingest_result['recorded'] == 3 and not ingest_result['errors']
+    bob_result = await system.get_recommendations("bob", 5)
+    print(f"Bob after ingestion ({bob_result['source']}): {[r['item'] for r in bob_result['recommendations']]}")
+    assert bob_result['source'] != 'cache'
+    
+    print("\n10. Performance statistics:")
     stats = system.get_performance_stats()
     print(f"Stats: {stats}")
     
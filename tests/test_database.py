@@ -1,5 +1,7 @@
 import asyncio
+import os
 import sys
+import tempfile
 sys.path.append('..')
 from database.database_manager import DatabaseManager
 
@@ -33,23 +35,31 @@ async def test_database():
         await db.record_interaction(user_id, item_id, rating)
     print(f"Recorded {len(interactions)} interactions")
     
-    print("\n3. Checking user information...")
+    print("\n3. Bulk loading interactions in one transaction...")
+    report = await db.bulk_record_interactions([
+        {"user_id": "carol", "item_id": "coffee_maker", "rating": 4.0},
+        {"user_id": "carol", "item_id": "macbook", "rating": 2.0},
+        {"user_id": "alice", "item_id": "coffee_maker", "rating": 3.0},
+    ])
+    print(f"Bulk load report: {report}")
+    
+    print("\n4. Checking user information...")
     alice_stats = await db.get_user_stats("alice")
     print(f"Alice stats: {alice_stats}")
     
     bob_stats = await db.get_user_stats("bob")
     print(f"Bob stats: {bob_stats}")
     
-    print("\n4. Getting user interactions...")
+    print("\n5. Getting user interactions...")
     alice_interactions = await db.get_user_interactions("alice")
     print(f"Alice's interactions: {alice_interactions}")
     
-    print("\n5. Getting all items...")
+    print("\n6. Getting all items...")
     all_items = await db.get_all_items()
     for item in all_items:
         print(f"  {item['item_id']}: {item['current_avg_rating']:.1f}/5 ({item['current_rating_count']} ratings)")
     
-    print("\n6. Getting all interactions for ML...")
+    print("\n7. Getting all interactions for ML...")
     all_interactions = await db.get_all_interactions()
     print(f"Total interactions for ML: {len(all_interactions)}")
     
@@ -57,5 +67,100 @@ async def test_database():
     print("\nDatabase test completed!")
     print(f"Database saved as: test_recommendations.db")
 
+async def expected_item_aggregates(db):
+    cursor = await db.connection.execute("""
+        SELECT i.item_id, COALESCE(AVG(ui.rating), 0.0), COUNT(ui.id)
+        FROM items i LEFT JOIN user_interactions ui ON ui.item_id = i.item_id
+        GROUP BY i.item_id
+    """)
+    return {item_id: (avg, count) for item_id, avg, count in await cursor.fetchall()}
+
+async def assert_aggregates_match(db, label):
+    expected = await expected_item_aggregates(db)
+    actual = {
+        item["item_id"]: (item["current_avg_rating"], item["current_rating_count"])
+        for item in await db.get_all_items()
+    }
+    
+    assert actual.keys() == expected.keys()
+    for item_id, (avg, count) in expected.items():
+        assert actual[item_id][1] == count, (label, item_id, actual[item_id], avg, count)
+        assert abs(actual[item_id][0] - avg) < 1e-9, (label, item_id, actual[item_id], avg, count)
+    print(f"  {label}: {actual}")
+
+async def test_item_rating_aggregates():
+    print("Testing Incremental Item Aggregates")
+    print("=" * 40)
+    
+    with tempfile.TemporaryDirectory() as db_dir:
+        db_path = os.path.join(db_dir, "test_aggregates.db")
+        db = DatabaseManager(db_path)
+        await db.initialize()
+        
+        await db.bulk_upsert_items([
+            {"item_id": "iphone", "category": "electronics", "brand": "apple", "description": "smartphone"},
+            {"item_id": "macbook", "category": "electronics", "brand": "apple", "description": "laptop"},
+        ])
+        await db.record_interaction("alice", "iphone", 5.0)
+        await db.record_interaction("bob", "iphone", 3.0)
+        await db.record_interaction("alice", "macbook", 4.0)
+        await assert_aggregates_match(db, "after inserts")
+        
+        await db.record_interaction("bob", "iphone", 1.0)
+        await db.record_interaction("alice", "macbook", 4.0)
+        await assert_aggregates_match(db, "after re-rating")
+        
+        await db.connection.execute("DELETE FROM user_interactions WHERE user_id = 'alice'")
+        await db.connection.commit()
+        await assert_aggregates_match(db, "after delete")
+        
+        await db.record_interaction("carol", "airpods", 4.0)
+        await db.record_interaction("dave", "airpods", 2.0)
+        await db.create_or_update_item(
+            {"item_id": "airpods", "category": "electronics", "brand": "apple", "description": "headphones"}
+        )
+        await assert_aggregates_match(db, "item inserted after its ratings")
+        
+        await db.connection.executescript("""
+            DROP TRIGGER trg_item_rating_insert;
+            DROP TRIGGER trg_item_rating_update;
+            DROP TRIGGER trg_item_rating_delete;
+            DROP TRIGGER trg_item_rating_backfill;
+            UPDATE items SET average_rating = 0.0, total_ratings = 0;
+            PRAGMA user_version = 0;
+        """)
+        await db.close()
+        
+        db = DatabaseManager(db_path)
+        await db.initialize()
+        await assert_aggregates_match(db, "baseline database backfilled")
+        await db.close()
+
+async def test_read_pool_during_write():
+    print("Testing WAL Read Pool")
+    print("=" * 40)
+    
+    with tempfile.TemporaryDirectory() as db_dir:
+        db = DatabaseManager(os.path.join(db_dir, "test_read_pool.db"), read_pool_size=2)
+        await db.initialize()
+        await db.record_interaction("alice", "iphone", 5.0)
+        
+        print("\n1. Readers see committed rows while a writer holds the lock:")
+        async with db._writer("hold_write_lock") as connection:
+            await connection.execute(
+                "INSERT INTO user_interactions (user_id, item_id, rating) VALUES ('alice', 'macbook', 4.0)"
+            )
+            alice_interactions = await asyncio.wait_for(db.get_user_interactions("alice"), 5)
+            print(f"Alice's interactions mid-write: {alice_interactions}")
+            assert [interaction["item_id"] for interaction in alice_interactions] == ["iphone"]
+            await connection.commit()
+        
+        print("\n2. The write is visible to readers once committed:")
+        alice_interactions = await db.get_user_interactions("alice")
+        assert {interaction["item_id"] for interaction in alice_interactions} == {"iphone", "macbook"}
+        await db.close()
+
 if __name__ == "__main__":
-    asyncio.run(test_database())
\ No newline at end of file
+    asyncio.run(test_database())
+    asyncio.run(test_item_rating_aggregates())
+    asyncio.run(test_read_pool_during_write())
\ No newline at end of file
@@ -0,0 +1,96 @@
+import asyncio
+import os
+import random
+import tempfile
+import time
+from aiohttp.test_utils import TestClient, TestServer
+from api.recommendation_server import RecommendationAPI
+from models.persistent_cached_hybrid_recommender import PersistentCachedHybridRecommender
+
+async def test_deadline_fallbacks():
+    print("Testing Deadline Fallbacks")
+    print("=" * 40)
+    
+    categories = ["electronics", "kitchen", "books", "furniture"]
+    items_data = [
+        {"item_id": f"item_{i}", "category": categories[i % 4], "brand": f"brand{i % 7}",
+         "description": f"{categories[i % 4]} product model{i} series{i % 11}"}
+        for i in range(400)
+    ]
+    rng = random.Random(11)
+    interactions = [
+        {"user_id": f"user_{rng.randrange(300)}", "item_id": f"item_{rng.randrange(400)}", "rating": rng.randint(1, 5)}
+        for _ in range(6000)
+    ]
+    interactions += [
+        {"user_id": "alice", "item_id": "item_0", "rating": 5},
+        {"user_id": "alice", "item_id": "item_4", "rating": 4},
+    ]
+    
+    with tempfile.TemporaryDirectory() as work_dir:
+        system = PersistentCachedHybridRecommender(os.path.join(work_dir, "deadline.db"))
+        await system.initialize(interactions, items_data)
+        
+        print("\n1. Full scoring without a deadline:")
+        start_time = time.time()
+        full = await system.get_recommendations("user_1", 5)
+        print(f"{full['source']} in {(time.time() - start_time) * 1000:.1f}ms")
+        
+        print("\n2. A missed deadline returns neighbors of recent items:")
+        await system.record_user_interaction("alice", "item_8", 5.0)
+        start_time = time.time()
+        result = await system.get_recommendations("alice", 5, deadline_ms=5)
+        elapsed = (time.time() - start_time) * 1000
+        print(f"{result['source']} in {elapsed:.1f}ms: {[r['item'] for r in result['recommendations']]}")
+        assert result["source"] == "fallback:item_neighbors" and result["degraded"]
+        assert not {"item_0", "item_4", "item_8"} & {r["item"] for r in result["recommendations"]}
+        
+        print("\n3. The abandoned computation still fills the cache:")
+        while system.deadline_tasks:
+            await asyncio.sleep(0.01)
+        cached = await system.get_recommendations("alice", 5, deadline_ms=5)
+        print(f"Next request: {cached['source']}")
+        assert cached["source"] == "cache"
+        
+        print("\n4. Users without cached history fall back to popular items:")
+        result = await system.get_recommendations("stranger", 3, deadline_ms=0)
+        print(f"{result['source']}: {[r['item'] for r in result['recommendations']]}")
+        assert result["source"] == "fallback:popular"
+        print(f"Stats: {system.get_performance_stats()['system_performance']}")
+        
+        print("\n5. Offloaded scoring while the model keeps changing:")
+        async def grow_model():
+            for i in range(40):
+                system.recommender.apply_ratings([
+                    {"user_id": f"newcomer_{i}_{j}", "item_id": f"item_{rng.randrange(400)}", "rating": 4}
+                    for j in range(5)
+                ])
+                await system.record_user_interaction(f"user_{i}", f"item_{i}", 3.0)
+                await asyncio.sleep(0)
+        
+        requests = [system.get_recommendations(f"user_{100 + i}", 5, deadline_ms=60000) for i in range(40)]
+        results = await asyncio.gather(grow_model(), *requests)
+        assert all(result["source"] == "computed" for result in results[1:])
+        assert "newcomer_39_4" in system.recommender.collaborative.users
+        
+        print("\n6. Deadline header on the API:")
+        api = RecommendationAPI()
+        api.recommender = system
+        client = TestClient(TestServer(api.app))
+        await client.start_server()
+        try:
+            response = await client.get("/recommendations/user_2?count=3", headers={"X-Deadline-Ms": "0.001"})
+            print(f"Status {response.status}, X-Source: {response.headers['X-Source']}")
+            assert response.headers["X-Source"].startswith("fallback:")
+            assert api.response_cache.get_stats()["entries"] == 0
+            
+            for invalid in ("soon", "nan", "0", "-5", "inf"):
+                response = await client.get("/recommendations/user_2?count=3", headers={"X-Deadline-Ms": invalid})
+                print(f"Invalid deadline {invalid!r}: {response.status}")
+                assert response.status == 400
+        finally:
+            await client.close()
+            await api.close()
+
+if __name__ == "__main__":
+    asyncio.run(test_deadline_fallbacks())
@@ -0,0 +1,58 @@
+import asyncio
+from models.cached_hybrid_recommender import CachedHybridRecommender
+
+categories = ["electronics", "kitchen", "books"]
+items_data = [
+    {"item_id": f"item_{i}", "category": categories[i % 3], "brand": f"brand_{i % 5}",
+     "description": f"{categories[i % 3]} product model {i} series {i % 4}"}
+    for i in range(40)
+]
+interactions = [
+    {"user_id": f"user_{u}", "item_id": f"item_{(u * 3 + k) % 40}", "rating": 1 + (u + k) % 5}
+    for u in range(12) for k in range(15)
+]
+
+async def test_depth_cache():
+    print("Testing Depth-aware Caching")
+    print("=" * 40)
+    
+    system = CachedHybridRecommender()
+    await system.initialize(interactions, items_data)
+    
+    print("\n1. A miss caches twice the requested depth:")
+    first = await system.get_recommendations("user_1", 3)
+    entry = cached = await system.cache.get_user_recommendation_entry("user_1")
+    print(f"Source: {first['source']}, cached depth: {entry['depth']}, cached items: {len(entry['recommendations'])}")
+    assert first["source"] == "computed" and entry["depth"] == 6 and len(entry["recommendations"]) == 6
+    
+    print("\n2. A deeper request within the cached depth is sliced from cache:")
+    sliced = await system.get_recommendations("user_1", 5)
+    print(f"Source: {sliced['source']}")
+    assert sliced["source"] == "cache"
+    assert sliced["recommendations"] == entry["recommendations"][:5]
+    
+    print("\n3. A request past the cached depth extends the cached list:")
+    extended = await system.get_recommendations("user_1", 10)
+    entry = await system.cache.get_user_recommendation_entry("user_1")
+    items = [rec["item"] for rec in extended["recommendations"]]
+    print(f"Source: {extended['source']}, cached depth: {entry['depth']}, items: {items}")
+    assert extended["source"] == "cache_extended" and entry["depth"] == 20
+    assert extended["recommendations"][:6] == cached["recommendations"]
+    assert len(items) == 10 and len(set(items)) == 10
+    assert system.performance_stats["cache_extensions"] == 1
+    
+    print("\n4. The extension matches a full recompute:")
+    await system.cache.invalidate_user_cache("user_1")
+    recomputed = await system.get_recommendations("user_1", 10)
+    assert [rec["item"] for rec in recomputed["recommendations"]] == items
+    
+    print("\n5. Requests within the extended depth are served from cache:")
+    await system.get_recommendations("user_1", 10)
+    again = await system.get_recommendations("user_1", 15)
+    print(f"Source: {again['source']}")
+    assert again["source"] == "cache" and system.performance_stats["cache_extensions"] == 1
+    
+    await system.close()
+
+if __name__ == "__main__":
+    asyncio.run(test_depth_cache())
\ No newline at end of file
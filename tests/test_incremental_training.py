@@ -0,0 +1,72 @@
+import asyncio
+import os
+import tempfile
+from database.database_manager import DatabaseManager
+from models.persistent_cached_hybrid_recommender import PersistentCachedHybridRecommender
+
+def collaborative_scores(recommender, user_ids):
+    return {
+        user_id: {item: round(score, 6) for item, score in recommender.collaborative.get_recommendations(user_id, 10)}
+        for user_id in user_ids
+    }
+
+async def test_incremental_training():
+    print("Testing Watermark-based Incremental Training")
+    print("=" * 40)
+    
+    interactions = [
+        {"user_id": "alice", "item_id": "iphone", "rating": 5},
+        {"user_id": "alice", "item_id": "macbook", "rating": 4},
+        {"user_id": "bob", "item_id": "iphone", "rating": 5},
+        {"user_id": "bob", "item_id": "gaming_chair", "rating": 5},
+        {"user_id": "carol", "item_id": "macbook", "rating": 3},
+    ]
+    
+    items_data = [
+        {"item_id": "iphone", "category": "electronics", "brand": "apple", "description": "smartphone mobile phone"},
+        {"item_id": "macbook", "category": "electronics", "brand": "apple", "description": "laptop computer"},
+        {"item_id": "gaming_chair", "category": "furniture", "brand": "dxracer", "description": "chair gaming seat"},
+        {"item_id": "airpods", "category": "electronics", "brand": "apple", "description": "headphones wireless music"},
+    ]
+    
+    with tempfile.TemporaryDirectory() as work_dir:
+        db_path = os.path.join(work_dir, "test_incremental.db")
+        model_path = os.path.join(work_dir, "test_incremental.model")
+        
+        print("\n1. Full training writes a checkpoint:")
+        system = PersistentCachedHybridRecommender(db_path, model_path=model_path)
+        await system.initialize(interactions, items_data)
+        print(f"Watermark: {system.model_watermark}")
+        await system.close()
+        
+        print("\n2. Activity while the service is down:")
+        db = DatabaseManager(db_path)
+        await db.initialize()
+        await db.record_interaction("alice", "macbook", 2.0)
+        await db.record_interaction("dave", "airpods", 4.0)
+        await db.record_interaction("dave", "iphone", 5.0)
+        await db.close()
+        
+        print("\n3. Warm restart applies only the delta:")
+        system = PersistentCachedHybridRecommender(db_path, model_path=model_path)
+        await system.initialize()
+        restored_scores = collaborative_scores(system.recommender, ["alice", "bob", "carol", "dave"])
+        
+        print("\n4. Periodic refresh picks up new writes:")
+        await system.record_user_interaction("erin", "gaming_chair", 4.0)
+        result = await system.refresh_from_database()
+        print(f"Refresh applied {result['applied']} interactions")
+        await system.close()
+        
+        print("\n5. Compare with a full retrain:")
+        full = PersistentCachedHybridRecommender(db_path)
+        await full.initialize()
+        full_scores = collaborative_scores(full.recommender, ["alice", "bob", "carol", "dave"])
+        await full.close()
+        
+        print(f"Restored: {restored_scores}")
+        print(f"Full:     {full_scores}")
+        assert restored_scores == full_scores
+
+if __name__ == "__main__":
+    asyncio.run(test_incremental_training())
\ No newline at end of file
@@ -0,0 +1,114 @@
+import asyncio
+import os
+import tempfile
+import time
+import numpy as np
+from database.database_manager import DatabaseManager
+from database.interaction_log import InteractionLog, replay_log
+from models.persistent_cached_hybrid_recommender import PersistentCachedHybridRecommender
+
+async def test_interaction_log():
+    print("Testing Interaction Log")
+    print("=" * 40)
+    
+    with tempfile.TemporaryDirectory() as work_dir:
+        log_path = os.path.join(work_dir, "interactions.log")
+        
+        print("\n1. Append and replay with re-ratings:")
+        log = InteractionLog(log_path)
+        log.open()
+        log.append("alice", "iphone", 5.0)
+        log.append("alice", "macbook", 4.0)
+        log.append("bob", "iphone", 3.0)
+        log.append("alice", "iphone", 2.0)
+        log.close()
+        
+        user_index, item_index, user_codes, item_codes, ratings = replay_log(log_path)
+        users = {code: user_id for user_id, code in user_index.items()}
+        items = {code: item_id for item_id, code in item_index.items()}
+        replayed = {(users[u], items[i]): r for u, i, r in zip(user_codes.tolist(), item_codes.tolist(), ratings.tolist())}
+        print(f"Replayed: {replayed}")
+        assert replayed == {("alice", "macbook"): 4.0, ("bob", "iphone"): 3.0, ("alice", "iphone"): 2.0}
+        
+        print("\n2. A torn trailing record is dropped on reopen:")
+        with open(log_path, "ab") as f:
+            f.write(b"\x01\x02\x03")
+        log = InteractionLog(log_path)
+        log.open()
+        print(f"Records after reopen: {log.record_count}")
+        assert log.record_count == 4
+        log.append("carol", "airpods", 4.0)
+        log.close()
+        print(f"Users after append: {len(replay_log(log_path)[0])}")
+        
+        print("\n3. Replay speed versus querying SQLite:")
+        rng = np.random.default_rng(3)
+        interactions = [
+            {"user_id": f"user_{u}", "item_id": f"item_{i}", "rating": float(r)}
+            for u, i, r in zip(rng.integers(0, 2000, 100000), rng.integers(0, 500, 100000), rng.integers(1, 6, 100000))
+        ]
+        bulk_log_path = os.path.join(work_dir, "bulk.log")
+        bulk_log = InteractionLog(bulk_log_path)
+        bulk_log.open()
+        bulk_log.append_many(interactions)
+        bulk_log.close()
+        
+        db = DatabaseManager(os.path.join(work_dir, "bulk.db"))
+        await db.initialize()
+        await db.bulk_record_interactions(interactions)
+        
+        start_time = time.time()
+        replayed_ratings = replay_log(bulk_log_path)[4]
+        log_seconds = time.time() - start_time
+        
+        start_time = time.time()
+        db_rows = await db.get_all_interactions()
+        db_seconds = time.time() - start_time
+        await db.close()
+        print(f"Log replay: {len(replayed_ratings)} ratings in {log_seconds*1000:.1f}ms")
+        print(f"SQLite query: {len(db_rows)} rows in {db_seconds*1000:.1f}ms")
+        assert len(replayed_ratings) == len(db_rows)
+        
+        print("\n4. Cold start rebuilds the model from the log:")
+        seed_interactions = [
+            {"user_id": "alice", "item_id": "iphone", "rating": 5},
+            {"user_id": "alice", "item_id": "macbook", "rating": 4},
+            {"user_id": "bob", "item_id": "iphone", "rating": 5},
+            {"user_id": "bob", "item_id": "gaming_chair", "rating": 5},
+        ]
+        items_data = [
+            {"item_id": "iphone", "category": "electronics", "brand": "apple", "description": "smartphone mobile phone"},
+            {"item_id": "macbook", "category": "electronics", "brand": "apple", "description": "laptop computer"},
+            {"item_id": "gaming_chair", "category": "furniture", "brand": "dxracer", "description": "chair gaming seat"},
+        ]
+        db_path = os.path.join(work_dir, "system.db")
+        system_log_path = os.path.join(work_dir, "system.log")
+        system = PersistentCachedHybridRecommender(db_path, interaction_log_path=system_log_path)
+        await system.initialize(seed_interactions, items_data)
+        await system.record_user_interaction("carol", "macbook", 3.0)
+        await system.close()
+        
+        system = PersistentCachedHybridRecommender(db_path, interaction_log_path=system_log_path)
+        await system.initialize()
+        print(f"Users in rebuilt model: {sorted(system.recommender.collaborative.users)}")
+        assert sorted(system.recommender.collaborative.users) == ["alice", "bob", "carol"]
+        
+        print("\n5. Unacknowledged writes are logged once the database has them:")
+        await system.record_user_interaction("dave", "iphone", 4.0, wait_durable=False)
+        assert system.interaction_log.record_count == 5
+        await system.write_buffer.flush()
+        await asyncio.sleep(0)
+        assert system.interaction_log.record_count == 6
+        
+        print("\n6. Rows missing from the log fall back to the database and rebuild the log:")
+        await system.db.record_interaction("erin", "macbook", 2.0)
+        await system.close()
+        system = PersistentCachedHybridRecommender(db_path, interaction_log_path=system_log_path)
+        await system.initialize()
+        print(f"Users after fallback: {sorted(system.recommender.collaborative.users)}")
+        assert "erin" in system.recommender.collaborative.users
+        assert system.interaction_log.record_count == await system.db.count_interactions()
+        await system.close()
+
+if __name__ == "__main__":
+    asyncio.run(test_interaction_log())
\ No newline at end of file
@@ -0,0 +1,26 @@
+from cache.interaction_store import InteractionStore
+
+def test_interaction_store():
+    print("=== Testing Ring-buffer Interaction Store ===")
+    
+    store = InteractionStore(capacity=3, ttl=7200)
+    
+    print("\n1. Appending interactions past capacity:")
+    for item_id, rating in [("iphone", 5.0), ("macbook", 4.0), ("ipad", 3.0), ("airpods", 4.0)]:
+        store.append("alice", item_id, rating)
+    print(f"Buffer segments: {[len(view) for view in store.records('alice')]}")
+    print(f"Alice's interactions: {[i['item_id'] for i in store.get_interactions('alice')]}")
+    
+    print("\n2. Re-rating keeps only the latest rating per item:")
+    store.append("alice", "ipad", 5.0)
+    print(f"Alice's interactions: {[(i['item_id'], i['rating']) for i in store.get_interactions('alice')]}")
+    
+    print("\n3. Seeding a user from stored history:")
+    store.load("bob", [("iphone", 5.0, 1700000000.0), ("gaming_chair", 5.0, 1700000100.0)])
+    print(f"Bob's interactions: {store.get_interactions('bob')}")
+    
+    print("\n4. Unknown user:")
+    print(f"Known: {store.contains('carol')} | Interactions: {store.get_interactions('carol')}")
+
+if __name__ == "__main__":
+    test_interaction_store()
\ No newline at end of file
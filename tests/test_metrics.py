@@ -0,0 +1,85 @@
+import asyncio
+import os
+import tempfile
+from aiohttp.test_utils import TestClient, TestServer
+from api.recommendation_server import RecommendationAPI
+from models.persistent_cached_hybrid_recommender import PersistentCachedHybridRecommender
+from monitoring.metrics import REGISTRY, Histogram, MetricsRegistry
+
+def test_histogram():
+    print("Testing Histogram")
+    print("=" * 40)
+    
+    histogram = Histogram((0.001, 0.01, 0.1))
+    for value in (0.0005, 0.005, 0.005, 0.05, 0.5):
+        histogram.observe(value)
+    print(f"Counts: {histogram.counts}, p50: {histogram.quantile(0.5) * 1000:.2f}ms")
+    assert histogram.counts == [1, 2, 1, 1]
+    assert histogram.count == 5
+    assert 0.001 <= histogram.quantile(0.5) <= 0.01
+    
+    registry = MetricsRegistry()
+    registry.observe("stage_seconds", 0.002, stage='a"b')
+    registry.increment("requests_total", status=200)
+    text = registry.render()
+    print(text)
+    assert 'stage_seconds_bucket{stage="a\\"b",le="+Inf"} 1' in text
+    assert 'requests_total{status="200"} 1' in text
+
+async def test_metrics_endpoint():
+    print("\nTesting /metrics Endpoint")
+    print("=" * 40)
+    
+    interactions = [
+        {"user_id": "alice", "item_id": "iphone", "rating": 5},
+        {"user_id": "alice", "item_id": "macbook", "rating": 4},
+        {"user_id": "alice", "item_id": "coffee_maker", "rating": 2},
+        {"user_id": "bob", "item_id": "iphone", "rating": 5},
+        {"user_id": "bob", "item_id": "gaming_chair", "rating": 5},
+        {"user_id": "carol", "item_id": "coffee_maker", "rating": 4},
+    ]
+    items_data = [
+        {"item_id": "iphone", "category": "electronics", "brand": "apple", "description": "smartphone mobile phone"},
+        {"item_id": "macbook", "category": "electronics", "brand": "apple", "description": "laptop computer"},
+        {"item_id": "gaming_chair", "category": "furniture", "brand": "dxracer", "description": "chair gaming seat"},
+        {"item_id": "coffee_maker", "category": "kitchen", "brand": "cuisinart", "description": "coffee machine brewing"},
+        {"item_id": "cookbook", "category": "books", "brand": "penguin", "description": "recipes cooking food"},
+    ]
+    
+    REGISTRY.clear()
+    with tempfile.TemporaryDirectory() as work_dir:
+        api = RecommendationAPI()
+        api.recommender = PersistentCachedHybridRecommender(os.path.join(work_dir, "metrics.db"))
+        await api.recommender.initialize(interactions, items_data)
+        client = TestClient(TestServer(api.app))
+        await client.start_server()
+        
+        try:
+            for path in ("/recommendations/alice?count=3", "/recommendations/alice?count=3",
+                         "/recommendations/dave?count=3", "/popular?count=3"):
+                await (await client.get(path)).read()
+            await client.post("/recommendations/batch", json={"users": ["bob", "carol"]})
+            
+            response = await client.get("/metrics")
+            text = await response.text()
+            print(f"Content-Type: {response.headers['Content-Type']}")
+            print("\n".join(line for line in text.splitlines() if "_count{" in line))
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert "# TYPE http_request_duration_seconds histogram" in text
+            assert ('http_request_duration_seconds_count{endpoint="/recommendations/{user_id}",method="GET"} 3'
+                    in text)
+            assert 'http_requests_total{endpoint="/recommendations/{user_id}",method="GET",status="200"} 3' in text
+            for stage in ("cache_lookup", "db_fetch", "cf_scoring", "content_scoring", "blending", "serialization",
+                          "response_cache_lookup"):
+                assert f'recommendation_stage_duration_seconds_count{{stage="{stage}"}}' in text, stage
+            
+            stats = await (await client.get("/stats")).json()
+            print(f"\nStage latency from /stats: {stats['latency']['recommendation_stage_duration_seconds']}")
+            assert stats["latency"]["recommendation_stage_duration_seconds"]["stage=cf_scoring"]["count"] >= 1
+        finally:
+            await client.close()
+            await api.close()
+
+if __name__ == "__main__":
+    test_histogram()
+    asyncio.run(test_metrics_endpoint())
\ No newline at end of file
@@ -0,0 +1,108 @@
+import asyncio
+import os
+import tempfile
+import time
+from models.cached_hybrid_recommender import CachedHybridRecommender
+from models.model_store import load_content_model, load_model, save_model
+from models.persistent_cached_hybrid_recommender import PersistentCachedHybridRecommender
+
+def content_outputs(content_based, item_ids):
+    profile = [{"item_id": "iphone", "rating": 5}, {"item_id": "cookbook", "rating": 4}]
+    return {
+        "similar": {item_id: [(item, round(score, 6)) for item, score in content_based.get_similar_items(item_id, 3)]
+                    for item_id in item_ids},
+        "profile": [(item, round(score, 6)) for item, score in content_based.get_recommendations(profile, 3)]
+    }
+
+async def test_model_checkpoint():
+    print("Testing Model Checkpoints")
+    print("=" * 40)
+    
+    interactions = [
+        {"user_id": "alice", "item_id": "iphone", "rating": 5},
+        {"user_id": "alice", "item_id": "macbook", "rating": 4},
+        {"user_id": "bob", "item_id": "iphone", "rating": 5},
+        {"user_id": "bob", "item_id": "gaming_chair", "rating": 5},
+        {"user_id": "carol", "item_id": "coffee_maker", "rating": 4},
+        {"user_id": "carol", "item_id": "cookbook", "rating": 5},
+    ]
+    items_data = [
+        {"item_id": "iphone", "category": "electronics", "brand": "apple", "description": "smartphone mobile phone"},
+        {"item_id": "macbook", "category": "electronics", "brand": "apple", "description": "laptop computer"},
+        {"item_id": "gaming_chair", "category": "furniture", "brand": "dxracer", "description": "chair gaming seat"},
+        {"item_id": "coffee_maker", "category": "kitchen", "brand": "cuisinart", "description": "coffee machine brewing"},
+        {"item_id": "cookbook", "category": "books", "brand": "penguin", "description": "recipes cooking food"},
+    ]
+    item_ids = [item["item_id"] for item in items_data]
+    
+    with tempfile.TemporaryDirectory() as work_dir:
+        model_path = os.path.join(work_dir, "memory.model")
+        
+        print("\n1. First boot trains and writes a checkpoint:")
+        trained = CachedHybridRecommender(model_path=model_path)
+        await trained.initialize(interactions, items_data)
+        expected = content_outputs(trained.recommender.content_based, item_ids)
+        print(f"Files: {sorted(os.listdir(model_path))}")
+        assert any(filename.startswith("content_vocabulary.") for filename in os.listdir(model_path))
+        
+        print("\n2. Second boot loads every part of the model:")
+        start_time = time.time()
+        restored = CachedHybridRecommender(model_path=model_path)
+        await restored.initialize(interactions, items_data)
+        print(f"Restored in {(time.time() - start_time) * 1000:.1f}ms")
+        content_based = restored.recommender.content_based
+        assert content_based.neighbor_indices is not None
+        assert content_outputs(content_based, item_ids) == expected
+        assert (restored.recommender.collaborative.user_similarity == trained.recommender.collaborative.user_similarity).all()
+        transformed = content_based.vectorizer.transform(["apple laptop"])
+        assert transformed.nnz == trained.recommender.content_based.vectorizer.transform(["apple laptop"]).nnz
+        
+        print("\n3. Different training data makes the checkpoint stale:")
+        stale = CachedHybridRecommender(model_path=model_path)
+        await stale.initialize(interactions + [{"user_id": "dave", "item_id": "iphone", "rating": 4}], items_data)
+        assert "dave" in stale.recommender.collaborative.users
+        assert stale.recommender.content_based.neighbor_indices is None
+        
+        print("\n4. A changed catalogue refits only the content model:")
+        db_path = os.path.join(work_dir, "persistent.db")
+        persistent_path = os.path.join(work_dir, "persistent.model")
+        system = PersistentCachedHybridRecommender(db_path, model_path=persistent_path)
+        await system.initialize(interactions, items_data)
+        await system.close()
+        
+        system = PersistentCachedHybridRecommender(db_path, model_path=persistent_path)
+        await system.initialize()
+        assert system.recommender.content_based.neighbor_indices is not None
+        await system.close()
+        
+        extra_item = {"item_id": "airpods", "category": "electronics", "brand": "apple",
+                      "description": "headphones wireless music"}
+        system = PersistentCachedHybridRecommender(db_path, model_path=persistent_path)
+        await system.initialize(None, [extra_item])
+        print(f"Content items after catalogue change: {len(system.recommender.content_based.items)}")
+        assert "airpods" in system.recommender.content_based.items
+        assert system.recommender.content_based.neighbor_indices is None
+        await system.close()
+        restored_content = load_content_model(persistent_path, items_data + [extra_item])
+        assert restored_content is not None and "airpods" in restored_content.items
+        
+        print("\n5. Checkpoints without a content model still load:")
+        collaborative = trained.recommender.collaborative
+        legacy_path = os.path.join(work_dir, "legacy.model")
+        save_model(legacy_path, collaborative.users, collaborative.items, collaborative.user_item_matrix,
+                   collaborative.user_similarity, {"interactions": "legacy"})
+        assert load_content_model(legacy_path, items_data) is None
+        
+        print("\n6. Concurrent saves leave exactly one complete checkpoint:")
+        await asyncio.gather(*[trained._save_model(interactions) for _ in range(5)])
+        files = sorted(os.listdir(model_path))
+        print(f"Files: {files}")
+        assert len(files) == 1 + 2 + 8 and not any(filename.endswith(".tmp") for filename in files)
+        assert load_model(model_path)[0].users == trained.recommender.collaborative.users
+        
+        await trained.cache.close()
+        await restored.cache.close()
+        await stale.cache.close()
+
+if __name__ == "__main__":
+    asyncio.run(test_model_checkpoint())
\ No newline at end of file
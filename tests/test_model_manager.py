@@ -0,0 +1,123 @@
+import asyncio
+import os
+import tempfile
+from aiohttp.test_utils import TestClient, TestServer
+from api.recommendation_server import RecommendationAPI
+from models.cached_hybrid_recommender import CachedHybridRecommender
+from models.persistent_cached_hybrid_recommender import PersistentCachedHybridRecommender
+
+interactions = [
+    {"user_id": "alice", "item_id": "iphone", "rating": 5},
+    {"user_id": "alice", "item_id": "macbook", "rating": 4},
+    {"user_id": "bob", "item_id": "iphone", "rating": 5},
+    {"user_id": "bob", "item_id": "gaming_chair", "rating": 5},
+    {"user_id": "carol", "item_id": "coffee_maker", "rating": 4},
+    {"user_id": "carol", "item_id": "cookbook", "rating": 5},
+]
+items_data = [
+    {"item_id": "iphone", "category": "electronics", "brand": "apple", "description": "smartphone mobile phone"},
+    {"item_id": "macbook", "category": "electronics", "brand": "apple", "description": "laptop computer"},
+    {"item_id": "gaming_chair", "category": "furniture", "brand": "dxracer", "description": "chair gaming seat"},
+    {"item_id": "coffee_maker", "category": "kitchen", "brand": "cuisinart", "description": "coffee machine brewing"},
+    {"item_id": "cookbook", "category": "books", "brand": "penguin", "description": "recipes cooking food"},
+]
+
+async def test_hot_swap():
+    print("Testing Hot Model Swap")
+    print("=" * 40)
+    
+    with tempfile.TemporaryDirectory() as work_dir:
+        system = PersistentCachedHybridRecommender(os.path.join(work_dir, "swap.db"))
+        await system.initialize(interactions, items_data)
+        
+        print("\n1. Requests are served while the new model trains:")
+        old_model = system.recommender
+        generation = system.cache.generation
+        retrain_task = asyncio.create_task(system.retrain())
+        await asyncio.sleep(0)
+        assert system.model_manager.retraining
+        await system.record_user_interaction("bob", "macbook", 2.0)
+        
+        served = []
+        while not retrain_task.done():
+            served.append(await system.get_recommendations("alice", 3))
+            await asyncio.sleep(0)
+        result = await retrain_task
+        print(f"Served {len(served)} requests, result: {result}")
+        assert result["status"] == "swapped"
+        assert system.recommender is not old_model
+        assert system.cache.generation > generation
+        
+        print("\n2. Ratings received during training are replayed:")
+        assert result["replayed_interactions"] >= 1
+        assert system.recommender.collaborative.get_rating("bob", "macbook") == 2.0
+        
+        print("\n3. The replaced model still answers requests that hold it:")
+        assert old_model.get_recommendations("alice", None, 3)
+        
+        print("\n4. Only one retrain runs at a time:")
+        first = system.model_manager.retrain()
+        assert system.model_manager.retrain() is first
+        await first
+        stats = system.get_performance_stats()["model_manager"]
+        print(f"Manager stats: {stats}")
+        assert stats["swaps"] == 2 and not stats["retraining"]
+        await system.close()
+        
+        print("\n5. Scheduled retrains:")
+        scheduled = PersistentCachedHybridRecommender(os.path.join(work_dir, "swap.db"), retrain_interval=0.05)
+        await scheduled.initialize()
+        while scheduled.model_manager.stats["swaps"] == 0:
+            await asyncio.sleep(0.01)
+        assert scheduled.model_manager.last_result["reason"] == "scheduled"
+        await scheduled.close()
+
+async def test_rejected_model():
+    print("\n6. A model that loses most users is rejected:")
+    system = CachedHybridRecommender()
+    await system.initialize(interactions, items_data)
+    current = system.recommender
+    result = await system.retrain(interactions[:2], items_data)
+    print(f"Result: {result}")
+    assert result["status"] == "rejected"
+    assert system.recommender is current
+    
+    result = await system.retrain(interactions + [{"user_id": "dave", "item_id": "iphone", "rating": 4}], items_data)
+    assert result["status"] == "swapped"
+    assert "dave" in system.recommender.collaborative.users
+    await system.close()
+
+async def test_admin_endpoints():
+    print("\n7. Admin endpoints:")
+    with tempfile.TemporaryDirectory() as work_dir:
+        api = RecommendationAPI()
+        client = TestClient(TestServer(api.app))
+        await client.start_server()
+        try:
+            response = await client.post("/admin/model/retrain")
+            assert response.status == 400
+            
+            api.recommender = PersistentCachedHybridRecommender(os.path.join(work_dir, "admin.db"))
+            await api.recommender.initialize(interactions, items_data)
+            response = await client.post("/admin/model/retrain?wait=true")
+            result = await response.json()
+            print(f"Retrain: {response.status} {result}")
+            assert response.status == 200 and result["status"] == "swapped"
+            
+            response = await client.post("/admin/model/retrain")
+            assert response.status == 202
+            await api.recommender.model_manager.retrain_task
+            
+            response = await client.get("/admin/model")
+            status = await response.json()
+            print(f"Model status: {status}")
+            assert status["trained"] and status["users"] == 3 and status["swaps"] == 2
+            assert status["last_result"]["reason"] == "admin"
+        finally:
+            await client.close()
+            await api.close()
+
+if __name__ == "__main__":
+    asyncio.run(test_hot_swap())
+    asyncio.run(test_rejected_model())
+    asyncio.run(test_admin_endpoints())
\ No newline at end of file
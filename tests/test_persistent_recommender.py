@@ -1,5 +1,7 @@
 import asyncio
+import os
 import sys
+import tempfile
 sys.path.append('..')
 from models.persistent_cached_hybrid_recommender import PersistentCachedHybridRecommender
 
@@ -49,7 +51,32 @@ async def test_persistent_system():
     similar_result = await system.get_similar_items("iphone", 2)
     print(f"Similar to iPhone: {[item['item'] for item in similar_result['similar_items']]}")
     
-    print("\n6. Performance stats:")
+    print("\n6. A rating that lands during the history fetch is not lost:")
+    system.cache.interactions.remove("bob")
+    fetch = system.db.get_user_interactions
+    async def racing_fetch(user_id, limit=None):
+        rows = await fetch(user_id, limit=limit)
+        if not racing_fetch.raced:
+            racing_fetch.raced = True
+            await system.record_user_interaction("bob", "airpods", 3.0)
+        return rows
+    racing_fetch.raced = False
+    system.db.get_user_interactions = racing_fetch
+    history = await system._get_model_interactions("bob")
+    system.db.get_user_interactions = fetch
+    print(f"Bob's history: {history}")
+    assert {"airpods", "iphone", "gaming_chair"} <= {interaction["item_id"] for interaction in history}
+    
+    print("\n7. Requests during retrain:")
+    retrain_task = asyncio.create_task(system.retrain())
+    concurrent = []
+    while not retrain_task.done():
+        concurrent.append(await system.get_recommendations("bob", 3))
+        await asyncio.sleep(0)
+    await retrain_task
+    print(f"Served {len(concurrent)} requests while retraining")
+    
+    print("\n8. Performance stats:")
     stats = system.get_performance_stats()
     print(f"Cache hit rate: {stats['cache_hit_rate']}")
     print(f"Database connected: {stats['database_connected']}")
@@ -57,5 +84,41 @@ async def test_persistent_system():
     await system.close()
     print("\nTest completed! Data saved to test_persistent.db")
 
+async def test_warm_restart():
+    print("\nTesting Warm Restart")
+    print("=" * 40)
+    
+    interactions = [
+        {"user_id": "alice", "item_id": "iphone", "rating": 5},
+        {"user_id": "bob", "item_id": "gaming_chair", "rating": 4},
+    ]
+    items_data = [
+        {"item_id": "iphone", "category": "electronics", "brand": "apple", "description": "smartphone mobile phone"},
+        {"item_id": "gaming_chair", "category": "furniture", "brand": "dxracer", "description": "chair gaming seat"},
+    ]
+    
+    with tempfile.TemporaryDirectory() as work_dir:
+        db_path = os.path.join(work_dir, "warm.db")
+        snapshot_path = os.path.join(work_dir, "warm.cache")
+        system = PersistentCachedHybridRecommender(db_path, snapshot_path=snapshot_path)
+        await system.initialize(interactions, items_data, seed_empty_only=True)
+        assert len(await system.db.get_all_interactions()) == 2
+        await system.close()
+        
+        print("\n1. Restarting with the same seed data skips the seed and the precompute:")
+        system = PersistentCachedHybridRecommender(db_path, snapshot_path=snapshot_path)
+        precomputed = []
+        set_popular_items = system.cache.set_popular_items
+        async def counting_set_popular_items(category, items, ttl=3600):
+            precomputed.append(category)
+            await set_popular_items(category, items, ttl=ttl)
+        system.cache.set_popular_items = counting_set_popular_items
+        await system.initialize(interactions, items_data, seed_empty_only=True)
+        print(f"Precomputed categories: {precomputed}")
+        assert precomputed == []
+        assert system.cache.has_popular_items("all")
+        await system.close()
+
 if __name__ == "__main__":
-    asyncio.run(test_persistent_system())
\ No newline at end of file
+    asyncio.run(test_persistent_system())
+    asyncio.run(test_warm_restart())
\ No newline at end of file
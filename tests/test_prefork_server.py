@@ -0,0 +1,157 @@
+import asyncio
+import os
+import socket
+import tempfile
+import time
+import signal
+import aiohttp
+from api.prefork_server import ModelCoordinator, PreforkServer, published_model_path
+from models.persistent_cached_hybrid_recommender import PersistentCachedHybridRecommender
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def _wait_for_workers(base_url: str, timeout: float = 60.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"{base_url}/health") as response:
+                    if response.status == 200:
+                        return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+    raise TimeoutError("Workers did not start")
+
+interactions = [
+    {"user_id": "alice", "item_id": "iphone", "rating": 5},
+    {"user_id": "alice", "item_id": "macbook", "rating": 4},
+    {"user_id": "bob", "item_id": "iphone", "rating": 5},
+    {"user_id": "bob", "item_id": "gaming_chair", "rating": 5},
+    {"user_id": "carol", "item_id": "coffee_maker", "rating": 4},
+]
+items_data = [
+    {"item_id": "iphone", "category": "electronics", "brand": "apple", "description": "smartphone mobile phone"},
+    {"item_id": "macbook", "category": "electronics", "brand": "apple", "description": "laptop computer"},
+    {"item_id": "gaming_chair", "category": "furniture", "brand": "dxracer", "description": "chair gaming seat"},
+    {"item_id": "coffee_maker", "category": "kitchen", "brand": "cuisinart", "description": "coffee machine brewing"},
+]
+
+async def test_prefork_server():
+    print("Testing Pre-fork Server")
+    print("=" * 40)
+    
+    with tempfile.TemporaryDirectory() as work_dir:
+        db_path = os.path.join(work_dir, "prefork.db")
+        recommender = PersistentCachedHybridRecommender(db_path, write_behind=False)
+        await recommender.initialize(interactions, items_data)
+        
+        port = _free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = PreforkServer(recommender, "127.0.0.1", port, workers=2,
+                               db_options={"db_path": db_path, "write_behind": False},
+                               publish_dir=os.path.join(work_dir, "shared"), publish_interval=0.5,
+                               poll_interval=0.2)
+        await server.start()
+        
+        try:
+            await _wait_for_workers(base_url)
+            
+            print("\n1. Requests are spread across workers:")
+            pids = set()
+            for _ in range(40):
+                async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(force_close=True)) as session:
+                    async with session.get(f"{base_url}/health") as response:
+                        pids.add((await response.json())["pid"])
+                if len(pids) == 2:
+                    break
+            print(f"Worker pids seen: {sorted(pids)}")
+            
+            async with aiohttp.ClientSession() as session:
+                print("\n2. Workers serve the shared model:")
+                async with session.get(f"{base_url}/recommendations/alice?count=3") as response:
+                    data = await response.json()
+                    print(f"alice: {[r['item'] for r in data['recommendations']]}")
+                async with session.get(f"{base_url}/stats") as response:
+                    shared_model = (await response.json())["performance"]["shared_model"]
+                    print(f"Shared model: {shared_model}")
+                    assert shared_model.endswith("v1")
+                
+                print("\n3. New interactions reach workers through a published version:")
+                async with session.post(f"{base_url}/interactions",
+                                        json={"user_id": "carol", "item_id": "iphone", "rating": 5}) as response:
+                    assert response.status == 200
+                
+                deadline = time.time() + 20
+                while time.time() < deadline and server.get_stats()["model_version"] < 2:
+                    await asyncio.sleep(0.1)
+                print(f"Coordinator stats: {server.get_stats()}")
+                assert server.get_stats()["model_version"] >= 2
+                assert "carol" in recommender.recommender.collaborative.users
+                
+                deadline = time.time() + 10
+                switched = False
+                while time.time() < deadline and not switched:
+                    async with session.get(f"{base_url}/stats") as response:
+                        switched = not (await response.json())["performance"]["shared_model"].endswith("v1")
+                    await asyncio.sleep(0.2)
+                print(f"Worker switched to new version: {switched}")
+                assert switched
+                assert server.get_stats()["model_epoch"] == 1
+            
+            print("\n4. A worker that dies is replaced:")
+            crashed = server.processes[0]
+            os.kill(crashed.pid, signal.SIGKILL)
+            deadline = time.time() + 10
+            while time.time() < deadline and server.get_stats()["worker_restarts"] == 0:
+                await asyncio.sleep(0.1)
+            stats = server.get_stats()
+            print(f"Workers after crash: {stats['workers']}, restarts: {stats['worker_restarts']}")
+            assert stats["worker_restarts"] == 1 and server.processes[0] is not crashed
+            await _wait_for_workers(base_url)
+        finally:
+            await server.close()
+            await recommender.close()
+
+async def test_worker_model_updates():
+    print("\n5. Workers only flush their caches for retrained models:")
+    with tempfile.TemporaryDirectory() as work_dir:
+        db_path = os.path.join(work_dir, "updates.db")
+        publish_dir = os.path.join(work_dir, "shared")
+        recommender = PersistentCachedHybridRecommender(db_path, write_behind=False)
+        await recommender.initialize(interactions, items_data)
+        coordinator = ModelCoordinator(recommender, publish_dir)
+        version = await coordinator.publish()
+        
+        worker = PersistentCachedHybridRecommender(db_path, write_behind=False,
+                                                   shared_model_path=published_model_path(publish_dir, version))
+        await worker.initialize()
+        generation = worker.cache.generation
+        alice_version = worker.cache.user_version("alice")
+        
+        await recommender.record_user_interaction("carol", "iphone", 5.0)
+        await recommender.refresh_from_database()
+        version = await coordinator.publish()
+        assert coordinator.model_epoch.value == 1
+        await worker.attach_shared_model(published_model_path(publish_dir, version), retrained=False)
+        print(f"Generation after delta: {worker.cache.generation}, carol: {worker.cache.user_version('carol')}")
+        assert worker.cache.generation == generation
+        assert worker.cache.user_version("alice") == alice_version
+        assert worker.cache.user_version("carol")[1] > 0
+        
+        await recommender.retrain()
+        version = await coordinator.publish()
+        assert coordinator.model_epoch.value == 2
+        await worker.attach_shared_model(published_model_path(publish_dir, version), retrained=True)
+        assert worker.cache.generation > generation
+        assert worker.cache.has_item_similarity("iphone")
+        
+        await worker.close()
+        await recommender.close()
+
+if __name__ == "__main__":
+    asyncio.run(test_prefork_server())
+    asyncio.run(test_worker_model_updates())
\ No newline at end of file
@@ -0,0 +1,91 @@
+import asyncio
+import json
+import os
+import tempfile
+from aiohttp.test_utils import TestClient, TestServer
+from api.recommendation_server import RecommendationAPI
+from models.persistent_cached_hybrid_recommender import PersistentCachedHybridRecommender
+
+async def read_event(response, timeout: float = 2.0) -> dict:
+    data_lines = []
+    while True:
+        line = (await asyncio.wait_for(response.content.readline(), timeout)).decode("utf-8").rstrip("\r\n")
+        if line.startswith("data:"):
+            data_lines.append(line[5:].strip())
+        elif not line and data_lines:
+            return json.loads("\n".join(data_lines))
+
+async def test_push_channel():
+    print("Testing Recommendation Push Channel")
+    print("=" * 40)
+    
+    interactions = [
+        {"user_id": "alice", "item_id": "iphone", "rating": 5},
+        {"user_id": "alice", "item_id": "macbook", "rating": 4},
+        {"user_id": "bob", "item_id": "iphone", "rating": 5},
+        {"user_id": "bob", "item_id": "gaming_chair", "rating": 5},
+        {"user_id": "carol", "item_id": "coffee_maker", "rating": 4},
+        {"user_id": "carol", "item_id": "cookbook", "rating": 5},
+    ]
+    items_data = [
+        {"item_id": "iphone", "category": "electronics", "brand": "apple", "description": "smartphone mobile phone"},
+        {"item_id": "macbook", "category": "electronics", "brand": "apple", "description": "laptop computer"},
+        {"item_id": "gaming_chair", "category": "furniture", "brand": "dxracer", "description": "chair gaming seat"},
+        {"item_id": "coffee_maker", "category": "kitchen", "brand": "cuisinart", "description": "coffee machine brewing"},
+        {"item_id": "cookbook", "category": "books", "brand": "penguin", "description": "recipes cooking food"},
+    ]
+    
+    with tempfile.TemporaryDirectory() as work_dir:
+        api = RecommendationAPI(push_coalesce_ms=100)
+        api.recommender = PersistentCachedHybridRecommender(os.path.join(work_dir, "push.db"))
+        await api.recommender.initialize(interactions, items_data)
+        client = TestClient(TestServer(api.app))
+        await client.start_server()
+        
+        try:
+            print("\n1. Subscribing sends the current recommendations:")
+            stream = await client.get("/recommendations/alice/stream?count=3")
+            print(f"Content-Type: {stream.headers['Content-Type']}")
+            assert stream.headers["Content-Type"].startswith("text/event-stream")
+            initial = await read_event(stream)
+            print(f"Initial: {[r['item'] for r in initial['recommendations']]}")
+            assert initial["user_id"] == "alice"
+            
+            print("\n2. A rating pushes refreshed recommendations:")
+            await client.post("/interactions", json={"user_id": "alice", "item_id": "cookbook", "rating": 5})
+            pushed = await read_event(stream)
+            print(f"Pushed: {[r['item'] for r in pushed['recommendations']]}")
+            assert all(r["item"] != "cookbook" for r in pushed["recommendations"])
+            
+            print("\n3. Rapid ratings are coalesced into one recompute:")
+            recomputes = api.push_channel.stats["recomputes"]
+            for item_id in ("gaming_chair", "coffee_maker", "iphone"):
+                await client.post("/interactions", json={"user_id": "alice", "item_id": item_id, "rating": 4})
+            await read_event(stream)
+            await asyncio.sleep(0.3)
+            print(f"Recomputes for 3 ratings: {api.push_channel.stats['recomputes'] - recomputes}")
+            assert api.push_channel.stats["recomputes"] - recomputes == 1
+            
+            print("\n4. The pushed recompute warms the response cache:")
+            cached = await client.get("/recommendations/alice?count=3")
+            print(f"Source: {cached.headers['X-Source']}")
+            assert cached.headers["X-Source"] == "response_cache"
+            
+            print("\n5. Other users' ratings are not pushed:")
+            await client.post("/interactions", json={"user_id": "bob", "item_id": "cookbook", "rating": 3})
+            await asyncio.sleep(0.3)
+            stats = await (await client.get("/stats")).json()
+            print(f"Push stats: {stats['push']}")
+            assert stats["push"]["subscribers"] == 1
+            assert stats["push"]["recomputes"] == recomputes + 1
+            
+            stream.close()
+            await asyncio.sleep(0.1)
+            print(f"Subscribers after disconnect: {api.push_channel.get_stats()['subscribers']}")
+            assert api.push_channel.get_stats()["subscribers"] == 0
+        finally:
+            await client.close()
+            await api.close()
+
+if __name__ == "__main__":
+    asyncio.run(test_push_channel())
\ No newline at end of file
@@ -0,0 +1,95 @@
+import asyncio
+import os
+import tempfile
+import time
+from aiohttp.test_utils import TestClient, TestServer
+from api.recommendation_server import RecommendationAPI
+from models.persistent_cached_hybrid_recommender import PersistentCachedHybridRecommender
+
+async def test_response_cache():
+    print("Testing Response Cache")
+    print("=" * 40)
+    
+    interactions = [
+        {"user_id": "alice", "item_id": "iphone", "rating": 5},
+        {"user_id": "alice", "item_id": "macbook", "rating": 4},
+        {"user_id": "bob", "item_id": "iphone", "rating": 5},
+        {"user_id": "bob", "item_id": "gaming_chair", "rating": 5},
+        {"user_id": "carol", "item_id": "coffee_maker", "rating": 4},
+        {"user_id": "carol", "item_id": "cookbook", "rating": 5},
+    ]
+    items_data = [
+        {"item_id": "iphone", "category": "electronics", "brand": "apple", "description": "smartphone mobile phone"},
+        {"item_id": "macbook", "category": "electronics", "brand": "apple", "description": "laptop computer"},
+        {"item_id": "gaming_chair", "category": "furniture", "brand": "dxracer", "description": "chair gaming seat"},
+        {"item_id": "coffee_maker", "category": "kitchen", "brand": "cuisinart", "description": "coffee machine brewing"},
+        {"item_id": "cookbook", "category": "books", "brand": "penguin", "description": "recipes cooking food"},
+    ]
+    
+    with tempfile.TemporaryDirectory() as work_dir:
+        api = RecommendationAPI()
+        api.recommender = PersistentCachedHybridRecommender(os.path.join(work_dir, "responses.db"))
+        await api.recommender.initialize(interactions, items_data)
+        client = TestClient(TestServer(api.app))
+        await client.start_server()
+        
+        try:
+            print("\n1. Second request is served from encoded bytes:")
+            first = await client.get("/recommendations/alice?count=3")
+            first_body = await first.read()
+            second = await client.get("/recommendations/alice?count=3")
+            print(f"First: {first.headers['X-Source']} in {first.headers['X-Response-Time-Ms']}ms")
+            print(f"Second: {second.headers['X-Source']} in {second.headers['X-Response-Time-Ms']}ms")
+            assert second.headers["X-Source"] == "response_cache"
+            assert await second.read() == first_body
+            assert "api_response_time_ms" not in await second.json()
+            
+            print("\n2. Matching If-None-Match returns 304:")
+            etag = second.headers["ETag"]
+            not_modified = await client.get("/recommendations/alice?count=3", headers={"If-None-Match": etag})
+            print(f"Status: {not_modified.status}, ETag: {not_modified.headers['ETag']}")
+            assert not_modified.status == 304
+            
+            print("\n3. An interaction invalidates the user's responses:")
+            await client.post("/interactions", json={"user_id": "alice", "item_id": "cookbook", "rating": 5})
+            after = await client.get("/recommendations/alice?count=3", headers={"If-None-Match": etag})
+            print(f"Status: {after.status}, source: {after.headers['X-Source']}")
+            assert after.status == 200 and after.headers["X-Source"] != "response_cache"
+            assert after.headers["ETag"] != etag
+            
+            print("\n4. Similar and popular items:")
+            for path in ("/similar/iphone?count=3", "/popular?category=electronics&count=3"):
+                await client.get(path)
+                cached = await client.get(path)
+                print(f"{path}: {cached.headers['X-Source']}")
+                assert cached.headers["X-Source"] == "response_cache"
+            
+            print("\n5. Hot path latency:")
+            start_time = time.time()
+            for _ in range(500):
+                response = await client.get("/recommendations/bob?count=3")
+                await response.read()
+            print(f"500 cached requests in {(time.time() - start_time) * 1000:.1f}ms")
+            
+            stats = await (await client.get("/stats")).json()
+            print(f"Response cache stats: {stats['response_cache']}")
+            assert stats["response_cache"]["not_modified"] == 1
+            
+            print("\n6. Response cache hits count towards refresh-ahead:")
+            cache = api.recommender.cache
+            meta = cache.refresh_meta[cache._generation_key("user_recs", "bob")]
+            print(f"Reads recorded for bob: {meta['reads']}")
+            assert meta["reads"] >= 499
+            refreshes = api.recommender.performance_stats["background_refreshes"]
+            meta["soft_expiry"] = time.time() + 1
+            response = await client.get("/recommendations/bob?count=3")
+            print(f"Source near expiry: {response.headers['X-Source']}")
+            assert response.headers["X-Source"] != "response_cache"
+            await asyncio.gather(*api.recommender.refresh_tasks.values())
+            assert api.recommender.performance_stats["background_refreshes"] == refreshes + 1
+        finally:
+            await client.close()
+            await api.close()
+
+if __name__ == "__main__":
+    asyncio.run(test_response_cache())
\ No newline at end of file
@@ -0,0 +1,100 @@
+import asyncio
+import os
+import tempfile
+import time
+from models.persistent_cached_hybrid_recommender import PersistentCachedHybridRecommender
+
+interactions = [
+    {"user_id": "alice", "item_id": "iphone", "rating": 5},
+    {"user_id": "alice", "item_id": "macbook", "rating": 4},
+    {"user_id": "bob", "item_id": "iphone", "rating": 5},
+    {"user_id": "bob", "item_id": "gaming_chair", "rating": 5},
+    {"user_id": "carol", "item_id": "coffee_maker", "rating": 4},
+]
+items_data = [
+    {"item_id": "iphone", "category": "electronics", "brand": "apple", "description": "smartphone mobile phone"},
+    {"item_id": "macbook", "category": "electronics", "brand": "apple", "description": "laptop computer"},
+    {"item_id": "gaming_chair", "category": "furniture", "brand": "dxracer", "description": "chair gaming seat"},
+    {"item_id": "coffee_maker", "category": "kitchen", "brand": "cuisinart", "description": "coffee machine brewing"},
+    {"item_id": "cookbook", "category": "books", "brand": "penguin", "description": "recipes cooking food"},
+]
+
+def burn_cpu(seconds: float):
+    end = time.process_time() + seconds
+    while time.process_time() < end:
+        pass
+
+async def test_retrain_scheduler():
+    print("Testing Drift Retrain Scheduler")
+    print("=" * 40)
+    
+    with tempfile.TemporaryDirectory() as work_dir:
+        system = PersistentCachedHybridRecommender(os.path.join(work_dir, "drift.db"), retrain_policy={
+            "min_interactions": 1000, "min_new_users": 2, "min_new_items": 100, "max_fallback_ratio": 0.5,
+            "min_scored_requests": 4, "min_interval": 0.0, "check_interval": 3600.0, "cpu_budget": 100.0
+        })
+        await system.initialize(interactions, items_data)
+        scheduler = system.retrain_scheduler
+        manager = system.model_manager
+        
+        print("\n1. Known users do not count as drift:")
+        await system.record_user_interaction("alice", "gaming_chair", 3.0)
+        decision = scheduler.evaluate()
+        print(f"Decision: {decision['action']}, drift: {decision['drift']}")
+        assert decision["action"] == "idle" and decision["drift"]["interactions"] == 1
+        assert decision["drift"]["new_users"] == 0
+        await system.refresh_from_database()
+        assert manager.get_drift()["interactions"] == 1
+        
+        print("\n2. New users cross the threshold and start a retrain:")
+        await system.record_user_interactions([
+            {"user_id": "dave", "item_id": "iphone", "rating": 5},
+            {"user_id": "erin", "item_id": "cookbook", "rating": 4},
+        ])
+        await system.refresh_from_database()
+        assert manager.get_drift()["interactions"] == 3
+        decision = scheduler.evaluate()
+        print(f"Decision: {decision['action']} {decision['reasons']}")
+        assert decision["action"] == "retrain" and decision["reasons"] == ["new_users"]
+        assert scheduler.evaluate()["action"] == "running"
+        result = await manager.retrain_task
+        assert result["status"] == "swapped" and result["reason"] == "drift:new_users"
+        assert "dave" in system.recommender.collaborative.users
+        assert manager.get_drift()["interactions"] == 0
+        
+        print("\n3. Fallback-heavy traffic triggers a retrain:")
+        for user_id in ("frank", "grace", "heidi", "ivan"):
+            await system.get_recommendations(user_id, 3)
+        drift = manager.get_drift()
+        print(f"Drift: {drift}")
+        assert drift["fallback_ratio"] == 1.0
+        assert scheduler.evaluate()["reasons"] == ["fallback_ratio"]
+        await manager.retrain_task
+        
+        print("\n4. Retrains are rate limited:")
+        scheduler.min_interval = 3600.0
+        for user_id in ("frank", "grace", "heidi", "ivan"):
+            await system.get_recommendations(user_id, 3)
+        decision = scheduler.evaluate()
+        assert decision["action"] == "rate_limited"
+        
+        print("\n5. A busy process postpones retrains up to the deferral limit:")
+        scheduler.min_interval = 0.0
+        scheduler.cpu_budget = 0.2
+        scheduler.evaluate()
+        burn_cpu(0.05)
+        decision = scheduler.evaluate()
+        print(f"CPU usage {decision['cpu_usage']} -> {decision['action']}")
+        assert decision["action"] == "deferred"
+        scheduler.max_deferral = 0.0
+        burn_cpu(0.05)
+        assert scheduler.evaluate()["action"] == "retrain"
+        await manager.retrain_task
+        
+        stats = system.get_performance_stats()["retrain_scheduler"]
+        print(f"Scheduler stats: {stats}")
+        assert stats["triggered"] == 3 and stats["rate_limited"] == 1 and stats["deferred"] >= 1
+        await system.close()
+
+if __name__ == "__main__":
+    asyncio.run(test_retrain_scheduler())
\ No newline at end of file
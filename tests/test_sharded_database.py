@@ -0,0 +1,92 @@
+import asyncio
+import os
+import random
+import tempfile
+import time
+from database.database_manager import DatabaseManager
+from database.sharded_database_manager import ShardedDatabaseManager
+
+async def test_sharded_database():
+    print("Testing Sharded Database")
+    print("=" * 40)
+    
+    items = [
+        {"item_id": f"item_{i}", "category": "electronics", "brand": "acme", "description": f"gadget {i}"}
+        for i in range(20)
+    ]
+    rng = random.Random(7)
+    interactions = [
+        {"user_id": f"user_{rng.randrange(200)}", "item_id": f"item_{rng.randrange(20)}", "rating": rng.randint(1, 5)}
+        for _ in range(2000)
+    ]
+    
+    with tempfile.TemporaryDirectory() as db_dir:
+        single = DatabaseManager(os.path.join(db_dir, "single.db"))
+        sharded = ShardedDatabaseManager(os.path.join(db_dir, "sharded.db"), shards=4)
+        await single.initialize()
+        await sharded.initialize()
+        
+        await single.bulk_upsert_items(items)
+        await sharded.bulk_upsert_items(items)
+        await single.bulk_record_interactions(interactions)
+        await sharded.bulk_record_interactions(interactions)
+        
+        print("\n1. Users are routed to one shard:")
+        shard_users = [len((await shard.get_interaction_vocabulary())[0]) for shard in sharded.shards]
+        print(f"Users per shard: {shard_users}")
+        assert sum(shard_users) == len((await single.get_interaction_vocabulary())[0])
+        
+        alice_shard = sharded.shard_for("alice")
+        await sharded.record_interaction("alice", "item_3", 4.0)
+        print(f"alice lives in {alice_shard.db_path}: {await alice_shard.get_user_interactions('alice')}")
+        await single.record_interaction("alice", "item_3", 4.0)
+        
+        print("\n2. Merged item aggregates match a single database:")
+        single_items = {item["item_id"]: item for item in await single.get_all_items()}
+        sharded_items = {item["item_id"]: item for item in await sharded.get_all_items()}
+        for item_id, item in single_items.items():
+            assert sharded_items[item_id]["current_rating_count"] == item["current_rating_count"]
+            assert abs(sharded_items[item_id]["current_avg_rating"] - item["current_avg_rating"]) < 1e-9
+        print(f"{len(sharded_items)} items agree")
+        
+        print("\n3. Fan-out reads:")
+        print(f"All interactions: {len(await sharded.get_all_interactions())} "
+              f"(single: {len(await single.get_all_interactions())})")
+        watermark = await sharded.get_interaction_watermark()
+        await sharded.record_interaction("bob", "item_5", 2.0)
+        delta = await sharded.get_interactions_since(watermark)
+        print(f"Interactions since watermark include bob: {any(row['user_id'] == 'bob' for row in delta)}")
+        
+        stored = len(await sharded.get_all_interactions())
+        await sharded.close()
+        
+        print("\n4. Reopening with a different shard count is refused:")
+        for shards in (2, 8):
+            resharded = ShardedDatabaseManager(os.path.join(db_dir, "sharded.db"), shards=shards)
+            try:
+                await resharded.initialize()
+                raise AssertionError(f"opened 4 shards as {shards}")
+            except ValueError as e:
+                print(f"{shards} shards: {e}")
+        reopened = ShardedDatabaseManager(os.path.join(db_dir, "sharded.db"), shards=4)
+        await reopened.initialize()
+        assert len(await reopened.get_all_interactions()) == stored
+        await reopened.close()
+        await single.close()
+        
+        print("\n5. Concurrent write throughput:")
+        for shards in (1, 4):
+            manager = ShardedDatabaseManager(os.path.join(db_dir, f"throughput_{shards}.db"), shards=shards)
+            await manager.initialize()
+            batches = [
+                [{"user_id": f"user_{b}_{i}", "item_id": f"item_{i % 20}", "rating": 4.0} for i in range(500)]
+                for b in range(20)
+            ]
+            start_time = time.time()
+            await asyncio.gather(*[manager.bulk_record_interactions(batch) for batch in batches])
+            elapsed = time.time() - start_time
+            print(f"{shards} shard(s): {10000 / elapsed:.0f} rows/sec")
+            await manager.close()
+
+if __name__ == "__main__":
+    asyncio.run(test_sharded_database())
\ No newline at end of file
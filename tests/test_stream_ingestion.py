@@ -0,0 +1,57 @@
+import asyncio
+import json
+from aiohttp.test_utils import TestClient, TestServer
+from api.recommendation_server import RecommendationAPI
+
+interactions = [
+    {"user_id": "alice", "item_id": "iphone", "rating": 5},
+    {"user_id": "alice", "item_id": "macbook", "rating": 4},
+    {"user_id": "bob", "item_id": "iphone", "rating": 5},
+    {"user_id": "bob", "item_id": "gaming_chair", "rating": 5},
+]
+items_data = [
+    {"item_id": "iphone", "category": "electronics", "brand": "apple", "description": "smartphone mobile phone"},
+    {"item_id": "macbook", "category": "electronics", "brand": "apple", "description": "laptop computer"},
+    {"item_id": "gaming_chair", "category": "furniture", "brand": "dxracer", "description": "chair gaming seat"},
+]
+
+async def test_stream_ingestion():
+    print("Testing Streaming Interaction Ingestion")
+    print("=" * 40)
+    
+    api = RecommendationAPI(stream_batch_size=2, max_line_bytes=256)
+    await api.initialize(interactions, items_data)
+    client = TestClient(TestServer(api.app))
+    await client.start_server()
+    
+    try:
+        print("\n1. Valid and invalid lines are counted separately:")
+        lines = [
+            json.dumps({"user_id": "carol", "item_id": "iphone", "rating": 4}),
+            "not json",
+            "",
+            json.dumps({"user_id": "carol", "item_id": "macbook", "rating": 3}),
+            json.dumps({"user_id": "dave", "item_id": "gaming_chair", "rating": 5}),
+        ]
+        response = await client.post("/interactions/stream", data="\n".join(lines))
+        summary = await response.json()
+        print(f"Summary: {summary}")
+        assert response.status == 200
+        assert summary["received"] == 4 and summary["recorded"] == 3 and summary["rejected"] == 1
+        assert summary["errors"][0]["line"] == 2
+        
+        print("\n2. An over-long line is rejected and the stream resyncs at the next newline:")
+        long_line = json.dumps({"user_id": "erin", "item_id": "iphone", "rating": 5, "note": "x" * 100000})
+        body = "\n".join([long_line, json.dumps({"user_id": "erin", "item_id": "macbook", "rating": 4}), long_line])
+        response = await client.post("/interactions/stream", data=body)
+        summary = await response.json()
+        print(f"Summary: {summary}")
+        assert response.status == 200
+        assert summary["received"] == 3 and summary["recorded"] == 1 and summary["rejected"] == 2
+        assert [error["line"] for error in summary["errors"]] == [1, 3]
+    finally:
+        await client.close()
+        await api.close()
+
+if __name__ == "__main__":
+    asyncio.run(test_stream_ingestion())
\ No newline at end of file
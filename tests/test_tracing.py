@@ -0,0 +1,105 @@
+import asyncio
+import os
+import tempfile
+from aiohttp.test_utils import TestClient, TestServer
+from api.recommendation_server import RecommendationAPI
+from models.persistent_cached_hybrid_recommender import PersistentCachedHybridRecommender
+from monitoring.tracing import NOOP_SPAN, RecordingTracer, Tracer, get_tracer, set_tracer, span
+
+def test_spans():
+    print("Testing Spans")
+    print("=" * 40)
+    
+    set_tracer(None)
+    assert span("noop") is NOOP_SPAN
+    
+    tracer = RecordingTracer(capacity=2, slow_threshold_ms=1000, sample_rate=1.0)
+    set_tracer(tracer)
+    try:
+        assert span("outside a trace") is NOOP_SPAN
+        
+        for request in range(3):
+            trace = tracer.start_trace("request", request=request)
+            with span("outer"):
+                with span("inner", depth=2):
+                    pass
+            tracer.finish_trace(trace, status=200)
+        
+        traces = tracer.get_traces()
+        latest = traces["sampled"][0]
+        print(f"Buffered: {len(traces['sampled'])}, latest: {latest['attributes']}")
+        print(f"Spans: {latest['spans']}")
+        assert len(traces["sampled"]) == 2 and latest["attributes"]["request"] == 2
+        outer, inner = latest["spans"]
+        assert inner["parent_id"] == outer["span_id"] and outer["parent_id"] is None
+        assert inner["attributes"] == {"depth": 2}
+    finally:
+        set_tracer(None)
+    assert isinstance(get_tracer(), Tracer) and not get_tracer().enabled
+
+async def test_request_traces():
+    print("\nTesting Request Traces")
+    print("=" * 40)
+    
+    interactions = [
+        {"user_id": "alice", "item_id": "iphone", "rating": 5},
+        {"user_id": "alice", "item_id": "macbook", "rating": 4},
+        {"user_id": "alice", "item_id": "coffee_maker", "rating": 2},
+        {"user_id": "bob", "item_id": "iphone", "rating": 5},
+        {"user_id": "bob", "item_id": "gaming_chair", "rating": 5},
+        {"user_id": "carol", "item_id": "coffee_maker", "rating": 4},
+    ]
+    items_data = [
+        {"item_id": "iphone", "category": "electronics", "brand": "apple", "description": "smartphone mobile phone"},
+        {"item_id": "macbook", "category": "electronics", "brand": "apple", "description": "laptop computer"},
+        {"item_id": "gaming_chair", "category": "furniture", "brand": "dxracer", "description": "chair gaming seat"},
+        {"item_id": "coffee_maker", "category": "kitchen", "brand": "cuisinart", "description": "coffee machine brewing"},
+        {"item_id": "cookbook", "category": "books", "brand": "penguin", "description": "recipes cooking food"},
+    ]
+    
+    tracer = RecordingTracer(slow_threshold_ms=0, sample_rate=0.0)
+    set_tracer(tracer)
+    with tempfile.TemporaryDirectory() as work_dir:
+        api = RecommendationAPI()
+        api.recommender = PersistentCachedHybridRecommender(os.path.join(work_dir, "traces.db"))
+        await api.recommender.initialize(interactions, items_data)
+        client = TestClient(TestServer(api.app))
+        await client.start_server()
+        
+        try:
+            print("\n1. A slow request keeps its full stage breakdown:")
+            response = await client.get("/recommendations/alice?count=3", headers={"X-Deadline-Ms": "1000"})
+            trace_id = response.headers["X-Trace-Id"]
+            traces = await (await client.get("/debug/traces?kind=slow&limit=5")).json()
+            trace = next(trace for trace in traces["slow"] if trace["trace_id"] == trace_id)
+            print(f"{trace['name']} took {trace['duration_ms']}ms")
+            for name, stage in trace["stages"].items():
+                print(f"  {name}: {stage['total_ms']}ms x{stage['count']}")
+            for name in ("cache_lookup", "interactions_fetch", "db.get_user_interactions", "scoring", "cf_scoring",
+                         "content_scoring", "blending", "serialization"):
+                assert name in trace["stages"], name
+            
+            spans = {entry["name"]: entry for entry in trace["spans"]}
+            assert spans["cf_scoring"]["parent_id"] == spans["scoring"]["span_id"]
+            assert spans["db.get_user_interactions"]["parent_id"] == spans["db_fetch"]["span_id"]
+            assert spans["db_fetch"]["parent_id"] == spans["interactions_fetch"]["span_id"]
+            assert trace["attributes"]["status"] == 200
+            
+            print("\n2. Fast requests are not kept when the threshold is not met:")
+            tracer.slow_threshold_ms = 10000
+            before = tracer.get_stats()
+            await client.get("/recommendations/alice?count=3")
+            after = tracer.get_stats()
+            print(f"Traces: {after['traces'] - before['traces']}, kept: {after['buffered_slow'] - before['buffered_slow']}")
+            assert after["traces"] == before["traces"] + 1 and after["buffered_slow"] == before["buffered_slow"]
+            
+            invalid = await client.get("/debug/traces?kind=fast")
+            assert invalid.status == 400
+        finally:
+            await client.close()
+            await api.close()
+            set_tracer(None)
+
+if __name__ == "__main__":
+    test_spans()
+    asyncio.run(test_request_traces())
\ No newline at end of file
@@ -0,0 +1,73 @@
+import asyncio
+import os
+import tempfile
+import time
+from database.database_manager import DatabaseManager
+from database.write_behind import WriteBehindBuffer
+
+async def test_write_behind():
+    print("Testing Write-behind Buffer")
+    print("=" * 40)
+    
+    db_dir = tempfile.TemporaryDirectory()
+    db = DatabaseManager(os.path.join(db_dir.name, "test_write_behind.db"))
+    await db.initialize()
+    
+    buffer = WriteBehindBuffer(db, max_batch=100, max_delay_ms=5.0)
+    buffer.start()
+    
+    print("\n1. Concurrent durable writes share one commit:")
+    start_time = time.time()
+    await asyncio.gather(*[
+        buffer.record(f"user_{i}", "iphone", 4.0) for i in range(250)
+    ])
+    print(f"250 writes acknowledged in {(time.time() - start_time)*1000:.1f}ms")
+    print(f"Buffer stats: {buffer.get_stats()}")
+    
+    print("\n2. Fire-and-forget write:")
+    await buffer.record("alice", "macbook", 5.0, wait_durable=False)
+    print(f"Pending for alice: {buffer.pending_for('alice')}")
+    
+    print("\n3. Invalid writes fail alone:")
+    try:
+        buffer.submit("mallory", "iphone", "not a rating")
+    except ValueError as e:
+        print(f"Rejected on submit: {e}")
+    
+    bad_row = asyncio.get_running_loop().create_future()
+    buffer.pending.append(({"user_id": "mallory", "item_id": "iphone", "rating": None}, bad_row))
+    results = await asyncio.gather(bad_row, buffer.record("carol", "ipad", 3.0), return_exceptions=True)
+    print(f"Bad row: {type(results[0]).__name__}, good row: {results[1].result()}")
+    
+    print("\n4. Bulk writes land after earlier buffered writes:")
+    await buffer.record("dave", "iphone", 1.0, wait_durable=False)
+    await buffer.record_many([{"user_id": "dave", "item_id": "iphone", "rating": 5.0}])
+    dave_interactions = await db.get_user_interactions("dave")
+    print(f"Dave's rating: {dave_interactions[0]['rating']}")
+    assert dave_interactions[0]["rating"] == 5.0 and not buffer.pending_for("dave")
+    
+    print("\n5. A flush racing the background batch still sees both batches:")
+    racing = WriteBehindBuffer(db)
+    racing.submit("erin", "iphone", 4.0)
+    background = asyncio.create_task(racing._flush_batch())
+    await asyncio.sleep(0)
+    racing.submit("erin", "macbook", 3.0)
+    flushing = asyncio.create_task(racing.flush())
+    await asyncio.sleep(0)
+    print(f"In flight: {len(racing.in_flight)} batches, pending for erin: {len(racing.pending_for('erin'))}")
+    assert len(racing.in_flight) == 2 and len(racing.pending_for("erin")) == 2
+    await flushing
+    assert len(await db.get_user_interactions("erin")) == 2 and not racing.in_flight
+    await background
+    
+    await buffer.close()
+    print(f"After close: {buffer.get_stats()}")
+    
+    all_interactions = await db.get_all_interactions()
+    print(f"Interactions in database: {len(all_interactions)}")
+    
+    await db.close()
+    db_dir.cleanup()
+
+if __name__ == "__main__":
+    asyncio.run(test_write_behind())
\ No newline at end of file